@@ -0,0 +1,223 @@
+import argparse
+import mmap
+import random
+import struct
+
+from topology import PLUS, TOPOLOGIES
+import generator
+
+"""Binary puzzle files.
+
+A puzzle is the packed board followed by the packed presses that solve it (see board.cell_bit()),
+each (num_cols * num_rows + 7) // 8 bytes, little endian. A 5x5 puzzle is 8 bytes.
+
+A puzzle file adds a header: magic, num_cols, num_rows, topology name.
+
+An archive stores millions of puzzles in groups of the same topology, dimensions and difficulty - the number of moves
+in the stored solution. The index at the start of the file gives each group's offset, so a puzzle is read with a
+single slice of the memory-mapped file: no parsing, and only the bytes of that one puzzle are copied
+"""
+
+_PUZZLE_MAGIC = b"LGPZ"
+_ARCHIVE_MAGIC = b"LGPA"
+_VERSION = 1
+
+# magic, num_cols, num_rows, topology name length
+_PUZZLE_HEADER = struct.Struct("<4sHHB")
+# magic, version, num groups
+_ARCHIVE_HEADER = struct.Struct("<4sHI")
+# topology name length, num_cols, num_rows, num_moves, num puzzles, offset. Followed by the topology name
+_GROUP_ENTRY = struct.Struct("<BHHIQQ")
+
+"""Bytes per packed board, and per puzzle"""
+def board_size(num_cols, num_rows):
+    return (num_cols * num_rows + 7) // 8
+
+def _puzzle_bytes(board, presses, num_bytes):
+    return board.to_bytes(num_bytes, "little") + presses.to_bytes(num_bytes, "little")
+
+"""Puzzle file contents for a board and the presses that solve it"""
+def pack_puzzle(board, presses, num_cols, num_rows, topology=PLUS):
+    name = topology.name.encode()
+    header = _PUZZLE_HEADER.pack(_PUZZLE_MAGIC, num_cols, num_rows, len(name)) + name
+    return header + _puzzle_bytes(board, presses, board_size(num_cols, num_rows))
+
+"""Reads pack_puzzle() bytes. Returns (board, presses, num_cols, num_rows, topology)"""
+def unpack_puzzle(data):
+    magic, num_cols, num_rows, name_length = _PUZZLE_HEADER.unpack_from(data)
+    if magic != _PUZZLE_MAGIC:
+        raise ValueError(f"Not a puzzle file: {magic}")
+
+    offset = _PUZZLE_HEADER.size + name_length
+    topology = TOPOLOGIES[bytes(data[_PUZZLE_HEADER.size:offset]).decode()]
+    num_bytes = board_size(num_cols, num_rows)
+
+    board = int.from_bytes(data[offset:offset + num_bytes], "little")
+    presses = int.from_bytes(data[offset + num_bytes:offset + 2 * num_bytes], "little")
+    return board, presses, num_cols, num_rows, topology
+
+def save_puzzle(path, board, presses, num_cols, num_rows, topology=PLUS):
+    with open(path, "wb") as f:
+        f.write(pack_puzzle(board, presses, num_cols, num_rows, topology))
+
+def load_puzzle(path):
+    with open(path, "rb") as f:
+        return unpack_puzzle(f.read())
+
+"""Collects puzzles, grouped by topology, dimensions and difficulty, then writes the archive on close()"""
+class ArchiveWriter:
+    def __init__(self, path):
+        self._path = path
+        self._groups = {}
+
+    def add(self, board, presses, num_cols, num_rows, topology=PLUS):
+        if self._groups is None:
+            raise ValueError(f"Archive writer is closed: {self._path}")
+
+        key = (topology.name, num_cols, num_rows, presses.bit_count())
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = bytearray()
+
+        group += _puzzle_bytes(board, presses, board_size(num_cols, num_rows))
+
+    """Writes the archive. Closing again does nothing - it doesn't write an empty archive over it"""
+    def close(self):
+        if self._groups is None:
+            return
+
+        keys = sorted(self._groups)
+        index_size = _ARCHIVE_HEADER.size + sum(_GROUP_ENTRY.size + len(key[0]) for key in keys)
+
+        with open(self._path, "wb") as f:
+            f.write(_ARCHIVE_HEADER.pack(_ARCHIVE_MAGIC, _VERSION, len(keys)))
+
+            offset = index_size
+            for key in keys:
+                name, num_cols, num_rows, num_moves = key
+                group = self._groups[key]
+                num_puzzles = len(group) // (2 * board_size(num_cols, num_rows))
+
+                f.write(_GROUP_ENTRY.pack(len(name), num_cols, num_rows, num_moves, num_puzzles, offset) + name.encode())
+                offset += len(group)
+
+            for key in keys:
+                f.write(self._groups[key])
+
+        self._groups = None
+
+    def __enter__(self):
+        return self
+
+    """An error while adding leaves no archive behind, rather than one missing puzzles"""
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._groups = None
+
+"""Read-only, memory-mapped puzzle archive, see ArchiveWriter"""
+class PuzzleArchive:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, num_groups = _ARCHIVE_HEADER.unpack_from(self._mmap)
+        if magic != _ARCHIVE_MAGIC or version != _VERSION:
+            raise ValueError(f"Not a puzzle archive: {magic}, version {version}")
+
+        # (topology name, num_cols, num_rows) -> {num_moves: (num puzzles, offset)}
+        self._index = {}
+        position = _ARCHIVE_HEADER.size
+        for i in range(num_groups):
+            name_length, num_cols, num_rows, num_moves, num_puzzles, offset = _GROUP_ENTRY.unpack_from(self._mmap, position)
+            position += _GROUP_ENTRY.size
+            name = self._mmap[position:position + name_length].decode()
+            position += name_length
+
+            self._index.setdefault((name, num_cols, num_rows), {})[num_moves] = (num_puzzles, offset)
+
+    """Number of puzzles for the dimensions. num_moves - int, (min, max) tuple, or None for any"""
+    def count(self, num_cols, num_rows, num_moves=None, topology=PLUS):
+        return sum(num_puzzles for num_puzzles, offset in self._groups(num_cols, num_rows, num_moves, topology))
+
+    """The index-th puzzle needing num_moves moves. Returns (board, presses)"""
+    def puzzle(self, num_cols, num_rows, num_moves, index, topology=PLUS):
+        num_puzzles, offset = self._index.get((topology.name, num_cols, num_rows), {}).get(num_moves, (0, 0))
+        if index < 0 or index >= num_puzzles:
+            raise IndexError(f"Invalid puzzle index: {index}, {num_puzzles} puzzles for {num_cols}x{num_rows}, {num_moves} moves")
+
+        return self._read(num_cols, num_rows, offset, index)
+
+    """A random puzzle. num_moves - int, (min, max) tuple, or None for any
+    Returns (board, presses). Raises KeyError if the archive has no matching puzzle
+    """
+    def random_puzzle(self, num_cols, num_rows, num_moves=None, rng=random, topology=PLUS):
+        groups = self._groups(num_cols, num_rows, num_moves, topology)
+        index = rng.randrange(sum(num_puzzles for num_puzzles, offset in groups) or 1)
+
+        for num_puzzles, offset in groups:
+            if index < num_puzzles:
+                return self._read(num_cols, num_rows, offset, index)
+            index -= num_puzzles
+
+        raise KeyError(f"No {topology.name} {num_cols}x{num_rows} puzzles with {num_moves} moves in the archive")
+
+    """Difficulties in the archive for the dimensions, sorted"""
+    def difficulties(self, num_cols, num_rows, topology=PLUS):
+        return sorted(self._index.get((topology.name, num_cols, num_rows), {}))
+
+    def _groups(self, num_cols, num_rows, num_moves, topology):
+        groups = self._index.get((topology.name, num_cols, num_rows), {})
+
+        if num_moves is None:
+            return [groups[moves] for moves in sorted(groups)]
+        if isinstance(num_moves, tuple):
+            return [groups[moves] for moves in sorted(groups) if num_moves[0] <= moves <= num_moves[1]]
+        return [groups[num_moves]] if num_moves in groups else []
+
+    def _read(self, num_cols, num_rows, offset, index):
+        num_bytes = board_size(num_cols, num_rows)
+        start = offset + index * 2 * num_bytes
+
+        board = int.from_bytes(self._mmap[start:start + num_bytes], "little")
+        presses = int.from_bytes(self._mmap[start + num_bytes:start + 2 * num_bytes], "little")
+        return board, presses
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+"""Writes an archive of generated puzzles: count distinct puzzles for each number of moves.
+count can't be more than the number of distinct boards for the moves, ex: 4x4 has 16 one-move puzzles and 32 seven-move ones.
+Raises ValueError if there aren't that many, after max_duplicates puzzles in a row that were already found
+(see generator.generate_puzzles()), and writes no archive
+"""
+def build_archive(path, num_cols, num_rows, count, moves, rand_seed=None, topology=PLUS, max_duplicates=generator._max_duplicates):
+    with ArchiveWriter(path) as writer:
+        for num_moves in moves:
+            for board, presses in generator.generate_puzzles(num_cols, num_rows, count, num_moves, rand_seed, topology, max_duplicates):
+                writer.add(board, presses, num_cols, num_rows, topology)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a puzzle archive")
+    parser.add_argument("path")
+    parser.add_argument("--cols", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--count", type=int, default=16, help="Puzzles per number of moves, at most as many as there are: 16 for 4x4 with one move")
+    parser.add_argument("--min-moves", type=int, default=1)
+    parser.add_argument("--max-moves", type=int, default=7)
+    parser.add_argument("--topology", choices=list(TOPOLOGIES), default="plus")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    try:
+        build_archive(args.path, args.cols, args.rows, args.count, range(args.min_moves, args.max_moves + 1), args.seed, TOPOLOGIES[args.topology])
+    except ValueError as error:
+        parser.exit(1, f"{error}\n")
@@ -0,0 +1,77 @@
+import numpy as np
+
+from grid import Grid
+from topology import PLUS
+
+# Cell offsets toggled by a move: the cell, left, right, top, bottom. Format: (col, row)
+_move_offsets = [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+
+"""Many boards of the same dimensions, stepped together with NumPy.
+Boards are a bool array shaped (num_boards, num_rows, num_cols), True = light on
+Only the plus topology is supported
+"""
+class BatchGrid:
+    def __init__(self, num_boards, col=4, row=4):
+        self._num_cols = col
+        self._num_rows = row
+        self._boards = np.ones((num_boards, row, col), dtype=bool)
+
+    """Creates a batch holding a copy of each grid's board. All the grids must have the same dimensions"""
+    @classmethod
+    def from_grids(cls, grids):
+        num_cols, num_rows = grids[0].dimensions()
+        batch = cls(len(grids), num_cols, num_rows)
+
+        for i, grid in enumerate(grids):
+            if grid.topology() != PLUS:
+                raise ValueError(f"Grid {i} topology {grid.topology()} isn't supported")
+            if grid.dimensions() != (num_cols, num_rows):
+                raise ValueError(f"Grid {i} dimensions {grid.dimensions()} don't match {(num_cols, num_rows)}")
+            batch._boards[i] = batch._unpack(grid.packed_board())
+
+        return batch
+
+    """Returns a new Grid with the board at the given index"""
+    def to_grid(self, index):
+        grid = Grid(self._num_cols, self._num_rows)
+        grid.load_board(self._pack(self._boards[index]))
+        return grid
+
+    def _unpack(self, board):
+        num_cells = self._num_cols * self._num_rows
+        board_bytes = np.frombuffer(board.to_bytes((num_cells + 7) // 8, "little"), dtype=np.uint8)
+        bits = np.unpackbits(board_bytes, count=num_cells, bitorder="little")
+        return bits.reshape(self._num_rows, self._num_cols).astype(bool)
+
+    def _pack(self, board):
+        return int.from_bytes(np.packbits(board.reshape(-1), bitorder="little").tobytes(), "little")
+
+    """Applies one move to every board.
+    cols, rows - int arrays with one coordinate per board
+    """
+    def step(self, cols, rows):
+        cols = np.asarray(cols)
+        rows = np.asarray(rows)
+
+        if (cols < 0).any() or (cols >= self._num_cols).any() or (rows < 0).any() or (rows >= self._num_rows).any():
+            raise IndexError(f"Invalid grid range in moves")
+
+        # Each board has one move, so the indexes are unique per offset and can be toggled in place
+        board_indexes = np.arange(len(self._boards))
+        for col_offset, row_offset in _move_offsets:
+            offset_cols = cols + col_offset
+            offset_rows = rows + row_offset
+            in_range = (offset_cols >= 0) & (offset_cols < self._num_cols) & (offset_rows >= 0) & (offset_rows < self._num_rows)
+
+            self._boards[board_indexes[in_range], offset_rows[in_range], offset_cols[in_range]] ^= True
+
+    """Bool array, True for every board with all the lights on"""
+    def solved(self):
+        return self._boards.reshape(len(self._boards), -1).all(axis=1)
+
+    def num_boards(self):
+        return len(self._boards)
+
+    """Num columns, num rows"""
+    def dimensions(self):
+        return self._num_cols, self._num_rows
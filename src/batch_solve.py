@@ -0,0 +1,172 @@
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+
+from board import cell_bit
+from grid import Grid
+from topology import PLUS, TOPOLOGIES
+import solver
+
+"""Headless batch solver: reads boards as JSON lines, solves them on a process pool, and writes one JSON line per board.
+
+Input line: {"id": "drop-1", "board": ["O·O", "·OO", "OO·"], "topology": "plus", "method": "optimal"}
+    board - rows of lights, top row first. "O" or "1" is on, "·", "." or "0" is off
+    id, topology, method (optional) - id defaults to the line number, topology to plus,
+        method to the topology's default, see solver.default_method()
+Output line: {"id": "drop-1", "solvable": true, "num_moves": 3, "moves": [[0, 1], ...], "solved": true}
+    solved - the grid was solved by playing the moves
+    A line that can't be read gets {"id": ..., "error": "..."}
+With --steps, each solvable board's output line comes after a line per step, streamed as the steps are rendered:
+    {"id": "drop-1", "step": 1, "move": [0, 1], "frame": "..."} - frame: the board before and after the move, see Grid.solution_steps()
+"""
+
+_on_symbols = frozenset("O1")
+_off_symbols = frozenset("·.0")
+
+"""Solves one input line with a Grid, same as the game. Returns the output line"""
+def solve_line(line, line_number):
+    request_id = line_number
+    try:
+        request = json.loads(line)
+        request_id = request.get("id", line_number)
+        grid, method = _request_grid(request)
+        return _solve_grid(request_id, grid, method)
+
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return _error_line(request_id, e)
+
+"""Yields a line per step of the input line's solution, then its output line. Only one step's frame is held at a time"""
+def step_lines(line, line_number):
+    request_id = line_number
+    try:
+        request = json.loads(line)
+        request_id = request.get("id", line_number)
+        grid, method = _request_grid(request)
+        steps = grid.solution_steps(method) if grid.find_solution(method) is not None else ()
+
+        for step, (coords, frame) in enumerate(steps, 1):
+            yield json.dumps({"id": request_id, "step": step, "move": coords, "frame": frame})
+        yield _solve_grid(request_id, grid, method)
+
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        yield _error_line(request_id, e)
+
+"""Grid with the request's board, and the solve method"""
+def _request_grid(request):
+    topology = TOPOLOGIES[request.get("topology", PLUS.name)]
+    method = request.get("method") or solver.default_method(topology)
+
+    num_cols, num_rows, board = _parse_board(request["board"])
+    grid = Grid(num_cols, num_rows, topology)
+    grid.load_board(board)
+    return grid, method
+
+"""Solves the grid. Returns the output line"""
+def _solve_grid(request_id, grid, method):
+    moves = grid.find_solution(method)
+    if moves is None:
+        return json.dumps({"id": request_id, "solvable": False})
+
+    grid.solve_puzzle(method)
+    return json.dumps({"id": request_id, "solvable": True, "num_moves": len(moves), "moves": moves, "solved": grid.is_solved()})
+
+def _error_line(request_id, error):
+    return json.dumps({"id": request_id, "error": f"{type(error).__name__}: {error}"})
+
+"""Rows of light symbols to (num_cols, num_rows, packed board)"""
+def _parse_board(rows):
+    if not rows or not rows[0]:
+        raise ValueError("Empty board")
+
+    num_cols, num_rows = len(rows[0]), len(rows)
+    board = 0
+    for r, row in enumerate(rows):
+        if len(row) != num_cols:
+            raise ValueError(f"Row {r} has {len(row)} lights, expected {num_cols}")
+
+        for c, light in enumerate(row):
+            if light in _on_symbols:
+                board |= 1 << cell_bit(c, r, num_cols)
+            elif light not in _off_symbols:
+                raise ValueError(f"Invalid light {light!r} at ({c}, {r})")
+
+    return num_cols, num_rows, board
+
+"""Worker: solves a chunk of (line_number, line). Returns the output lines"""
+def _solve_chunk(chunk):
+    return [solve_line(line, line_number) for line_number, line in chunk]
+
+"""Groups the non-blank lines into chunks of (line number, line), line numbers starting at 1"""
+def _chunks(lines, chunk_size):
+    chunk = []
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+
+        chunk.append((line_number, line))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+"""Yields an output line for every input line.
+workers (optional) - worker processes, defaults to the number of cores
+ordered (optional) - same order as the input. Otherwise as soon as they're solved - match them by id
+chunk_size (optional) - lines sent to a worker at a time
+max_pending (optional) - chunks in flight, bounds memory for any input size. Defaults to 4 per worker
+"""
+def solve_stream(lines, workers=None, ordered=True, chunk_size=64, max_pending=None):
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    chunks = _chunks(lines, chunk_size)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+
+        for chunk in chunks:
+            pending.append(executor.submit(_solve_chunk, chunk))
+            if len(pending) < max_pending:
+                continue
+
+            if ordered:
+                yield from pending.popleft().result()
+            else:
+                done, not_done = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                pending = collections.deque(not_done)
+                for future in done:
+                    yield from future.result()
+
+        if ordered:
+            while pending:
+                yield from pending.popleft().result()
+        else:
+            for future in concurrent.futures.as_completed(pending):
+                yield from future.result()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve boards from JSON lines, see batch_solve.py")
+    parser.add_argument("input", nargs="?", default="-", help="JSON lines file, or - for stdin")
+    parser.add_argument("--output", default="-", help="Output file, or - for stdout")
+    parser.add_argument("--workers", type=int, help="Worker processes, defaults to the number of cores")
+    parser.add_argument("--unordered", action="store_true", help="Write solutions as soon as they're solved")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--steps", action="store_true", help="Also write each step of the solutions. Streamed one board at a time, without the worker processes")
+    args = parser.parse_args()
+
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    if args.steps:
+        output_lines = (output_line for line_number, line in enumerate(input_file, 1) if line.strip()
+                        for output_line in step_lines(line, line_number))
+    else:
+        output_lines = solve_stream(input_file, args.workers, not args.unordered, args.chunk_size)
+
+    with input_file, output_file:
+        for output_line in output_lines:
+            output_file.write(output_line + "\n")
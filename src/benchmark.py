@@ -0,0 +1,221 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from grid import Grid
+
+"""Benchmarks for the Grid operations, across board sizes, with a fixed and a random seed.
+
+    python3 src/benchmark.py --output baseline.json
+    python3 src/benchmark.py --compare baseline.json    # exits with 1 if anything got slower
+
+Each result is the time per operation in nanoseconds: the median and the fastest of the runs.
+A case runs `repeat` times, or fewer if it's used up its time budget - 1000x1000 boards take seconds per run
+benchmarks/baseline.json is the default sweep with --random-seed 1, on the machine and Python version it records.
+Compare against it on similar hardware, or record a new baseline first
+"""
+
+# Operations per timed run, for the operations that are too fast to time one at a time
+_num_ops = 1000
+
+# Puzzles are created once per size and seed, and reset before each run
+_puzzles = {}
+
+def _puzzle(size, seed):
+    grid = _puzzles.get((size, seed))
+    if grid is None:
+        grid = _puzzles[(size, seed)] = Grid(size, size)
+        grid.create_new_puzzle(rand_seed=seed)
+
+    grid.reset()
+    return grid
+
+def _random_coords(size, seed, count):
+    rng = random.Random(seed)
+    return [(rng.randrange(size), rng.randrange(size)) for i in range(count)]
+
+"""Each benchmark sets up a run, untimed, and returns (run, number of operations in the run)"""
+def bench_toggle(size, seed):
+    grid = _puzzle(size, seed)
+    first_coords, *coords = _random_coords(size, seed, _num_ops + 1)
+
+    # The first move after a reset also creates the move journal, a one-off
+    grid.player_toggle_cell(*first_coords)
+
+    def run():
+        for col, row in coords:
+            grid.player_toggle_cell(col, row)
+    return run, len(coords)
+
+def bench_undo(size, seed):
+    grid = _puzzle(size, seed)
+    for col, row in _random_coords(size, seed, _num_ops):
+        grid.player_toggle_cell(col, row)
+
+    def run():
+        for i in range(_num_ops):
+            grid.undo_last_move()
+    return run, _num_ops
+
+def bench_create(size, seed):
+    grid = Grid(size, size)
+    return (lambda: grid.create_new_puzzle(rand_seed=seed)), 1
+
+def bench_is_solved(size, seed):
+    # A new grid is solved, so the lights are compared too
+    grid = Grid(size, size)
+
+    def run():
+        for i in range(_num_ops):
+            grid.is_solved()
+    return run, _num_ops
+
+def bench_eq(size, seed):
+    grid = _puzzle(size, seed)
+
+    # Equal lights, in a different int - the same int compares without looking at the bits
+    snapshot = grid.snapshot()
+    board_copy = int.from_bytes(snapshot.board.to_bytes((size * size + 7) // 8, "little"), "little")
+    other = Grid(size, size)
+    other.restore(snapshot._replace(board=board_copy))
+
+    def run():
+        for i in range(_num_ops):
+            grid == other
+    return run, _num_ops
+
+def bench_repr(size, seed):
+    grid = _puzzle(size, seed)
+    return (lambda: repr(grid)), 1
+
+def bench_solution_steps(size, seed):
+    grid = _puzzle(size, seed)
+    return grid.solution_steps_str, 1
+
+# name: (benchmark, largest size it runs at)
+BENCHMARKS = {
+    "toggle": (bench_toggle, 1000),
+    "undo": (bench_undo, 1000),
+    "create_new_puzzle": (bench_create, 1000),
+    "is_solved": (bench_is_solved, 1000),
+    "eq": (bench_eq, 1000),
+    "repr": (bench_repr, 1000),
+    # Renders two grids per move of the solution
+    "solution_steps_str": (bench_solution_steps, 32),
+}
+
+DEFAULT_SIZES = [4, 16, 64, 256, 1000]
+
+"""Times one case. Returns the seconds per operation of each run"""
+def _time_case(benchmark, size, seed, repeat, max_seconds):
+    times = []
+    spent = 0
+
+    while len(times) < repeat and (not times or spent < max_seconds):
+        run, num_ops = benchmark(size, seed)
+
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+
+        times.append(elapsed / num_ops)
+        spent += elapsed
+
+    return times
+
+"""Runs the benchmarks. Returns the results document, see compare()
+names (optional) - benchmarks to run, defaults to all of them
+"""
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, repeat=5, max_seconds=2.0, fixed_seed=0, random_seed=None, progress=None):
+    if random_seed is None:
+        random_seed = random.randrange(2 ** 32)
+
+    results = []
+    for name in names or BENCHMARKS:
+        benchmark, max_size = BENCHMARKS[name]
+
+        for size in sizes:
+            if size > max_size:
+                continue
+
+            for seed_mode, seed in (("fixed", fixed_seed), ("random", random_seed)):
+                times = _time_case(benchmark, size, seed, repeat, max_seconds)
+                result = {
+                    "name": name, "size": size, "seed_mode": seed_mode, "seed": seed, "runs": len(times),
+                    "median_ns": round(statistics.median(times) * 1e9), "min_ns": round(min(times) * 1e9),
+                }
+                results.append(result)
+
+                if progress:
+                    progress(result)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+
+"""Compares results against a baseline, matching on name, size and seed mode.
+Returns a list of (result, baseline result, ratio), ratio is the median time over the baseline's
+Regressions are the ones with ratio > 1 + threshold
+"""
+def compare(current, baseline):
+    baseline_results = {(result["name"], result["size"], result["seed_mode"]): result for result in baseline["results"]}
+
+    comparisons = []
+    for result in current["results"]:
+        baseline_result = baseline_results.get((result["name"], result["size"], result["seed_mode"]))
+        if baseline_result is None:
+            continue
+        comparisons.append((result, baseline_result, result["median_ns"] / max(baseline_result["median_ns"], 1)))
+
+    return comparisons
+
+def _format_ns(ns):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f}{unit}"
+    return f"{ns}ns"
+
+def _print_result(result):
+    print(f"{result['name']:<20}{result['size']:>6}  {result['seed_mode']:<8}{_format_ns(result['median_ns']):>10}{_format_ns(result['min_ns']):>10}  runs: {result['runs']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Square board sizes")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), help="Defaults to all of them")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="Time budget per case, after the first run")
+    parser.add_argument("--seed", type=int, default=0, help="The fixed seed")
+    parser.add_argument("--random-seed", type=int, help="The random seed, to repeat a run. Defaults to a new one")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown over the baseline that's a regression, ex: 0.10 is 10%%")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<20}{'size':>6}  {'seed':<8}{'median':>10}{'min':>10}")
+    current = run_benchmarks(args.sizes, args.benchmarks, args.repeat, args.max_seconds, args.seed, args.random_seed, _print_result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = 0
+        print(f"\n{'benchmark':<20}{'size':>6}  {'seed':<8}{'baseline':>10}{'current':>10}{'change':>9}")
+        for result, baseline_result, ratio in compare(current, baseline):
+            regressed = ratio > 1 + args.threshold
+            regressions += regressed
+            print(f"{result['name']:<20}{result['size']:>6}  {result['seed_mode']:<8}{_format_ns(baseline_result['median_ns']):>10}"
+                  f"{_format_ns(result['median_ns']):>10}{(ratio - 1) * 100:>+8.1f}%{'  REGRESSION' if regressed else ''}")
+
+        print(f"\n{regressions} regression(s), threshold {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
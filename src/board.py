@@ -0,0 +1,187 @@
+"""Packed board helpers shared by the grid and the solvers"""
+
+from array import array
+import random
+
+from topology import PLUS
+
+# Toggle masks only depend on the topology and dimensions, so grids of the same size share them.
+# Key: (topology name, num_cols, num_rows), value: list of int masks indexed by cell bit
+_toggle_masks_cache = {}
+
+# Key: (topology name, num_cols, num_rows), value: (shifts, patterns), see toggle_patterns()
+_toggle_patterns_cache = {}
+
+# Key: (topology name, num_cols, num_rows), value: list of (cells, offsets), see press_groups()
+_press_groups_cache = {}
+
+# Key: toggle pattern, value: tuple of the pattern's set bit offsets
+_pattern_bits_cache = {}
+
+# Zobrist hashing: one random 64-bit key per cell, the same in every process
+# Key: num_cells, value: array of keys indexed by cell bit
+_zobrist_keys_cache = {}
+
+# Offsets of the set bits of every byte value, ex: _byte_bits[0b101] == (0, 2)
+_byte_bits = tuple(tuple(offset for offset in range(8) if (value >> offset) & 1) for value in range(256))
+
+# Key: num_cells, value: packed board with every light on - shared, so every grid doesn't keep its own copy
+_full_mask_cache = {}
+
+"""Cell (col, row) is stored in bit (row * num_cols + col) of the packed board.
+A set bit is a light that's on."""
+def cell_bit(col, row, num_cols):
+    return row * num_cols + col
+
+"""Returns the toggle masks in a compact form for moves on boards of any size: (shifts, patterns).
+The toggle mask of cell bit b is patterns[b] << shifts[b]. Cells with the same neighborhood shape share one
+pattern int, so memory stays linear in the number of cells.
+
+Moves reach at most one row up or down, so rows with the same parity and edges have the same shapes -
+each of those row kinds is worked out once, then repeated down the board.
+Computed once per topology and dimension, then cached"""
+def toggle_patterns(num_cols, num_rows, topology=PLUS):
+    key = (topology.name, num_cols, num_rows)
+    table = _toggle_patterns_cache.get(key)
+
+    if table is None:
+        shifts = array("q")
+        patterns = []
+        shared_patterns = {}
+        row_kinds = {}
+
+        for row in range(num_rows):
+            row_kind = (row % 2, row == 0, row == num_rows - 1)
+            if row_kind not in row_kinds:
+                # Shift of each cell's mask from the start of the row, and its pattern
+                row_shifts = []
+                row_patterns = []
+                for col in range(num_cols):
+                    bit = cell_bit(col, row, num_cols)
+                    bits = [bit] + [cell_bit(adj_col, adj_row, num_cols)
+                                    for adj_col, adj_row in topology.neighbors(col, row, num_cols, num_rows)]
+                    shift = min(bits)
+                    pattern = 0
+                    for mask_bit in bits:
+                        pattern |= 1 << (mask_bit - shift)
+
+                    row_shifts.append(shift - row * num_cols)
+                    row_patterns.append(shared_patterns.setdefault(pattern, pattern))
+                row_kinds[row_kind] = (row_shifts, row_patterns)
+
+            row_shifts, row_patterns = row_kinds[row_kind]
+            row_start = row * num_cols
+            shifts.extend([row_start + shift for shift in row_shifts])
+            patterns.extend(row_patterns)
+
+        table = (shifts, patterns)
+        _toggle_patterns_cache[key] = table
+
+    return table
+
+"""Returns the toggle masks for the dimensions: one int per cell, with the cell and its adjacent cells set.
+Each mask is as wide as the board, so this is for small boards (ex: the elimination solver).
+Computed once per topology and dimension, then cached"""
+def toggle_masks(num_cols, num_rows, topology=PLUS):
+    key = (topology.name, num_cols, num_rows)
+    masks = _toggle_masks_cache.get(key)
+
+    if masks is None:
+        shifts, patterns = toggle_patterns(num_cols, num_rows, topology)
+        masks = [pattern << shift for shift, pattern in zip(shifts, patterns)]
+        _toggle_masks_cache[key] = masks
+
+    return masks
+
+"""Returns the cells grouped by the shape of their toggle mask: list of (cells, offsets).
+cells - packed like the board. offsets - the toggled bits of each cell, relative to the cell's own bit
+Pressing all the cells of a group toggles their bits shifted by each offset, so any number of presses is applied
+with a few shifts and XORs of the whole board, see apply_presses().
+Computed once per topology and dimension, then cached"""
+def press_groups(num_cols, num_rows, topology=PLUS):
+    key = (topology.name, num_cols, num_rows)
+    groups = _press_groups_cache.get(key)
+
+    if groups is None:
+        num_cells = num_cols * num_rows
+        shifts, patterns = toggle_patterns(num_cols, num_rows, topology)
+
+        # Cells of each (shift from the cell bit, pattern), as bytes: setting bits in an int would copy it every time
+        group_cells = {}
+        for bit, (shift, pattern) in enumerate(zip(shifts, patterns)):
+            cells = group_cells.get((shift - bit, pattern))
+            if cells is None:
+                cells = group_cells[(shift - bit, pattern)] = bytearray((num_cells + 7) // 8)
+            cells[bit >> 3] |= 1 << (bit & 7)
+
+        groups = [(int.from_bytes(cells, "little"), tuple(shift + offset for offset in pattern_bits(pattern)))
+                  for (shift, pattern), cells in group_cells.items()]
+        _press_groups_cache[key] = groups
+
+    return groups
+
+"""Board after the packed presses are played on it, in time linear in the board size however many presses there are.
+Same as XORing in the toggle mask of every press, see press_groups()"""
+def apply_presses(board, presses, num_cols, num_rows, topology=PLUS):
+    for cells, offsets in press_groups(num_cols, num_rows, topology):
+        group_presses = presses & cells
+        if group_presses:
+            for offset in offsets:
+                board ^= group_presses << offset if offset >= 0 else group_presses >> -offset
+
+    return board
+
+"""Offsets of the set bits of a toggle pattern, ex: 0b10011 -> (0, 1, 4)"""
+def pattern_bits(pattern):
+    bits = _pattern_bits_cache.get(pattern)
+
+    if bits is None:
+        bits = tuple(offset for offset in range(pattern.bit_length()) if (pattern >> offset) & 1)
+        _pattern_bits_cache[pattern] = bits
+
+    return bits
+
+"""Packed board with all the lights on, computed once then cached"""
+def full_mask(num_cells):
+    mask = _full_mask_cache.get(num_cells)
+
+    if mask is None:
+        mask = (1 << num_cells) - 1
+        _full_mask_cache[num_cells] = mask
+
+    return mask
+
+"""Returns the Zobrist keys for the number of cells, computed once then cached"""
+def zobrist_keys(num_cells):
+    keys = _zobrist_keys_cache.get(num_cells)
+
+    if keys is None:
+        keys = array("Q", random.Random(num_cells).randbytes(8 * num_cells))
+        _zobrist_keys_cache[num_cells] = keys
+
+    return keys
+
+"""Indexes of the set bits of a packed int, lowest first.
+Walks the int's bytes once, so it's linear in the size of the int - peeling off the lowest bit instead (x & -x)
+copies the whole int for every set bit, which is quadratic on large boards"""
+def set_bits(value):
+    for index, byte in enumerate(value.to_bytes((value.bit_length() + 7) // 8, "little")):
+        if byte:
+            start = index * 8
+            for offset in _byte_bits[byte]:
+                yield start + offset
+
+"""64-bit hash of a packed board: the XOR of the Zobrist keys of the lights that are off.
+All lights on hashes to 0. A move XORs in the keys of the cells it toggles"""
+def zobrist_hash(board, num_cells):
+    keys = zobrist_keys(num_cells)
+
+    state_hash = 0
+    for bit in set_bits(board ^ ((1 << num_cells) - 1)):
+        state_hash ^= keys[bit]
+
+    return state_hash
+
+"""Converts a packed press mask into a list of (col, row) coordinates"""
+def presses_to_coords(presses, num_cols):
+    return [(bit % num_cols, bit // num_cols) for bit in set_bits(presses)]
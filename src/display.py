@@ -0,0 +1,130 @@
+import shutil
+import sys
+
+"""How main.py draws the grid every turn.
+
+FullDisplay writes the whole grid each turn, like print() - for pipes, files and terminals without escape codes.
+LiveDisplay keeps the grid on the screen and only rewrites the cells that changed since the last frame, with
+cursor-addressing escape codes: the output per move grows with the lights it flipped, not with the board size.
+The text below the grid (menu, hints, prompt) is cleared and written again each turn.
+"""
+
+_clear_screen = "\x1b[H\x1b[2J"
+_clear_below = "\x1b[J"
+
+# Lines kept free below the grid for the menu, hints and prompt. Grids that don't fit with them are drawn in full
+_status_lines = 16
+
+"""The display for the output: live on a terminal, full redraws otherwise
+mode (optional) - "auto", "live" or "full"
+"""
+def for_output(file=None, mode="auto"):
+    file = file or sys.stdout
+    if mode == "live" or (mode == "auto" and file.isatty()):
+        return LiveDisplay(file)
+    return FullDisplay(file)
+
+"""Characters in the widest line of a grid's frame, see render.grid_frame().
+Rows are the label "r |" then 3 characters per cell. Column labels are "  c" each after 3 spaces, a character
+longer for every column from 10 on, another from 100 on, ...
+"""
+def _grid_width(num_cols, num_rows):
+    row_width = len(str(num_rows - 1)) + 2 + 3 * num_cols
+    label_width = 3 + 3 * num_cols + sum(num_cols - 10 ** digits for digits in range(1, len(str(num_cols - 1))))
+    return max(row_width, label_width)
+
+class FullDisplay:
+    def __init__(self, file=None):
+        self._file = file or sys.stdout
+
+    """Draws the grid, leaving the cursor below it for the rest of the turn's text
+    frame (optional) - drawn instead of the whole grid, ex: a viewport on it, see viewport.py
+    """
+    def draw(self, grid, frame=None):
+        self._file.write(f"\n\n{grid if frame is None else frame}\n")
+
+    """Text to keep on the screen until the next turn's grid, ex: the result of the last command"""
+    def message(self, text):
+        self._file.write(f"{text}\n")
+
+    """Text that ends the game, ex: the solution steps"""
+    def show(self, text):
+        self._file.write(f"{text}\n")
+
+class LiveDisplay(FullDisplay):
+    """terminal_size (optional) - returns the terminal's os.terminal_size, see shutil.get_terminal_size"""
+    def __init__(self, file=None, terminal_size=shutil.get_terminal_size):
+        super().__init__(file)
+        self._terminal_size = terminal_size
+
+        # What's on the screen: the board and its dimensions. None when the screen has to be redrawn
+        self._board = None
+        self._dimensions = None
+
+        # Messages since the last frame, written below the grid on the next one
+        self._messages = []
+
+    def draw(self, grid, frame=None):
+        num_cols, num_rows = grid.dimensions()
+
+        # Frame lines: blank, column labels, underline, then the rows
+        num_grid_lines = num_rows + 3 if frame is None else frame.count("\n")
+
+        grid_width = _grid_width(num_cols, num_rows) if frame is None else 0
+
+        terminal_size = self._terminal_size()
+        if num_grid_lines + _status_lines > terminal_size.lines or grid_width > terminal_size.columns:
+            # The screen would scroll, or the rows wrap, leaving no fixed place for the cells
+            self._board = None
+            parts = [f"\n\n{grid if frame is None else frame}\n"]
+        elif frame is not None:
+            # No cells to address in a frame - it's redrawn whole, at the top
+            self._board = None
+            parts = [_clear_screen, frame, "\n"]
+        else:
+            board = grid.packed_board()
+            changed = board ^ self._board if self._board is not None and self._dimensions == (num_cols, num_rows) else None
+
+            # Every cell escape code is about as long as 4 cells of a full frame
+            if changed is None or changed.bit_count() * 4 > num_cols * num_rows:
+                parts = [_clear_screen, repr(grid)]
+            else:
+                parts = self._changed_cells(grid, changed)
+
+            self._board = board
+            self._dimensions = (num_cols, num_rows)
+
+            # Back below the grid, for the rest of the turn's text
+            parts += (f"\x1b[{num_grid_lines + 1};1H", _clear_below, "\n")
+
+        for text in self._messages:
+            parts += (text, "\n")
+        self._messages.clear()
+
+        self._file.write("".join(parts))
+        self._file.flush()
+
+    """Cursor moves and light symbols for the cells whose bit is set in changed"""
+    def _changed_cells(self, grid, changed):
+        num_cols = grid.dimensions()[0]
+        view = grid.view()
+
+        parts = []
+        while changed:
+            lowest = changed & -changed
+            bit = lowest.bit_length() - 1
+            changed ^= lowest
+
+            row, col = divmod(bit, num_cols)
+            # Row r is screen line r + 4, after the row label "r |" each cell is "  " then the symbol
+            parts.append(f"\x1b[{row + 4};{len(str(row)) + 3 * col + 5}H{view.cell_symbol(col, row)}")
+
+        return parts
+
+    def message(self, text):
+        self._messages.append(text)
+
+    def show(self, text):
+        # Full output, below everything on the screen
+        self._board = None
+        self._file.write(f"{text}\n")
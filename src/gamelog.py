@@ -0,0 +1,277 @@
+import os
+import struct
+import time
+import zlib
+from array import array
+
+from board import cell_bit, zobrist_hash
+from topology import TOPOLOGIES
+from snapshot import GridSnapshot
+from grid import Grid
+
+"""Crash-safe game session: a snapshot file plus an append-only binary log of the events since the snapshot.
+<path>.snap - the whole session, replaced atomically every snapshot_interval events
+<path>.log - one record per event: kind (1 byte), value (4 bytes), payload, CRC32 (4 bytes). A move is 9 bytes
+
+Both files carry the snapshot generation, so a log that was already folded into the snapshot is never replayed.
+A torn or corrupt record ends the log - everything before it is recovered
+"""
+
+MOVE = 1
+UNDO = 2
+REDO = 3
+RESET = 4
+NEW_PUZZLE = 5
+JUMP = 6
+
+_LOG_MAGIC = b"LGLG"
+_SNAP_MAGIC = b"LGSN"
+_VERSION = 1
+
+# magic, version, generation
+_FILE_HEADER = struct.Struct("<4sHQ")
+# kind, value - the cell bit, move number or payload length
+_RECORD_HEADER = struct.Struct("<BI")
+_CRC = struct.Struct("<I")
+# num_cols, num_rows, topology name length, position, num moves
+_SNAP_FIELDS = struct.Struct("<IIHII")
+
+class GameLog:
+    """path - session files prefix, ex: "sessions/player1" writes sessions/player1.snap and sessions/player1.log
+    grid - the grid to log. Its current state is written as a new snapshot
+    sync_every (optional) - records per fsync
+    sync_interval (optional) - seconds before the next record forces an fsync
+    snapshot_interval (optional) - records before the log is folded into a new snapshot
+    """
+    def __init__(self, path, grid, sync_every=64, sync_interval=0.05, snapshot_interval=4096):
+        self._path = path
+        self._grid = grid
+        self._num_cols, self._num_rows = grid.dimensions()
+        self._num_bytes = (self._num_cols * self._num_rows + 7) // 8
+
+        self._sync_every = sync_every
+        self._sync_interval = sync_interval
+        self._snapshot_interval = snapshot_interval
+
+        # Records written since the last fsync, and since the last snapshot
+        self._buffer = bytearray()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._num_records = 0
+
+        self._fd = None
+        self._generation = _read_generation(path + ".snap")
+        self.snapshot()
+
+    """Call the record methods after the grid action succeeded"""
+    def record_move(self, col, row):
+        self._append(MOVE, cell_bit(col, row, self._num_cols))
+
+    def record_undo(self):
+        self._append(UNDO, 0)
+
+    def record_redo(self):
+        self._append(REDO, 0)
+
+    def record_reset(self):
+        self._append(RESET, 0)
+
+    def record_jump(self, move_number):
+        self._append(JUMP, move_number)
+
+    """Logs the grid's new puzzle, call after create_new_puzzle() or load_board()"""
+    def record_new_puzzle(self):
+        original = self._grid.session()[0]
+        self._append(NEW_PUZZLE, 0, self._pack(original.board) + self._pack(original.solution))
+
+    def _append(self, kind, value, payload=b""):
+        if payload:
+            value = len(payload)
+
+        record = _RECORD_HEADER.pack(kind, value) + payload
+        self._buffer += record
+        self._buffer += _CRC.pack(zlib.crc32(record))
+
+        # Group commit - one write and fsync for a batch of records
+        self._pending += 1
+        if self._pending >= self._sync_every or time.monotonic() - self._last_sync >= self._sync_interval:
+            self.sync()
+
+        self._num_records += 1
+        if self._num_records >= self._snapshot_interval:
+            self.snapshot()
+
+    """Writes and fsyncs the buffered records. Call before waiting on the player, so an idle session loses nothing"""
+    def sync(self):
+        if self._buffer:
+            os.write(self._fd, self._buffer)
+            os.fsync(self._fd)
+            self._buffer = bytearray()
+
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    """Writes the whole session to a new snapshot and starts an empty log, so recovery replays at most snapshot_interval records"""
+    def snapshot(self):
+        self._generation += 1
+        original, current, moves, position = self._grid.session()
+        topology_name = self._grid.topology().name.encode()
+
+        data = bytearray(_FILE_HEADER.pack(_SNAP_MAGIC, _VERSION, self._generation))
+        data += _SNAP_FIELDS.pack(self._num_cols, self._num_rows, len(topology_name), position, len(moves))
+        data += topology_name
+        for packed in (original.board, original.solution, current.board, current.solution):
+            data += self._pack(packed)
+        data += moves.tobytes()
+        data += _CRC.pack(zlib.crc32(data))
+
+        # The new snapshot replaces the old one before the log, a crash in between leaves a stale log that's ignored
+        _write_atomic(self._path + ".snap", data)
+        _write_atomic(self._path + ".log", _FILE_HEADER.pack(_LOG_MAGIC, _VERSION, self._generation))
+
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self._path + ".log", os.O_WRONLY | os.O_APPEND)
+
+        self._buffer = bytearray()
+        self._pending = 0
+        self._num_records = 0
+
+    def close(self):
+        if self._fd is not None:
+            self.sync()
+            os.close(self._fd)
+            self._fd = None
+
+    def _pack(self, packed):
+        return packed.to_bytes(self._num_bytes, "little")
+
+"""Rebuilds the grid saved at path: the snapshot, then the log events after it. Runs of moves are folded by parity.
+Returns the grid, or None if there's no snapshot
+"""
+def recover(path):
+    try:
+        with open(path + ".snap", "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    grid, generation = _load_snapshot(data)
+    _replay_log(grid, path + ".log", generation)
+    return grid
+
+def _load_snapshot(data):
+    if _CRC.unpack_from(data, len(data) - _CRC.size)[0] != zlib.crc32(data[:-_CRC.size]):
+        raise ValueError("Corrupt snapshot")
+
+    magic, version, generation = _FILE_HEADER.unpack_from(data)
+    if magic != _SNAP_MAGIC or version != _VERSION:
+        raise ValueError(f"Not a snapshot: {magic}, version {version}")
+
+    offset = _FILE_HEADER.size
+    num_cols, num_rows, name_length, position, num_moves = _SNAP_FIELDS.unpack_from(data, offset)
+    offset += _SNAP_FIELDS.size
+    topology = TOPOLOGIES[data[offset:offset + name_length].decode()]
+    offset += name_length
+
+    num_cells = num_cols * num_rows
+    num_bytes = (num_cells + 7) // 8
+    original = _grid_snapshot(data[offset:offset + num_bytes], data[offset + num_bytes:offset + 2 * num_bytes], num_cells)
+    offset += 2 * num_bytes
+    current = _grid_snapshot(data[offset:offset + num_bytes], data[offset + num_bytes:offset + 2 * num_bytes], num_cells)
+    offset += 2 * num_bytes
+
+    moves = array("I")
+    moves.frombytes(data[offset:offset + num_moves * moves.itemsize])
+
+    grid = Grid(num_cols, num_rows, topology)
+    grid.load_session(original, current, moves, position)
+
+    return grid, generation
+
+def _replay_log(grid, log_path, generation):
+    try:
+        with open(log_path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return
+
+    if len(data) < _FILE_HEADER.size:
+        return
+    magic, version, log_generation = _FILE_HEADER.unpack_from(data)
+    if magic != _LOG_MAGIC or version != _VERSION or log_generation != generation:
+        return
+
+    num_cols, num_rows = grid.dimensions()
+    num_bytes = (num_cols * num_rows + 7) // 8
+
+    moves = []
+    offset = _FILE_HEADER.size
+    while offset + _RECORD_HEADER.size + _CRC.size <= len(data):
+        kind, value = _RECORD_HEADER.unpack_from(data, offset)
+        payload_length = value if kind == NEW_PUZZLE else 0
+        end = offset + _RECORD_HEADER.size + payload_length
+
+        # Torn or corrupt tail
+        if end + _CRC.size > len(data) or _CRC.unpack_from(data, end)[0] != zlib.crc32(data[offset:end]):
+            break
+
+        if kind == MOVE:
+            moves.append(value)
+        else:
+            # Fold the run of moves before the event
+            if moves:
+                grid.replay_moves(moves)
+                moves = []
+
+            if kind == UNDO:
+                grid.undo_last_move()
+            elif kind == REDO:
+                grid.redo_move()
+            elif kind == RESET:
+                grid.reset()
+            elif kind == JUMP:
+                grid.jump_to_move(value)
+            elif kind == NEW_PUZZLE:
+                payload = data[offset + _RECORD_HEADER.size:end]
+                original = _grid_snapshot(payload[:num_bytes], payload[num_bytes:], num_cols * num_rows)
+                grid.load_session(original, original, (), 0)
+
+        offset = end + _CRC.size
+
+    if moves:
+        grid.replay_moves(moves)
+
+def _grid_snapshot(board_bytes, solution_bytes, num_cells):
+    board = int.from_bytes(board_bytes, "little")
+    solution = int.from_bytes(solution_bytes, "little")
+    return GridSnapshot(board, zobrist_hash(board, num_cells), solution, solution.bit_count())
+
+"""Generation of the snapshot at path, or 0 if there isn't one"""
+def _read_generation(snap_path):
+    try:
+        with open(snap_path, "rb") as f:
+            header = f.read(_FILE_HEADER.size)
+    except FileNotFoundError:
+        return 0
+
+    if len(header) < _FILE_HEADER.size:
+        return 0
+    return _FILE_HEADER.unpack(header)[2]
+
+"""Writes to a temporary file, fsyncs, then renames over path - readers see the old or the new file, never a mix"""
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Make the rename itself durable
+    if os.name == "posix":
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
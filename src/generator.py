@@ -0,0 +1,98 @@
+import random
+
+from board import apply_presses, full_mask
+from topology import PLUS
+import solver
+
+# Fresh samples to try, before giving up on the target
+_max_attempts = 20
+
+# Duplicate puzzles in a row, before generate_puzzles() gives up on finding count distinct ones
+_max_duplicates = 1000
+
+"""Board after the presses are applied to an all lights on board"""
+def board_from_presses(presses, num_cols, num_rows, topology=PLUS):
+    return apply_presses(full_mask(num_cols * num_rows), presses, num_cols, num_rows, topology)
+
+"""Picks the target move count: num_moves is an int, or a (min, max) tuple, inclusive"""
+def _target_moves(num_moves, rng):
+    if isinstance(num_moves, tuple):
+        return rng.randint(num_moves[0], num_moves[1])
+    return num_moves
+
+"""Presses whose minimal solution is exactly num_moves long.
+
+Random presses are reduced against the null space of the dimensions. If the reduced presses are shorter
+than the target, a cell is added to them and reduced again - each added cell changes the minimal move count
+by at most one, so the target is reached one move at a time. When no cell raises the count, start over
+from a new sample.
+
+Raises ValueError if the dimensions can't have a puzzle needing that many moves (ex: 4x4 needs at most 7),
+or if their null space is too large to prove the minimal move count, see solver.minimum_is_exact()
+"""
+def _presses_with_moves(num_cols, num_rows, num_moves, rng, topology):
+    num_cells = num_cols * num_rows
+    if num_moves < 0 or num_moves > num_cells:
+        raise ValueError(f"Invalid number of moves ({num_moves}) for a {num_cols}x{num_rows} grid")
+    if not solver.minimum_is_exact(num_cols, num_rows, topology):
+        raise ValueError(f"Can't prove the minimal move count of {num_cols}x{num_rows} puzzles, their null space is too large to search")
+
+    for attempt in range(_max_attempts):
+        presses = 0
+        for bit in rng.sample(range(num_cells), num_moves):
+            presses |= 1 << bit
+        presses = solver.minimize_presses(presses, num_cols, num_rows, topology)
+
+        while presses is not None and presses.bit_count() < num_moves:
+            presses = _add_move(presses, num_cols, num_rows, rng, topology)
+
+        if presses is not None:
+            return presses
+
+    raise ValueError(f"Can't create a {num_cols}x{num_rows} puzzle needing {num_moves} moves")
+
+"""Adds a random cell that raises the minimal move count by one. Returns the reduced presses, or None if no cell does"""
+def _add_move(presses, num_cols, num_rows, rng, topology):
+    count = presses.bit_count()
+
+    cells = list(range(num_cols * num_rows))
+    rng.shuffle(cells)
+    for bit in cells:
+        if (presses >> bit) & 1:
+            continue
+
+        candidate = solver.minimize_presses(presses | (1 << bit), num_cols, num_rows, topology)
+        if candidate.bit_count() > count:
+            return candidate
+
+    return None
+
+"""Creates a puzzle whose shortest solution is exactly num_moves long.
+num_moves - int, or (min, max) tuple
+Returns (board, presses): the packed board, and the packed presses of a shortest solution
+"""
+def generate_puzzle(num_cols, num_rows, num_moves, rng=random, topology=PLUS):
+    presses = _presses_with_moves(num_cols, num_rows, _target_moves(num_moves, rng), rng, topology)
+    return board_from_presses(presses, num_cols, num_rows, topology), presses
+
+"""Yields count distinct puzzles, see generate_puzzle()
+Raises ValueError after max_duplicates samples in a row were all puzzles already yielded: there probably aren't
+count distinct puzzles (ex: 4x4 has 16 one-move puzzles)
+"""
+def generate_puzzles(num_cols, num_rows, count, num_moves, rand_seed=None, topology=PLUS, max_duplicates=_max_duplicates):
+    rng = random.Random(rand_seed)
+    seen_boards = set()
+    num_duplicates = 0
+
+    while len(seen_boards) < count:
+        board, presses = generate_puzzle(num_cols, num_rows, num_moves, rng, topology)
+        if board in seen_boards:
+            num_duplicates += 1
+            if num_duplicates >= max_duplicates:
+                raise ValueError(f"Found only {len(seen_boards)} distinct {num_cols}x{num_rows} puzzles with {num_moves} moves, "
+                                 f"{count} asked for")
+            continue
+
+        num_duplicates = 0
+        seen_boards.add(board)
+        yield board, presses
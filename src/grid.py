@@ -1,51 +1,160 @@
 import random
 import logging
+from array import array
 
-class Grid:
-    def __init__(self, col=4, row=4):
-        self._logger = logging.getLogger(__name__)
-        logging.basicConfig(level=logging.CRITICAL)
+from board import apply_presses, cell_bit, toggle_patterns, presses_to_coords, pattern_bits, zobrist_keys, zobrist_hash, full_mask
+from topology import PLUS
+import solver
+import generator
+import transposition
+import symmetry
+import instrument
+import render
+from snapshot import GridSnapshot, BoardView
+from journal import MoveJournal
+
+logging.basicConfig(level=logging.CRITICAL)
 
+class Grid:
+    # Thousands of grids can be live at once (see server.py): no per-instance __dict__,
+    # and everything that's the same for every grid is shared
+    __slots__ = (
+        "_num_cols", "_num_rows", "_topology", "_full_mask",
+        "_toggle_shifts", "_toggle_patterns", "_zobrist_keys",
+        "_board", "_hash", "_solution", "_solution_count", "_original_board", "_original_hash", "_original_presses", "_journal",
+    )
+
+    _logger = logging.getLogger(__name__)
+    _light_on = 'O'
+    _light_off = '·'   # Mac: Shift+Option+9
+
+    """col, row - dimensions
+    topology (optional) - which adjacent cells a move toggles, see topology.TOPOLOGIES
+    """
+    def __init__(self, col=4, row=4, topology=PLUS):
         if col < 1 and row < 1:
             raise Exception(f"Both col ({col}) and row ({row}) must be >= 1")
         
         self._num_cols = col
         self._num_rows = row
-        self._light_on = 'O'
-        self._light_off = '·'   # Mac: Shift+Option+9
-        self._history = []
-
-        # Saves the coordinates used to generate the puzzle, and the current solution based on the player inputs
-        # The current solution will initially contain the original coordinates used to create the puzzle
-        # But, it'll also include additional, unique coordinates the player tries.
-        #
-        # If the player enters a coordinate that's part of the current solution, the coordinate is removed from the set.
-        # This brings the game closes to completion.
-        # Meaning, the player must undo all the original steps - plus any others - to solve the puzzle 
-        self._original_solution = set()
-        self._curr_solution = set()
-
-        # Copy of the original grid for game reset, etc.
-        self._original_grid = []
+        self._topology = topology
+
+        # The board is packed into a single int, see cell_bit()
+        # Moves are a single XOR against the cell's precomputed toggle mask, see toggle_patterns()
+        self._full_mask = full_mask(self._num_cols * self._num_rows)
+        self._toggle_shifts, self._toggle_patterns = toggle_patterns(self._num_cols, self._num_rows, self._topology)
+
+        # 64-bit Zobrist hash of the board, updated with every toggle, see board.zobrist_hash()
+        self._zobrist_keys = zobrist_keys(self._num_cols * self._num_rows)
+        self._hash = 0
+
+        # The current solution is kept live as packed presses, same layout as the board.
+        # It initially contains the original presses used to create the puzzle, see _original_solution
+        # A press is its own inverse, so every move or undo flips the cell's bit - the count is updated alongside
+        self._solution = 0
+        self._solution_count = 0
+
+        # The original board and solution for game reset, etc. See _original()
+        self._original_board = self._full_mask
+        self._original_hash = 0
+        self._original_presses = 0
+
+        # Player moves, for undo, redo and jump_to_move(). Created with the first move, see _moves_journal()
+        self._journal = None
         
-        # Create the grid
-        self._logger.info(f"Creating grid, col: {self._num_cols}, row: {self._num_rows}...")
-        self._grid = [0 for i in range(self._num_cols)]
-        for c in range(col):
-            self._grid[c] = [self._light_on for i in range(self._num_rows)]
+        # Create the grid, all lights on
+        self._logger.info("Creating grid, col: %s, row: %s...", self._num_cols, self._num_rows)
+        self._board = self._full_mask
+
+    """List of columns of light symbols, ex: self._grid[col][row] == 'O'
+    Built from the packed board on every access - use it for display and comparisons, not in loops"""
+    @property
+    def _grid(self):
+        view = self.view()
+        return [view[c].copy() for c in range(self._num_cols)]
+
+    @_grid.setter
+    def _grid(self, grid):
+        board = 0
+        for c in range(self._num_cols):
+            for r in range(self._num_rows):
+                if grid[c][r] == self._light_on:
+                    board |= 1 << cell_bit(c, r, self._num_cols)
+        self._set_board(board)
+
+        self._sync_solution()
+
+    """Sets the board, and hashes it from scratch"""
+    def _set_board(self, board):
+        self._board = board
+        self._hash = zobrist_hash(board, self._num_cols * self._num_rows)
+
+    """Set of (col, row) coordinates used to create the puzzle"""
+    @property
+    def _original_solution(self):
+        return set(presses_to_coords(self._original_presses, self._num_cols))
+
+    """Set of (col, row) coordinates of the current solution"""
+    @property
+    def _curr_solution(self):
+        return set(presses_to_coords(self._solution, self._num_cols))
+
+    def _set_solution(self, presses):
+        self._solution = presses
+        self._solution_count = presses.bit_count()
+
+    def _flip_solution_bit(self, bit):
+        bit = 1 << bit
+        if self._solution & bit:
+            self._solution_count -= 1
+        else:
+            self._solution_count += 1
+        self._solution ^= bit
+
+    """Solves the board from scratch, after it's been edited directly instead of with moves.
+    A board that can't be solved gets an empty solution"""
+    def _sync_solution(self):
+        presses = self._cached_solve(solver.default_method(self._topology))
+        self._set_solution(presses or 0)
+
+    """Creates a new puzzle by toggling random cells
+    num_random_toggles (optional) - number of random toggles, defaults to 1/4 of the cells
+    rand_seed (optional) - random seed
+    num_moves (optional) - int or (min, max) tuple. Creates a puzzle whose shortest solution is exactly this long instead
+    archive (optional) - puzzle source to draw a ready-made puzzle from, instead of creating one:
+        archive.PuzzleArchive or prefetch.PuzzlePrefetcher. num_moves picks the difficulty, any difficulty if it's None.
+        Its random_puzzle() returns (board, presses), or (board, presses, state_hash) so the board isn't hashed again
+    """
+    def create_new_puzzle(self, num_random_toggles=None, rand_seed=None, num_moves=None, archive=None):
+        self._logger.info("Creating puzzle")
+        start = instrument.enabled and instrument.start()
+
+        self._create_puzzle(num_random_toggles, rand_seed, num_moves, archive)
+
+        if start:
+            instrument.finish("generate", start, (self._num_cols, self._num_rows, num_moves))
+
+    def _create_puzzle(self, num_random_toggles, rand_seed, num_moves, archive):
+        if archive is not None:
+            puzzle = archive.random_puzzle(self._num_cols, self._num_rows, num_moves, random.Random(rand_seed), self._topology)
+            self._load_puzzle(*puzzle)
+            return
 
-    def create_new_puzzle(self, num_random_toggles=None, rand_seed=None):
-        self._logger.info(f"Creating puzzle")
+        if num_moves is not None:
+            board, presses = generator.generate_puzzle(self._num_cols, self._num_rows, num_moves, random.Random(rand_seed), self._topology)
+            self._load_puzzle(board, presses)
+            return
 
         if not num_random_toggles:
             num_random_toggles = (self._num_cols * self._num_rows) // 4
         
         # Initial state
         self._set_all_lights_on()
-        self._original_solution = set()
+        presses = 0
 
-        # Toggle random lights, save solution
-        random.seed(rand_seed)
+        # Toggle random lights, save solution. Same sequence as random.seed(rand_seed), without reseeding the
+        # random module for everyone else - puzzles can be made on another thread, see prefetch.py
+        rng = random.Random(rand_seed)
 
         # .pop() random coordinates from col and row sets
         col_values = [x for x in range(self._num_cols)]
@@ -58,249 +167,408 @@ class Grid:
             if len(row_values) == 0:
                 row_values = [x for x in range(self._num_rows)]
 
-            random_col = col_values.pop(random.randrange(0, len(col_values)))
-            random_row = row_values.pop(random.randrange(0, len(row_values)))
+            random_col = col_values.pop(rng.randrange(0, len(col_values)))
+            random_row = row_values.pop(rng.randrange(0, len(row_values)))
 
             self._toggle_cell_group(random_col, random_row)
-            self._add_or_remove_coord_from_set(random_col, random_row, self._original_solution)
+            presses ^= 1 << cell_bit(random_col, random_row, self._num_cols)
 
-        # Clear history and solution
-        self._history = []
-        self._curr_solution = self._original_solution.copy()
+        # Clear solution
+        self._set_solution(presses)
 
-        # Save a copy of the created grid
-        self._original_grid = []
-        for column in self._grid:
-            self._original_grid.append(column.copy())
+        # Save a copy of the created grid, clear history
+        self._set_original()
+        self._journal = None
+
+    """Starts a new puzzle from a packed board and the packed presses that solve it.
+    state_hash (optional) - the board's hash, if it's known. Otherwise the board is hashed"""
+    def _load_puzzle(self, board, presses, state_hash=None):
+        if state_hash is None:
+            self._set_board(board)
+        else:
+            self._board = board
+            self._hash = state_hash
+
+        self._set_solution(presses)
+        self._set_original()
+        self._journal = None
+
+    """Starts a new puzzle from a packed board (see board.cell_bit()), ex: a board loaded from outside the game.
+    The solution is found for the board. A board that can't be solved has an empty solution"""
+    def load_board(self, board):
+        self._set_board(board)
+        presses = self._cached_solve(solver.default_method(self._topology))
+        self._load_puzzle(board, presses or 0)
+
+    """The board packed into an int, see board.cell_bit()"""
+    def packed_board(self):
+        return self._board
+
+    """Immutable copy of the lights and the current solution, see restore()"""
+    def snapshot(self):
+        return GridSnapshot(self._board, self._hash, self._solution, self._solution_count)
+
+    """Sets the lights and the current solution back to a snapshot. The history isn't changed"""
+    def restore(self, snapshot):
+        self._board = snapshot.board
+        self._hash = snapshot.state_hash
+        self._solution = snapshot.solution
+        self._solution_count = snapshot.solution_count
+
+    """Everything needed to save the game: (original snapshot, current snapshot, recorded moves, position)
+    recorded moves - array of cell bits, see journal.MoveJournal. Moves after position were undone and can be redone
+    """
+    def session(self):
+        if self._journal is None:
+            return self._original(), self.snapshot(), array("I"), 0
+        return self._original(), self.snapshot(), self._journal.moves(), self._journal.position()
+
+    """Continues a game saved with session()"""
+    def load_session(self, original, current, moves, position):
+        self._original_board = original.board
+        self._original_hash = original.state_hash
+        self._original_presses = original.solution
+        self.restore(current)
+
+        self._journal = None
+        if len(moves) > 0:
+            self._moves_journal().load(original, moves, position)
+
+    """Plays a run of moves given as cell bits, ex: recovered from a game log.
+    Only the cells played an odd number of times are pressed, the others cancel out
+    """
+    def replay_moves(self, bits):
+        journal = self._moves_journal()
+        start = journal.position()
+        for bit in bits:
+            if bit >= self._num_cols * self._num_rows:
+                raise IndexError(f"Invalid cell bit: {bit}")
+            journal.record(bit, None)
+
+        for bit in journal.odd_parity_bits(start, journal.position()):
+            self._press(bit)
+
+    """Saves the current board and solution as the original puzzle"""
+    def _set_original(self):
+        self._original_board = self._board
+        self._original_hash = self._hash
+        self._original_presses = self._solution
+
+    """Snapshot of the original puzzle. Only the packed board, its hash and the presses are kept, the rest is derived"""
+    def _original(self):
+        return GridSnapshot(self._original_board, self._original_hash, self._original_presses, self._original_presses.bit_count())
+
+    """Read-only view of the lights, indexed like _grid: view[col][row]. Shares the board instead of copying it"""
+    def view(self, board=None):
+        if board is None:
+            board = self._board
+        return BoardView(board, self._num_cols, self._num_rows, self._light_on, self._light_off)
 
     """Sets the puzzle to the original state"""
     def reset(self):
-        self._logger.info(f"Resetting puzzle")
-
-        self._grid = []
-        for column in self._original_grid:
-            self._grid.append(column.copy())
+        self._logger.info("Resetting puzzle")
 
-        self._curr_solution = self._original_solution.copy()
-        self._history = []
+        self.restore(self._original())
+        self._journal = None
 
     def _set_all_lights_on(self):
-        self._logger.debug(f"Turn all lights on...")
-        for col in range(self._num_cols):
-             for row in range(self._num_rows):
-                self._grid[col][row] = self._light_on
+        self._board = self._full_mask
+        self._hash = 0
 
     """Used by the player - toggles the cell, but also updates the current solution and history"""
     def player_toggle_cell(self, col, row):
-        self._logger.info(f"Toggle cell: ({col}, {row})")
-        self._toggle_cell_group(col, row)
+        start = instrument.enabled and instrument.start()
 
-        # Save history, update attempted solution
-        self._history.append((col, row))
-        self._add_or_remove_coord_from_set(col, row, self._curr_solution)
+        self._check_range(col, row)
+        bit = cell_bit(col, row, self._num_cols)
+        # Created before the press: it starts from the board before the move
+        journal = self._moves_journal()
+        self._press(bit)
 
+        # Save history
+        journal.record(bit, self.snapshot)
+
+        if start:
+            instrument.finish("toggle", start, (col, row))
+
+    """A move by cell bit: toggles the cell group and updates the current solution"""
+    def _press(self, bit):
+        self._toggle_bit_group(bit)
+        self._flip_solution_bit(bit)
+
+    """Toggles the cell and its adjacent cells: one XOR with the cell's toggle mask"""
     def _toggle_cell_group(self, col, row):
-        self._logger.debug(f"Toggle cell group: ({col}, {row})")
-        self._toggle_single_cell(col, row)
-        self._toggle_adjacent_cells(col, row)
+        self._check_range(col, row)
+        self._toggle_bit_group(cell_bit(col, row, self._num_cols))
+
+    def _toggle_bit_group(self, bit):
+        shift = self._toggle_shifts[bit]
+        pattern = self._toggle_patterns[bit]
+        self._board ^= pattern << shift
+
+        for offset in pattern_bits(pattern):
+            self._hash ^= self._zobrist_keys[shift + offset]
 
+    """Toggles only the cell - not a move, so the current solution is solved again"""
     def _toggle_single_cell(self, col, row):
-        self._logger.debug(f"Toggle single cell: ({col}, {row})")
+        self._check_range(col, row)
+        bit = cell_bit(col, row, self._num_cols)
+        self._board ^= 1 << bit
+        self._hash ^= self._zobrist_keys[bit]
+        self._sync_solution()
 
+    def _check_range(self, col, row):
         if (col < 0 or col > self._num_cols - 1) or (row < 0 or row > self._num_rows - 1):
             raise IndexError(f"Invalid grid range: ({col}, {row})")
-        if self._grid[col][row] == self._light_on:
-            self._grid[col][row] = self._light_off
-        else:
-            self._grid[col][row] = self._light_on
-
-    def _toggle_adjacent_cells(self, col, row):
-        self._logger.info(f"Toggle cells adjacent to: ({col}, {row})")
-
-        adj_cells = self._adjacent_cells_coords(col, row)
-        for cell in adj_cells:
-            adj_col, adj_row = cell
-            self._toggle_single_cell(adj_col, adj_row)
 
     """Return a list of tuples containing the adjacent cells col, row coordinates.
         Format: [(col, row), (col, row), etc.]
     """
     def _adjacent_cells_coords(self, col, row):
-        cells = []
-
-        # left
-        if 0 <= col - 1:
-            cells.append((col - 1, row))
-        # right
-        if col + 1 <= self._num_cols - 1:
-            cells.append((col + 1, row))
-        # top
-        if row - 1 >= 0:
-            cells.append((col, row - 1))
-        # bottom
-        if row + 1 <= self._num_rows - 1:
-            cells.append((col, row + 1))
-
-        return cells
+        return self._topology.neighbors(col, row, self._num_cols, self._num_rows)
     
     def undo_last_move(self):
-        self._logger.info(f"Undo last move")
+        if self._journal is None:
+            return None
 
-        if len(self._history) > 0:
-            col, row = self._history.pop()
-            self._logger.info(f"Undo ({col}, {row})...")
-            self._toggle_cell_group(col, row)
-            self._add_or_remove_coord_from_set(col, row, self._curr_solution)
+        start = instrument.enabled and instrument.start()
 
+        bit = self._journal.undo()
+        if bit is not None:
+            col, row = bit % self._num_cols, bit // self._num_cols
+            self._press(bit)
+
+            if start:
+                instrument.finish("undo", start, (col, row))
             return col, row
         
         return None
 
+    """Plays the last undone move again. Returns its (col, row), or None if there's nothing to redo"""
+    def redo_move(self):
+        if self._journal is None:
+            return None
+
+        start = instrument.enabled and instrument.start()
+
+        bit = self._journal.redo()
+        if bit is not None:
+            col, row = bit % self._num_cols, bit // self._num_cols
+            self._press(bit)
+
+            if start:
+                instrument.finish("redo", start, (col, row))
+            return col, row
+
+        return None
+
+    """Moves the game to just after the given number of moves, ex: 0 is the start of the puzzle.
+    Undone moves can be jumped forward to, until a new move is played.
+    Restores the nearest checkpoint and presses only the cells played an odd number of times since, see journal.MoveJournal
+    """
+    def jump_to_move(self, move_number):
+        self._logger.info("Jump to move: %s", move_number)
+
+        journal = self._moves_journal()
+        snapshot, bits = journal.plan_jump(move_number)
+        if snapshot is not None:
+            self.restore(snapshot)
+
+        for bit in bits:
+            self._press(bit)
+
+        journal.seek(move_number)
+
+    """The journal, created on the first move. Move 0 is the board before that move, which isn't the original puzzle
+    after solve_puzzle(), _toggle_single_cell() or restore()"""
+    def _moves_journal(self):
+        if self._journal is None:
+            self._journal = MoveJournal(self.snapshot())
+        return self._journal
+
     def _get_solution(self):
-        self._logger.debug(f"Get original solution:")
+        self._logger.debug("Get original solution:")
         return list(self._original_solution)
     
-    """Returns the step-by-step string of the solution. Solves the puzzle"""
-    def solution_steps_str(self):
-        steps = ""
-        solution = self.get_curr_solution()
+    """Returns the step-by-step string of the solution. Solves the puzzle
+    method (optional) - solver method (ex: solver.OPTIMAL) to solve the current board, instead of using the current solution
+    """
+    def solution_steps_str(self, method=None):
+        solution = self._solution_for(method)
 
         if len(solution) == 0:
             return self.__repr__()
-    
-        for coords in solution:
-            col, row = coords
-
-            # Save initial state
-            original_grid_state = []
-            for column in self._grid:
-                original_grid_state.append(column.copy())
-
-            # Toggle the cell
-            self._toggle_cell_group(col, row)
-            self._add_or_remove_coord_from_set(col, row, self._curr_solution)
-            
-            # Save next state
-            next_grid_state = []
-            for column in self._grid:
-                next_grid_state.append(column.copy())
-
-            # Get transtion, add to result string
-            steps += self._grid_transtion_repr(original_grid_state, next_grid_state, label=f"Step: {coords[0], coords[1]}", highlight_first_grid_cell_coord=coords)
-            steps += "\n"
+
+        steps = "".join([frame + "\n" for coords, frame in self._solution_steps(self._board, solution)])
+        self.solve_puzzle(method)
 
         return steps
+
+    """Iterator over the steps of the solution: (col, row) of the move, and the frame of the board before and after it.
+    The steps are played from a snapshot of the current board, taken now - the grid isn't changed, and
+    only one step's boards and frame are held at a time, however long the solution.
+    method (optional) - see solution_steps_str
+    """
+    def solution_steps(self, method=None):
+        return self._solution_steps(self._board, self._solution_for(method))
+
+    def _solution_steps(self, board, solution):
+        for coords in solution:
+            bit = cell_bit(coords[0], coords[1], self._num_cols)
+            next_board = board ^ (self._toggle_patterns[bit] << self._toggle_shifts[bit])
+
+            yield coords, self._grid_transtion_repr(self.view(board), self.view(next_board), label=f"Step: {coords[0], coords[1]}", highlight_first_grid_cell_coord=coords)
+            board = next_board
     
+    """Solves the current board with linear algebra, regardless of how the board was created.
+    method - solver.ELIMINATION, solver.LIGHT_CHASING for large boards, or solver.OPTIMAL for the fewest moves
+    Returns a list of (col, row) coordinates, or None if the board can't be solved
+    """
+    def find_solution(self, method=solver.ELIMINATION):
+        self._logger.info("Finding solution for the current board, method: %s", method)
+
+        presses = self._cached_solve(method)
+        if presses is None:
+            return None
+
+        return presses_to_coords(presses, self._num_cols)
+
+    """Solves the current board, or returns the result for the same position from the transposition cache"""
+    def _cached_solve(self, method):
+        start = instrument.enabled and instrument.start()
+        key = (self._topology.name, self._num_cols, self._num_rows, self._hash, method)
+
+        found, presses = transposition.shared_cache.get(key, self._board)
+        if not found:
+            presses = solver.solve(self._board, self._num_cols, self._num_rows, method, self._topology)
+            transposition.shared_cache.put(key, self._board, presses)
+
+        if start:
+            instrument.count("solve.cache_hit" if found else "solve.cache_miss")
+            instrument.finish("solve", start, method)
+        return presses
+
+    """The current solution, or the solution found by the given solve method"""
+    def _solution_for(self, method):
+        if method is None:
+            return self.get_curr_solution()
+        return presses_to_coords(self._presses_for(method), self._num_cols)
+
+    """Same as _solution_for(), as packed presses"""
+    def _presses_for(self, method):
+        if method is None:
+            return self._solution
+
+        self._logger.info("Finding solution for the current board, method: %s", method)
+        presses = self._cached_solve(method)
+        if presses is None:
+            raise ValueError(f"Grid can't be solved:\n{self}")
+        return presses
+
+    """List of (col, row) coordinates of the played moves, oldest first"""
     def history(self):
-        return self._history
+        if self._journal is None:
+            return []
+        return [(bit % self._num_cols, bit // self._num_cols) for bit in self._journal.played()]
     
     def get_curr_solution(self):
-        self._logger.info(f"Get current solution:")
-        return list(self._curr_solution)
+        self._logger.info("Get current solution:")
+        return presses_to_coords(self._solution, self._num_cols)
     
-    """Returns a random coordinate tuple from the current solution, and the number of moves remaining (including the displayed hint)
+    """Returns a coordinate tuple from the current solution, and the number of moves remaining (including the displayed hint)
     Ex: ((3, 5), 2)
     Ex: (None, 0)
     """
     def hint(self):
-        try:
-            num_moves_left = len(self._curr_solution)
-            rand_coord = self._curr_solution.pop()
-            
-            hint = (rand_coord, num_moves_left)
-
-            # set.pop() removes item; put the coordinate back
-            self._curr_solution.add(rand_coord)
-            
-            return hint
-        except KeyError:
-            return (None, 0)
+        return self._presses_hint(self._solution, self._solution_count)
     
-    """Toggles the cells needed to turn all the lights on"""
-    def solve_puzzle(self):
-        self._logger.info(f"Solving puzzle using solution: {self.get_curr_solution()}")
-
-        sol = self.get_curr_solution()
-        if len(sol) > 0:
-            for coords in sol:
-                col, row = coords
-                self._toggle_cell_group(col, row)
-                self._add_or_remove_coord_from_set(col, row, self._curr_solution)
-    
-    """For the given coord, add to the given set if not present. Or remove from set if present"""
-    def _add_or_remove_coord_from_set(self, col, row, sol_set):
-        coord = (col, row)
+    """Same as hint(), using the solution with the fewest moves for the current board.
+    Boards without a null space have a single solution, so this is the live solution as-is
+    Ex: ((3, 5), 2)
+    Ex: (None, 0)
+    """
+    def optimal_hint(self):
+        if not solver.null_space(self._num_cols, self._num_rows, self._topology):
+            return self.hint()
 
-        if coord in sol_set:
-            self._logger.debug(f"Toggled cell ({col}, {row}) IS in set, removing it...")
-            sol_set.remove(coord)
-        else:
-            self._logger.debug(f"Toggled cell ({col}, {row}) NOT in set, adding it...")
-            sol_set.add(coord)
+        presses = self._cached_solve(solver.OPTIMAL)
+        if presses is None:
+            return (None, 0)
+        return self._presses_hint(presses, presses.bit_count())
+
+    def _presses_hint(self, presses, num_moves_left):
+        if num_moves_left == 0:
+            return (None, 0)
 
-        self._logger.debug(f"Updated set: {sol_set}")
+        lowest_bit = (presses & -presses).bit_length() - 1
+        return ((lowest_bit % self._num_cols, lowest_bit // self._num_cols), num_moves_left)
+    
+    """Toggles the cells needed to turn all the lights on
+    method (optional) - solver method (ex: solver.OPTIMAL) to solve the current board, instead of using the current solution
+    """
+    def solve_puzzle(self, method=None):
+        presses = self._presses_for(method)
+        self._logger.info("Solving puzzle using %s moves", presses.bit_count())
+
+        # Every press played at once, in time linear in the board size, see board.apply_presses().
+        # The resulting board is kept as is - is_solved() tells whether the presses really solved it
+        board = apply_presses(self._board, presses, self._num_cols, self._num_rows, self._topology)
+        if board == self._full_mask:
+            self._set_all_lights_on()
+        else:
+            self._set_board(board)
 
+        # No moves left
+        self._set_solution(0)
+    
+    """All lights on. The tracked solution can still have moves left: on dimensions with a null space, the player can
+    turn every light on with other moves than the ones it tracks"""
     def is_solved(self):
-        # All moves must be done
-        if len(self._curr_solution) > 0:
-            return False
-        
-        # All lights on
-        for c in range(self._num_cols):
-            for r in range(self._num_rows):
-                if self._grid[c][r] != self._light_on:
-                    return False
-        
-        # Otherwise, puzzle is solved
-        return True
+        return self._board == self._full_mask
     
     """Num columns, num rows"""
     def dimensions(self):
         return self._num_cols, self._num_rows
 
+    def topology(self):
+        return self._topology
+
+    """Returns (canonical_key, transform) for deduplicating boards that are rotations or reflections of each other.
+    canonical_key - (topology name, num_cols, num_rows, canonical board)
+    transform - maps this board to the canonical board, see symmetry.restore_presses() to map a stored solution back
+    """
+    def canonical_form(self):
+        canonical_board, transform = symmetry.canonical_form(self._board, self._num_cols, self._num_rows, self._topology)
+        return (self._topology.name, self._num_cols, self._num_rows, canonical_board), transform
+
+    """64-bit hash of the lights, kept up to date with every move"""
+    def state_hash(self):
+        return self._hash
+
+    """Grids with the same dimensions, topology and lights hash the same. Don't change a grid while it's a dict key or in a set"""
+    def __hash__(self):
+        return hash((self._num_cols, self._num_rows, self._topology.name, self._hash))
+
     """Grids are equal if:
-    - Same dimensions
+    - Same dimensions and topology
     - Same lights on off
     """
     def __eq__(self, other):
         if not isinstance(other, Grid):
             return False
         
-        if (self._num_cols != other._num_cols) or (self._num_rows != other._num_rows):
+        if (self._num_cols != other._num_cols) or (self._num_rows != other._num_rows) or (self._topology != other._topology):
             return False
 
-        for c in range(self._num_cols):
-            for r in range(self._num_rows):
-                if self._grid[c][r] != other._grid[c][r]:
-                    return False
-        return True
+        return self._board == other._board
 
     # Print the grid with some formatting
     def __repr__(self):
-        repr_str = ""
-        col_labels = "\n   "
-        
-        # Top column labels, with underline
-        for i in range(self._num_cols):
-            col_labels += "  " + str(i)
-        col_labels += "\n     "
-        # "underline"
-        for i in range(self._num_cols):
-            col_labels += "---"
-        # Remove trailing underlines
-        col_labels = col_labels[:-2] + "\n"
-
-        repr_str += col_labels
-
-        # Row labels and values
-        row = ""
-        for r in range(self._num_rows):
-            row += f"{str(r)} |"
-            for c in range(self._num_cols):
-                row += "  " + self._grid[c][r]
-            repr_str += row + "\n"
-            row = ""
+        start = instrument.enabled and instrument.start()
+        repr_str = render.grid_frame(self.view().display_rows(), self._num_cols)
 
+        if start:
+            instrument.finish("render", start, "grid")
         return repr_str
     
     """Prints this grid (__repr__) followed by a second grid.
@@ -322,8 +590,7 @@ class Grid:
     3 | O  ·  ·  ·       3 |  O  O  ·  ·
     """
     def _grid_transtion_repr(self, grid1, grid2, label="", highlight_first_grid_cell_coord=None):
-        repr_str = ""
-        grid_space_sep = " "
+        start = instrument.enabled and instrument.start()
 
         grid1_num_cols = len(grid1)
         grid1_num_rows = len(grid1[0])
@@ -331,104 +598,24 @@ class Grid:
         grid2_num_cols = len(grid2)
         grid2_num_rows = len(grid2[0])
 
-        grid_space_sep = "       "
-        grid_transition_arrow = "  -->  "
+        # The second grid is only drawn when it has more rows than its last column index,
+        # and always with the first grid's number of columns
+        rows2 = None
+        if grid2_num_cols - 1 < grid2_num_rows:
+            rows2 = self._display_rows(grid2, grid1_num_cols, grid2_num_rows)
 
-        # Label as the first line, if provided
-        col_labels = ""
-        if label != "":
-            col_labels += "- " + label + "\n"
-        
-        ### First grid column labels
-        col_label_indent = "   "
-        col_labels += "\n" + col_label_indent
-        for i in range(grid1_num_cols):
-            if highlight_first_grid_cell_coord != None:
-                if i == highlight_first_grid_cell_coord[0]:
-                    col_labels += " ›" + str(i)
-                else:
-                    col_labels += "  " + str(i)
-            else:
-                col_labels += "  " + str(i)
-
-        # Second grid column labels
-        col_labels += grid_space_sep + col_label_indent
-        for i in range(grid2_num_cols):
-            col_labels += "  " + str(i)
-
-        ### Column underline for first grid...
-        col_underline_indent = "     "
-        col_labels += "\n" + col_underline_indent
-        for i in range(grid1_num_cols):
-            col_labels += "---"
-        # Remove trailing underlines
-        col_labels = col_labels[:-2]
-        
-        # Column underline for the second grid...
-        col_labels += grid_space_sep + col_underline_indent
-        for i in range(grid2_num_cols):
-            col_labels += "---"
-        # Remove trailing underlines
-        col_labels = col_labels[:-2] + "\n"
-
-        repr_str += col_labels
-
-        ### Rows
-        # Determine max number of rows to draw
-        # For the grid with fewer rows, insert spaces to preserve formatting
-        max_num_rows = max(grid1_num_rows, grid2_num_rows)
-
-        # Insert arrow on middle row of the grid with fewer rows
-        arrow_row_index = None
-        min_row_count = min(grid1_num_rows, grid2_num_rows)
-        arrow_row_index = (min_row_count // 2) - 1
-        
-        row = ""
-        for r in range(max_num_rows):
-            ### First grid row labels and values
-            if r < grid1_num_rows:
-                # Label
-                if highlight_first_grid_cell_coord != None:
-                    if r == highlight_first_grid_cell_coord[1]:
-                        row += f"{str(r)}›|"
-                    else:
-                        row += f"{str(r)} |"
-                else:
-                    row += f"{str(r)} |"
-                # Values
-                for c in range(grid1_num_cols):
-                    # Draw special symbol, or original value
-                    if highlight_first_grid_cell_coord != None:
-                        if c == highlight_first_grid_cell_coord[0] and r == highlight_first_grid_cell_coord[1]:
-                            row += " >" + grid1[c][r]
-                        else:
-                            row += "  " + grid1[c][r]
-                    else:
-                        row += "  " + grid1[c][r]
-            # Or, whitespace
-            else:
-                row += col_label_indent
-                for c in range(grid1_num_cols + 1):
-                    row += "   "
-                # Remove trailing whitespace
-                row = row[:-3]
-
-            ### Add arrow or whitespace after grid rows
-            if r == arrow_row_index:
-                row += grid_transition_arrow
-            else:
-                row += grid_space_sep
-
-            ### Second grid labels and values
-            if i < grid2_num_rows:
-                # Label
-                row += f"{str(r)} |"
-                # Values
-                for c in range(grid1_num_cols):
-                    row += "  " + grid2[c][r]
-
-            repr_str += row + "\n"
-            # Clear row for the next values
-            row = ""
-
-        return repr_str
\ No newline at end of file
+        repr_str = render.transition_frame(self._display_rows(grid1, grid1_num_cols, grid1_num_rows), rows2,
+                                           grid1_num_cols, grid2_num_cols, grid2_num_rows, label, highlight_first_grid_cell_coord)
+
+        if start:
+            instrument.finish("render", start, "transition")
+        return repr_str
+
+    """Display rows of a grid's first num_cols columns, see render.py.
+    Views come straight from their packed board, other grids (grid[col][row] -> symbol) a cell at a time
+    """
+    @staticmethod
+    def _display_rows(grid, num_cols, num_rows):
+        if isinstance(grid, BoardView) and len(grid) == num_cols:
+            return grid.display_rows()
+        return render.symbol_rows(grid, num_cols, num_rows)
\ No newline at end of file
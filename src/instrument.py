@@ -0,0 +1,162 @@
+import collections
+import signal
+import sys
+import time
+
+"""Counters, latency histograms and sampled event tracing for profiling live games.
+
+Off by default, and free when off: every hook site is guarded by instrument.enabled,
+so a disabled hook is one attribute check - no clock read, no string formatting, no allocation.
+
+    start = instrument.enabled and instrument.start()
+    ...
+    if start:
+        instrument.finish("toggle", start, (col, row))
+
+Events: "toggle", "undo", "redo", "solve", "render", "generate" - see grid.py
+"""
+
+enabled = False
+
+# Every sample_every-th event is kept, with its details, in a ring buffer of the latest max_events
+_sample_every = 100
+_num_events = 0
+_events = collections.deque(maxlen=10000)
+
+_counters = collections.Counter()
+_histograms = {}
+
+"""Log-linear latency histogram, like an HDR histogram with 3 significant bits: every bucket is within 12.5% of its values.
+Values are ints, ex: nanoseconds. Fixed memory, whatever the number of values
+"""
+class Histogram:
+    __slots__ = ("_counts", "count", "total", "max")
+
+    # Values below 16 get their own bucket, then 8 buckets per power of two
+    _sub_buckets = 8
+
+    def __init__(self):
+        self._counts = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        if value < 2 * self._sub_buckets:
+            index = value
+        else:
+            exponent = value.bit_length() - 4
+            index = 2 * self._sub_buckets + (exponent - 1) * self._sub_buckets + ((value >> exponent) & (self._sub_buckets - 1))
+
+        if index >= len(self._counts):
+            self._counts.extend([0] * (index + 1 - len(self._counts)))
+        self._counts[index] += 1
+
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    """Highest value in the bucket"""
+    def _bucket_value(self, index):
+        if index < 2 * self._sub_buckets:
+            return index
+
+        exponent = (index - 2 * self._sub_buckets) // self._sub_buckets + 1
+        mantissa = self._sub_buckets + (index - 2 * self._sub_buckets) % self._sub_buckets
+        return ((mantissa + 1) << exponent) - 1
+
+    """Value at the percentile (0 - 100), rounded up to its bucket. 0 if there are no values"""
+    def percentile(self, percent):
+        if self.count == 0:
+            return 0
+
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self._bucket_value(index), self.max)
+
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+"""Turns the hooks on.
+sample_every (optional) - keep every n-th event in the trace, 0 keeps none
+max_events (optional) - trace size, oldest events are dropped first
+"""
+def enable(sample_every=100, max_events=10000):
+    global enabled, _sample_every, _events
+    _sample_every = sample_every
+    if _events.maxlen != max_events:
+        _events = collections.deque(_events, maxlen=max_events)
+    enabled = True
+
+def disable():
+    global enabled
+    enabled = False
+
+"""Clears the counters, histograms and trace"""
+def reset():
+    global _num_events
+    _num_events = 0
+    _events.clear()
+    _counters.clear()
+    _histograms.clear()
+
+"""Start time of a timed event, pass it to finish()"""
+def start():
+    return time.perf_counter_ns()
+
+"""Counts the event, records its latency, and samples it into the trace. detail - anything, kept only if sampled"""
+def finish(name, start_ns, detail=None):
+    global _num_events
+    elapsed = time.perf_counter_ns() - start_ns
+
+    _counters[name] += 1
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = Histogram()
+    histogram.record(elapsed)
+
+    _num_events += 1
+    if _sample_every and _num_events % _sample_every == 0:
+        _events.append((time.time(), name, elapsed, detail))
+
+"""Adds to a counter, ex: cache hits"""
+def count(name, amount=1):
+    _counters[name] += amount
+
+"""The counters, latency percentiles in nanoseconds, and the sampled trace: (unix time, event, nanoseconds, detail)"""
+def stats():
+    return {
+        "counters": dict(_counters),
+        "latency_ns": {
+            name: {"count": histogram.count, "mean": round(histogram.mean()), "p50": histogram.percentile(50),
+                   "p95": histogram.percentile(95), "p99": histogram.percentile(99), "max": histogram.max}
+            for name, histogram in sorted(_histograms.items())
+        },
+        "events": list(_events),
+    }
+
+"""Writes the counters and latency percentiles as text"""
+def dump(file=None):
+    file = file or sys.stderr
+    current = stats()
+
+    print("--- Counters", file=file)
+    for name, value in sorted(current["counters"].items()):
+        print(f"{name}: {value}", file=file)
+
+    print("--- Latency (us): count, mean, p50, p95, p99, max", file=file)
+    for name, latency in current["latency_ns"].items():
+        values = ", ".join(f"{latency[key] / 1000:.1f}" for key in ("mean", "p50", "p95", "p99", "max"))
+        print(f"{name}: {latency['count']}, {values}", file=file)
+
+    print(f"--- Sampled events: {len(current['events'])}", file=file)
+
+"""Dumps the stats whenever the process gets the signal, ex: kill -USR1 <pid> on a running server"""
+def dump_on_signal(signum=getattr(signal, "SIGUSR1", None), file=None):
+    signal.signal(signum, lambda signum, frame: dump(file))
@@ -0,0 +1,122 @@
+from array import array
+
+"""Compact record of the player's moves, with undo, redo and jumping to any move number.
+Moves are stored as cell bits (see board.cell_bit()) in an array - 4 bytes per move instead of a (col, row) tuple.
+moves[:position] have been played. moves[position:] were undone, and can be redone until a new move is recorded.
+
+A snapshot of the grid is kept every checkpoint_interval moves, so a jump replays at most checkpoint_interval moves.
+A move is its own inverse, so a replay only presses the cells played an odd number of times in the gap.
+Checkpoints can be missing (None), ex: moves replayed from a game log - jumps fall back to an earlier one
+"""
+class MoveJournal:
+    __slots__ = ("_checkpoint_interval", "_moves", "_position", "_checkpoints")
+
+    """start - snapshot of the grid before the first move
+    checkpoint_interval (optional) - moves between snapshots
+    """
+    def __init__(self, start, checkpoint_interval=256):
+        if checkpoint_interval < 1:
+            raise ValueError(f"checkpoint_interval ({checkpoint_interval}) must be >= 1")
+
+        self._checkpoint_interval = checkpoint_interval
+        self.clear(start)
+
+    """Forgets every move. start - snapshot of the grid before the first move"""
+    def clear(self, start):
+        self._moves = array("I")
+        self._position = 0
+
+        # checkpoints[i] is the grid after i * checkpoint_interval moves
+        self._checkpoints = [start]
+
+    """Sets the recorded moves and position, ex: saved by a game log. start - snapshot of the grid before the first move.
+    Only the start checkpoint is known, so jumps into the loaded moves replay from the start or the current position
+    """
+    def load(self, start, moves, position):
+        if position < 0 or position > len(moves):
+            raise IndexError(f"Invalid position: {position}, moves recorded: {len(moves)}")
+
+        self._moves = array("I", moves)
+        self._position = position
+        self._checkpoints = [start] + [None] * (len(self._moves) // self._checkpoint_interval)
+
+    """Records a move played at the current position, dropping any moves that could have been redone.
+    snapshot - callable returning the grid after the move, only called when a checkpoint is due. None skips the checkpoint
+    """
+    def record(self, bit, snapshot):
+        if self._position < len(self._moves):
+            del self._moves[self._position:]
+            del self._checkpoints[self._position // self._checkpoint_interval + 1:]
+
+        self._moves.append(bit)
+        self._position += 1
+
+        if self._position % self._checkpoint_interval == 0:
+            self._checkpoints.append(snapshot() if snapshot is not None else None)
+
+    """Steps back one move. Returns the cell bit to press again, or None if there are no moves"""
+    def undo(self):
+        if self._position == 0:
+            return None
+
+        self._position -= 1
+        return self._moves[self._position]
+
+    """Steps forward one undone move. Returns the cell bit to press again, or None if there's nothing to redo"""
+    def redo(self):
+        if self._position == len(self._moves):
+            return None
+
+        self._position += 1
+        return self._moves[self._position - 1]
+
+    """Returns (snapshot, bits) to get the grid from the current position to move_number:
+    restore the snapshot if it isn't None, then press each bit once. Call seek() afterwards.
+    Replays from the current position or the checkpoint before move_number, whichever is closer
+    """
+    def plan_jump(self, move_number):
+        if move_number < 0 or move_number > len(self._moves):
+            raise IndexError(f"Invalid move number: {move_number}, moves recorded: {len(self._moves)}")
+
+        checkpoint = move_number // self._checkpoint_interval
+        while self._checkpoints[checkpoint] is None:
+            checkpoint -= 1
+        checkpoint_move = checkpoint * self._checkpoint_interval
+
+        if move_number - checkpoint_move < abs(move_number - self._position):
+            return self._checkpoints[checkpoint], self.odd_parity_bits(checkpoint_move, move_number)
+
+        start, end = sorted((self._position, move_number))
+        return None, self.odd_parity_bits(start, end)
+
+    """Sets the position after the grid has been moved there, see plan_jump()"""
+    def seek(self, move_number):
+        if move_number < 0 or move_number > len(self._moves):
+            raise IndexError(f"Invalid move number: {move_number}, moves recorded: {len(self._moves)}")
+        self._position = move_number
+
+    """Cells pressed an odd number of times in moves[start:end] - the even ones cancel out"""
+    def odd_parity_bits(self, start, end):
+        odd = set()
+        for bit in self._moves[start:end]:
+            if bit in odd:
+                odd.remove(bit)
+            else:
+                odd.add(bit)
+        return odd
+
+    """Cell bits of the played moves, oldest first"""
+    def played(self):
+        return self._moves[:self._position]
+
+    """Cell bits of every recorded move, including the ones that can be redone"""
+    def moves(self):
+        return self._moves
+
+    """Number of played moves"""
+    def position(self):
+        return self._position
+
+    """Number of recorded moves, including the ones that can be redone"""
+    def __len__(self):
+        return len(self._moves)
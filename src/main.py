@@ -1,13 +1,90 @@
+import argparse
+import contextlib
 import re
 
 from grid import Grid
-
-# Create grid
-grid = Grid()
-grid.create_new_puzzle()
+from topology import TOPOLOGIES
+import solver
+import gamelog
+from archive import PuzzleArchive
+from prefetch import PuzzlePrefetcher
+from profiler import CommandProfiler
+import display
+from viewport import Viewport
+
+parser = argparse.ArgumentParser(description="Turn on all the lights!")
+parser.add_argument("--size", default="4x4", help="Board columns x rows, ex: 300x200")
+parser.add_argument("--viewport", default="40x20", help="Boards larger than this many columns x rows are shown through a window")
+parser.add_argument("--topology", choices=list(TOPOLOGIES), default="plus", help="Which adjacent lights flip with each move")
+parser.add_argument("--archive", help="Draw puzzles from this puzzle archive, see archive.py")
+parser.add_argument("--prefetch", type=int, default=2, help="New puzzles kept ready in the background, 0 to create them on demand")
+parser.add_argument("--session", help="Save the game to these files, and continue it after a restart, ex: sessions/player1")
+parser.add_argument("--display", choices=["auto", "live", "full"], default="auto",
+                    help="live: redraw only the lights that changed, full: print the whole grid every turn. auto: live on a terminal")
+parser.add_argument("--profile", action="store_true", help="Time every command, print p50/p95/p99 on exit")
+parser.add_argument("--profile-commands", default="", help="Also run these commands under cProfile, ex: solve,hint")
+parser.add_argument("--profile-dir", default=".", help="Directory for the cProfile .prof files")
+args = parser.parse_args()
+
+# Command timing, see profiler.py
+profiler = None
+if args.profile:
+    profiler = CommandProfiler([name for name in args.profile_commands.split(",") if name], args.profile_dir)
+
+def measure(command):
+    if profiler:
+        return profiler.measure(command)
+    return contextlib.nullcontext()
+
+# Grid drawing, see display.py
+screen = display.for_output(mode=args.display)
+
+# Create grid, or continue the saved session
+grid = None
+if args.session:
+    grid = gamelog.recover(args.session)
+
+new_puzzle = grid is None or grid.is_solved()
+if new_puzzle:
+    num_cols, num_rows = (int(value) for value in args.size.split("x"))
+    grid = Grid(num_cols, num_rows, TOPOLOGIES[args.topology])
+
+# Boards that would take too long to solve on every prompt, see solver.check_size()
+try:
+    solver.check_size(*grid.dimensions(), grid.topology())
+except ValueError as error:
+    parser.error(str(error))
+
+# Where new puzzles come from: the archive, puzzles made in the background (see prefetch.py), or made on demand
+puzzle_archive = None
+puzzle_prefetcher = None
+if args.archive:
+    puzzle_archive = PuzzleArchive(args.archive)
+
+    # Puzzles are created instead if the archive has none for the grid
+    if puzzle_archive.count(*grid.dimensions(), topology=grid.topology()) == 0:
+        num_cols, num_rows = grid.dimensions()
+        print(f"==> No {grid.topology().name} {num_cols}x{num_rows} puzzles in {args.archive}, creating them instead")
+        puzzle_archive.close()
+        puzzle_archive = None
+
+if not puzzle_archive and args.prefetch > 0:
+    puzzle_prefetcher = PuzzlePrefetcher(args.prefetch)
+puzzle_source = puzzle_archive or puzzle_prefetcher
+
+if new_puzzle:
+    grid.create_new_puzzle(archive=puzzle_archive)
+
+if puzzle_prefetcher:
+    puzzle_prefetcher.prefetch(*grid.dimensions(), topology=grid.topology())
+
+session_log = None
+if args.session:
+    session_log = gamelog.GameLog(args.session, grid)
 
 # Commands
 cmd_undo = ['undo', 'u']
+cmd_redo = ['redo', 'r']
 cmd_solution = ['solution'] # For debugging
 cmd_solve = ['solve']
 cmd_reset = ['reset']
@@ -15,6 +92,14 @@ cmd_new = ['new', 'n']
 cmd_quit = ['quit', 'exit']
 cmd_history = ['history', 'h']
 cmd_hint = ['hint']
+cmd_pan = ['pan']
+cmd_jump = ['jump']
+cmd_zoom = ['zoom']
+
+# Window on large boards, see viewport.py. None if the board fits
+viewport = Viewport(*grid.dimensions(), *(int(value) for value in args.viewport.split("x")))
+if viewport.fits():
+    viewport = None
 
 # Game loop flags
 display_solution = False
@@ -22,7 +107,10 @@ curr_solution = ""
 display_history = False
 display_coord_hint = False
 
-num_solution_moves = grid.hint()[1]
+# The fewest moves, or only an upper bound on dimensions whose null space is too large to search, see solver.minimize_presses()
+moves_required_label = "Moves required" if solver.minimum_is_exact(*grid.dimensions(), grid.topology()) else "Moves required (at most)"
+
+num_solution_moves = grid.optimal_hint()[1]
 max_num_wrong_moves = num_solution_moves + 1 // 2
 
 def reset_game_flags():
@@ -36,21 +124,26 @@ def reset_game_flags():
 
 while max_num_wrong_moves >= 0:
     # Instructions
-    print('\n')
-    print(grid)
+    with measure("render"):
+        screen.draw(grid, viewport.render(grid) if viewport else None)
     print(f">>> Turn on all the lights! <<<")
-    print("Adjacent lights (up, down, left, right) will flip on/off at the same time.")
+    print(f"Adjacent lights ({grid.topology().description}) will flip on/off at the same time.")
     print("Enter the col, row, ex: 3, 5\n")
 
     # Commands
     print(f"Commands:")
 
     ## Undo, Reset, New, Quit
-    print(f"Undo: {cmd_undo}\tReset: {cmd_reset}\tNew Puzzle: {cmd_new}\tQuit: {cmd_quit}")
+    print(f"Undo: {cmd_undo}\tRedo: {cmd_redo}\tReset: {cmd_reset}\tNew Puzzle: {cmd_new}\tQuit: {cmd_quit}")
+
+    ## Viewport
+    if viewport:
+        print(f"Pan: {cmd_pan} cols, rows\tJump: {cmd_jump} col, row\tZoom: {cmd_zoom} in, {cmd_zoom} out")
 
     ## History
     if display_history:
-        print(f"History: {grid.history()}")
+        with measure("history"):
+            print(f"History: {grid.history()}")
     else:
         print(f"History: {cmd_history}")
 
@@ -58,14 +151,16 @@ while max_num_wrong_moves >= 0:
     print(f"Solve: {cmd_solve}")
 
     if display_solution:
-        print(f"Solution: {grid.get_curr_solution()}")
+        with measure("solution"):
+            print(f"Solution: {grid.get_curr_solution()}")
 
     ## Hint
     # Always show the number of moves remaining
     # Only show next coordinate if requested
-    hint = grid.hint()
+    with measure("hint"):
+        hint = grid.optimal_hint()
     hint_coord, num_moves_left = hint
-    hint_num_moves_left = f"Moves required: {str(num_moves_left)}"
+    hint_num_moves_left = f"{moves_required_label}: {str(num_moves_left)}"
 
     if display_coord_hint:
        print(f"> {hint_num_moves_left}, next light: {hint_coord}")
@@ -77,8 +172,15 @@ while max_num_wrong_moves >= 0:
     print('---')
 
 
-    # Read command
-    command = input('Enter coordinates or command: ')
+    # Nothing is lost while waiting on the player
+    if session_log:
+        session_log.sync()
+
+    # Read command. A scripted run ends with its input
+    try:
+        command = input('Enter coordinates or command: ')
+    except EOFError:
+        break
 
     # Toggle cell
     if (re.match(r"\s*\d+\s*,\s*\d+\s*", command)):
@@ -86,16 +188,21 @@ while max_num_wrong_moves >= 0:
         col = int(coords_input[0])
         row = int(coords_input[1])
 
-        print(f"Entered col: {col}, row: {row}")
+        screen.message(f"Entered col: {col}, row: {row}")
 
         try:
             # Save number of moves remaining before acting
-            num_moves_before = len(grid.get_curr_solution())
+            num_moves_before = num_moves_left
 
-            grid.player_toggle_cell(col, row)
+            with measure("move"):
+                grid.player_toggle_cell(col, row)
+                if session_log:
+                    session_log.record_move(col, row)
+            if viewport:
+                viewport.follow(col, row)
 
             # Wrong move - derement num of wrong moves allowed
-            if num_moves_before < len(grid.get_curr_solution()):
+            if num_moves_before < grid.optimal_hint()[1]:
                 max_num_wrong_moves -= 1
 
             # Disable the coordinate hint, if the player just entered it
@@ -105,44 +212,104 @@ while max_num_wrong_moves >= 0:
             
             # End the game if the grid is solved
             if grid.is_solved():
-                print(grid)
+                screen.draw(grid)
                 print(">>> Grid solved! <<<")
                 break
 
         except IndexError:
-            print(f"==> Invalid col: {col}, row: {row}")
+            screen.message(f"==> Invalid col: {col}, row: {row}")
 
     elif command in cmd_undo:
-        last_coords = grid.undo_last_move()
+        with measure("undo"):
+            last_coords = grid.undo_last_move()
+            if last_coords != None and session_log:
+                session_log.record_undo()
         if last_coords != None:
-            print(f"==> Reverted col: {last_coords[0]}, row: {last_coords[1]}")
+            if viewport:
+                viewport.follow(*last_coords)
+            screen.message(f"==> Reverted col: {last_coords[0]}, row: {last_coords[1]}")
             last_coords = None
 
+    elif command in cmd_redo:
+        with measure("redo"):
+            redo_coords = grid.redo_move()
+            if redo_coords != None and session_log:
+                session_log.record_redo()
+        if redo_coords != None:
+            if viewport:
+                viewport.follow(*redo_coords)
+            screen.message(f"==> Replayed col: {redo_coords[0]}, row: {redo_coords[1]}")
+
+            # Redoing the last move can solve the grid
+            if grid.is_solved():
+                screen.draw(grid)
+                print(">>> Grid solved! <<<")
+                break
+
     elif command in cmd_solution:
         display_solution = True
 
     # Shows next light location
     elif command in cmd_hint:
         display_coord_hint = True
+        if viewport and hint_coord:
+            viewport.follow(*hint_coord)
 
     elif command in cmd_solve:
-        print(grid.solution_steps_str())
+        # Each step is shown as soon as it's rendered
+        with measure("solve"):
+            for coords, frame in grid.solution_steps(method=solver.OPTIMAL):
+                screen.show(frame)
         break
 
     elif command in cmd_reset:
-        grid.reset()
+        with measure("reset"):
+            grid.reset()
+            if session_log:
+                session_log.record_reset()
         reset_game_flags()
 
     elif command in cmd_history:
         display_history = True
 
     elif command in cmd_new:
-        grid.create_new_puzzle()
+        with measure("new"):
+            grid.create_new_puzzle(archive=puzzle_source)
+            if session_log:
+                session_log.record_new_puzzle()
         reset_game_flags()
 
     elif command in cmd_quit:
         break
 
+    # Viewport commands, ex: pan 10, -5 / jump 150, 20 / zoom out
+    elif viewport and command.split(" ", 1)[0] in cmd_pan + cmd_jump + cmd_zoom:
+        name, _, argument = command.partition(" ")
+        argument = argument.strip()
+        coords = re.fullmatch(r"(-?\d+)\s*,\s*(-?\d+)", argument)
+
+        if name in cmd_zoom and argument in ["in", "out"]:
+            if not (viewport.zoom_in() if argument == "in" else viewport.zoom_out()):
+                screen.message(f"==> Can't zoom {argument} any further")
+        elif name in cmd_pan and coords:
+            viewport.pan(int(coords[1]), int(coords[2]))
+        elif name in cmd_jump and coords:
+            viewport.jump(int(coords[1]), int(coords[2]))
+        else:
+            screen.message(f"==> Invalid command: {command}")
+
     else:
         continue
-    
\ No newline at end of file
+    
+
+if session_log:
+    session_log.close()
+if puzzle_archive:
+    puzzle_archive.close()
+if puzzle_prefetcher:
+    puzzle_prefetcher.close()
+
+if profiler:
+    print(profiler.summary())
+    for path in profiler.write_profiles():
+        print(f"Profile written: {path}")
@@ -0,0 +1,134 @@
+import collections
+import random
+import threading
+
+from grid import Grid
+from topology import PLUS
+import instrument
+
+"""Background puzzle generation, so a new puzzle is ready as soon as the player asks for one.
+
+A worker thread keeps a bounded queue of ready puzzles for each topology, dimensions and difficulty it's asked for,
+and refills it as puzzles are drawn. Drawing one is a queue pop: Grid.create_new_puzzle(archive=prefetcher), same as
+drawing from a puzzle archive. Puzzles come with their state hash, so loading one doesn't hash the board again.
+The worker makes puzzles on grids of its own, never on the player's grid. It does add to the shared per-dimension
+caches (toggle patterns, Zobrist keys, and the null space when num_moves is set), a whole entry at a time
+"""
+class PuzzlePrefetcher:
+    """depth (optional) - ready puzzles kept for each topology, dimensions and difficulty
+    rand_seed (optional) - seeds the puzzles the worker makes
+    """
+    def __init__(self, depth=2, rand_seed=None):
+        self._depth = depth
+        self._rng = random.Random(rand_seed)
+
+        # (topology name, num_cols, num_rows, num_moves) -> deque of ready (board, presses, state_hash), and the key's topology.
+        # Guarded by the condition, which the worker waits on for puzzles to make
+        self._queues = {}
+        self._topologies = {}
+        # Keys the worker couldn't make a puzzle for -> the error. Their queues stay empty, and stop being filled
+        self._errors = {}
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._fill, name="puzzle-prefetch", daemon=True)
+        self._thread.start()
+
+    """Keeps puzzles of the dimensions and difficulty ready. num_moves - see Grid.create_new_puzzle"""
+    def prefetch(self, num_cols, num_rows, num_moves=None, topology=PLUS):
+        with self._condition:
+            self._queue((topology.name, num_cols, num_rows, num_moves), topology)
+            self._condition.notify_all()
+
+    """A ready puzzle: (board, presses, state_hash), see Grid.create_new_puzzle().
+    If none is ready it's made on the spot, and the dimensions and difficulty are kept ready from then on.
+    Dimensions and difficulty the worker failed on are made on the spot too, raising the same error, ex: ValueError
+    rng (optional) - seeds a puzzle made on the spot. Ready puzzles come in the order they were made
+    """
+    def random_puzzle(self, num_cols, num_rows, num_moves=None, rng=random, topology=PLUS):
+        key = (topology.name, num_cols, num_rows, num_moves)
+
+        with self._condition:
+            queue = self._queue(key, topology)
+            puzzle = queue.popleft() if queue else None
+            # Refill
+            self._condition.notify_all()
+
+        if instrument.enabled:
+            instrument.count("prefetch.hit" if puzzle else "prefetch.miss")
+
+        if puzzle is None:
+            puzzle = _make_puzzle(key, topology, rng.getrandbits(64))
+        return puzzle
+
+    """Waits until every queue is full, other than those the worker failed on. Returns False on timeout"""
+    def wait_ready(self, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: self._closed or self._next_key() is None, timeout)
+
+    """Stops the worker. A puzzle it's making is finished first - timeout (optional) stops waiting for it,
+    the worker is a daemon thread so it won't keep the process alive"""
+    def close(self, timeout=None):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    """The key's queue, created if it's new. Call with the condition held"""
+    def _queue(self, key, topology):
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = collections.deque()
+            self._topologies[key] = topology
+        return queue
+
+    """Key of the emptiest queue that isn't full and hasn't failed, or None. Call with the condition held"""
+    def _next_key(self):
+        keys = (key for key in self._queues if key not in self._errors)
+        key = min(keys, key=lambda key: len(self._queues[key]), default=None)
+        if key is None or len(self._queues[key]) >= self._depth:
+            return None
+        return key
+
+    """Worker: makes puzzles for the emptiest queue until they're all full, then waits for a draw"""
+    def _fill(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or self._next_key() is not None)
+                if self._closed:
+                    return
+
+                key = self._next_key()
+                topology = self._topologies[key]
+                rand_seed = self._rng.getrandbits(64)
+
+            # Made without the lock, so draws don't wait on it.
+            # An error stops filling only that queue, ex: more moves than the dimensions allow
+            puzzle = error = None
+            try:
+                puzzle = _make_puzzle(key, topology, rand_seed)
+            except Exception as make_error:
+                error = make_error
+
+            with self._condition:
+                if error is None:
+                    self._queues[key].append(puzzle)
+                else:
+                    self._errors[key] = error
+                self._condition.notify_all()
+
+"""Makes a puzzle the way the game does. Returns (board, presses, state_hash)"""
+def _make_puzzle(key, topology, rand_seed):
+    name, num_cols, num_rows, num_moves = key
+
+    grid = Grid(num_cols, num_rows, topology)
+    grid.create_new_puzzle(rand_seed=rand_seed, num_moves=num_moves)
+
+    snapshot = grid.snapshot()
+    return snapshot.board, snapshot.solution, snapshot.state_hash
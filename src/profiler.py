@@ -0,0 +1,70 @@
+import contextlib
+import cProfile
+import os
+import time
+
+from instrument import Histogram
+
+"""Per-command latency profiling for the game loop, see main.py --profile.
+Wall and CPU time of every command go into histograms by command type. Selected command types are also run
+under cProfile, and written to <profile_dir>/<command>.prof - open them with pstats or snakeviz
+"""
+class CommandProfiler:
+    """profile_commands (optional) - command types to run under cProfile, ex: ["solve", "hint"]
+    profile_dir (optional) - directory for the .prof files
+    """
+    def __init__(self, profile_commands=(), profile_dir="."):
+        self._profile_commands = set(profile_commands)
+        self._profile_dir = profile_dir
+
+        # Command type -> (wall histogram, CPU histogram), nanoseconds
+        self._histograms = {}
+        # Command type -> cProfile.Profile, accumulated over every run of the command
+        self._profiles = {}
+
+    """Times the block as a run of the command type"""
+    @contextlib.contextmanager
+    def measure(self, command):
+        profile = None
+        if command in self._profile_commands:
+            profile = self._profiles.get(command)
+            if profile is None:
+                profile = self._profiles[command] = cProfile.Profile()
+
+        wall_start = time.perf_counter_ns()
+        cpu_start = time.process_time_ns()
+        if profile:
+            profile.enable()
+
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            cpu = time.process_time_ns() - cpu_start
+            wall = time.perf_counter_ns() - wall_start
+
+            histograms = self._histograms.get(command)
+            if histograms is None:
+                histograms = self._histograms[command] = (Histogram(), Histogram())
+            histograms[0].record(wall)
+            histograms[1].record(cpu)
+
+    """Writes the cProfile results. Returns the paths written"""
+    def write_profiles(self):
+        paths = []
+        for command, profile in sorted(self._profiles.items()):
+            path = os.path.join(self._profile_dir, f"{command}.prof")
+            profile.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    """Table of p50/p95/p99 wall and CPU time per command type, in milliseconds"""
+    def summary(self):
+        lines = [f"{'command':<12}{'count':>7}  {'wall p50':>9}{'p95':>9}{'p99':>9}  {'cpu p50':>9}{'p95':>9}{'p99':>9}"]
+
+        for command, (wall, cpu) in sorted(self._histograms.items()):
+            values = [histogram.percentile(percent) / 1e6 for histogram in (wall, cpu) for percent in (50, 95, 99)]
+            lines.append(f"{command:<12}{wall.count:>7}  {values[0]:>9.3f}{values[1]:>9.3f}{values[2]:>9.3f}  {values[3]:>9.3f}{values[4]:>9.3f}{values[5]:>9.3f}")
+
+        return "\n".join(lines)
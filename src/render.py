@@ -0,0 +1,201 @@
+"""Text frames of boards, for Grid.__repr__ and the solution steps.
+
+A frame is built from strips that are worked out once and cached: the column label and underline strips per
+number of columns, the row labels per number of rows. The cells come straight from the packed board, a byte at a
+time through a lookup table of the cells of every byte value, and are sliced into display rows.
+Each frame is then one join - no string is built up a cell at a time
+"""
+
+# Key: num_cols, value: (column labels, offset of each label in them, underline)
+_column_strips_cache = {}
+
+# Key: num_rows, value: list of row labels
+_row_labels_cache = {}
+
+# Key: (light_on, light_off, separator), value: the 8 cells of each byte value, lowest bit first
+_byte_cells_cache = {}
+
+# Between the grids of a transition, and the arrow on its middle row
+_grid_space_sep = "       "
+_grid_transition_arrow = "  -->  "
+
+"""Column labels, the offset of each column's label in them, and the underline, computed once then cached"""
+def _column_strips(num_cols):
+    strips = _column_strips_cache.get(num_cols)
+
+    if strips is None:
+        labels = [f"  {c}" for c in range(num_cols)]
+        offsets = []
+        offset = 0
+        for label in labels:
+            offsets.append(offset)
+            offset += len(label)
+
+        # The underline stops 2 short of the last column
+        strips = ("".join(labels), offsets, ("---" * num_cols)[:-2])
+        _column_strips_cache[num_cols] = strips
+
+    return strips
+
+"""Row labels, computed once then cached"""
+def _row_labels(num_rows):
+    labels = _row_labels_cache.get(num_rows)
+
+    if labels is None:
+        labels = [f"{r} |" for r in range(num_rows)]
+        _row_labels_cache[num_rows] = labels
+
+    return labels
+
+"""The cells of every byte value, computed once then cached
+separator - before every cell's symbol
+"""
+def _byte_cells(light_on, light_off, separator):
+    key = (light_on, light_off, separator)
+    table = _byte_cells_cache.get(key)
+
+    if table is None:
+        cells = (separator + light_off, separator + light_on)
+        table = ["".join([cells[(value >> bit) & 1] for bit in range(8)]) for value in range(256)]
+        _byte_cells_cache[key] = table
+
+    return table
+
+"""Cells of the lowest num_bits bits of a packed int, lowest bit first, through the byte lookup table"""
+def _packed_cells(bits, num_bits, light_on, light_off, separator):
+    table = _byte_cells(light_on, light_off, separator)
+    return "".join(map(table.__getitem__, bits.to_bytes((num_bits + 7) // 8, "little")))
+
+"""Display rows of a packed board: the cells of each row, without the row label. Ex: "  O  ·  O"
+light_on, light_off - one character symbols
+"""
+def board_rows(board, num_cols, num_rows, light_on, light_off):
+    num_cells = num_cols * num_rows
+
+    # Every cell is 3 characters, so rows don't have to line up with bytes. The padding bits of the last byte are cut off
+    cells = _packed_cells(board, num_cells, light_on, light_off, "  ")
+
+    row_width = 3 * num_cols
+    return [cells[start:start + row_width] for start in range(0, num_cells * 3, row_width)]
+
+"""Display rows of a list-of-lists grid, grid[col][row] -> symbol, for the first num_cols columns"""
+def symbol_rows(grid, num_cols, num_rows):
+    return ["".join(["  " + grid[c][r] for c in range(num_cols)]) for r in range(num_rows)]
+
+"""Frame of one grid, from its display rows. See Grid.__repr__"""
+def grid_frame(rows, num_cols):
+    col_labels, offsets, underline = _column_strips(num_cols)
+    row_labels = _row_labels(len(rows))
+
+    parts = ["\n   ", col_labels, "\n     ", underline, "\n"]
+    for r, cells in enumerate(rows):
+        parts += (row_labels[r], cells, "\n")
+
+    return "".join(parts)
+
+"""Frame of a transition between two grids, from their display rows. See Grid._grid_transtion_repr
+rows2 - None when the second grid isn't drawn
+highlight (optional) - (col, row) of the cell to mark in the first grid
+"""
+def transition_frame(rows1, rows2, num_cols1, num_cols2, num_rows2, label="", highlight=None):
+    col_labels1, offsets1, underline1 = _column_strips(num_cols1)
+    col_labels2, offsets2, underline2 = _column_strips(num_cols2)
+    num_rows1 = len(rows1)
+    highlight_col, highlight_row = highlight if highlight is not None else (None, None)
+
+    parts = []
+    if label != "":
+        parts += ("- ", label, "\n")
+
+    parts.append("\n   ")
+    if highlight_col is not None and 0 <= highlight_col < num_cols1:
+        offset = offsets1[highlight_col]
+        parts += (col_labels1[:offset], " ›", col_labels1[offset + 2:])
+    else:
+        parts.append(col_labels1)
+    parts += (_grid_space_sep, "   ", col_labels2, "\n     ", underline1, _grid_space_sep, "     ", underline2, "\n")
+
+    # The arrow is on the middle row of the grid with fewer rows
+    arrow_row_index = min(num_rows1, num_rows2) // 2 - 1
+    row_labels = _row_labels(max(num_rows1, num_rows2))
+    blank_grid = " " * (3 * (num_cols1 + 1))
+
+    for r in range(len(row_labels)):
+        if r < num_rows1:
+            cells = rows1[r]
+            if r == highlight_row:
+                parts.append(f"{r}›|")
+                if 0 <= highlight_col < num_cols1:
+                    offset = 3 * highlight_col
+                    cells = cells[:offset] + " >" + cells[offset + 2:]
+            else:
+                parts.append(row_labels[r])
+            parts.append(cells)
+        else:
+            parts.append(blank_grid)
+
+        parts.append(_grid_transition_arrow if r == arrow_row_index else _grid_space_sep)
+
+        if rows2 is not None:
+            parts += (row_labels[r], rows2[r])
+        parts.append("\n")
+
+    return "".join(parts)
+
+"""Rows of a window of a packed board, one character per cell
+col, row - the window's top left cell
+width, height - the window's size in cells, inside the board
+"""
+def window_rows(board, num_cols, col, row, width, height, light_on, light_off):
+    # The window's rows are cut out once, so each row's shift is on them instead of the whole board
+    span = (board >> (row * num_cols)) & ((1 << (height * num_cols)) - 1)
+    mask = (1 << width) - 1
+
+    return [_packed_cells((span >> (r * num_cols + col)) & mask, width, light_on, light_off, "")[:width] for r in range(height)]
+
+"""Rows of a zoomed out window of a packed board: each character sums up a block x block square of cells.
+light_on: all of its lights are on, light_off: all are off, 1 - 9: tenths of its lights that are off, rounded down to 1 - 9
+col, row - the window's top left cell
+width, height - the window's size in characters. Blocks past the board's edges are left out, blocks on them are smaller
+"""
+def summary_rows(board, num_cols, num_rows, col, row, width, height, block, light_on, light_off):
+    num_window_cols = min(width * block, num_cols - col)
+    num_window_rows = min(height * block, num_rows - row)
+    width = -(-num_window_cols // block)
+
+    span = (board >> (row * num_cols)) & ((1 << (num_window_rows * num_cols)) - 1)
+
+    # Cells in each block of a block row - the last one can be cut off by the board's edge
+    block_widths = [min(block, num_window_cols - j * block) for j in range(width)]
+
+    rows = []
+    for first_row in range(0, num_window_rows, block):
+        last_row = min(first_row + block, num_window_rows)
+
+        # The block row's band of board rows, from the window's first column
+        band_size = (last_row - first_row) * num_cols
+        band = (span >> (first_row * num_cols + col)) & ((1 << band_size) - 1)
+
+        # Mask of a block: its bits in each row of the band, so a block is one popcount
+        row_starts = ((1 << band_size) - 1) // ((1 << num_cols) - 1)
+        block_mask = ((1 << block) - 1) * row_starts
+
+        lights_on = []
+        for block_width in block_widths:
+            mask = block_mask if block_width == block else ((1 << block_width) - 1) * row_starts
+            lights_on.append((band & mask).bit_count())
+            band >>= block
+
+        chars = []
+        for num_on, block_width in zip(lights_on, block_widths):
+            num_cells = block_width * (last_row - first_row)
+            num_off = num_cells - num_on
+            if num_off == 0:
+                chars.append(light_on)
+            elif num_off == num_cells:
+                chars.append(light_off)
+            else:
+                chars.append(str(min(9, max(1, num_off * 10 // num_cells))))
+        rows.append("".join(chars))
+
+    return rows
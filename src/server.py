@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import re
+
+from grid import Grid
+from topology import PLUS, TOPOLOGIES
+import gamelog
+import solver
+
+"""Asyncio game server: one Grid per connection, driven by a line protocol over TCP or a Unix socket.
+
+Each command line gets one reply line, "OK ..." or "ERR ...":
+    3, 5        OK moves=2 | OK solved
+    undo, u     OK undo 3 5 | OK undo none
+    redo, r     OK redo 3 5 | OK redo none
+    reset       OK moves=4
+    new, n      OK moves=4
+    hint        OK hint 3 5 moves=2 | OK hint none moves=0
+    history, h  OK history 3,5 1,2
+    solve       OK solve 3,5 1,2 - the fewest moves, the grid is solved
+    board       OK board O·O/·OO/OO· - rows of lights, top row first
+    quit, exit  OK bye, and the connection is closed
+
+moves is the fewest moves left, or an upper bound on dimensions whose null space is too large to search
+(see solver.minimum_is_exact()) - every reply stays a bounded amount of work on the event loop.
+A session idle for idle_timeout seconds is spilled to disk and reloaded on its next command (see gamelog),
+or closed with "BYE idle" when there's no spill directory
+"""
+
+_coords_pattern = re.compile(r"\s*(\d+)\s*,\s*(\d+)\s*$")
+
+class GameServer:
+    """col, row, topology (optional) - the grid for every session
+    idle_timeout (optional) - seconds before an idle session is spilled or closed
+    spill_dir (optional) - directory for idle sessions
+    archive (optional) - archive.PuzzleArchive to draw new puzzles from
+    Raises ValueError if the grid would take too long to solve, see solver.check_size()
+    """
+    def __init__(self, col=4, row=4, topology=PLUS, idle_timeout=300, spill_dir=None, archive=None):
+        solver.check_size(col, row, topology)
+        self._logger = logging.getLogger(__name__)
+
+        self._num_cols = col
+        self._num_rows = row
+        self._topology = topology
+        self._idle_timeout = idle_timeout
+        self._spill_dir = spill_dir
+        self._archive = archive
+
+        self._session_ids = itertools.count()
+        self._num_sessions = 0
+        self._num_spilled = 0
+
+        self._commands = {}
+        for names, command in [
+            (["undo", "u"], self._undo),
+            (["redo", "r"], self._redo),
+            (["reset"], self._reset),
+            (["new", "n"], self._new),
+            (["hint"], self._hint),
+            (["history", "h"], self._history),
+            (["solve"], self._solve),
+            (["board"], self._board),
+        ]:
+            for name in names:
+                self._commands[name] = command
+
+    async def start_tcp(self, host="127.0.0.1", port=0):
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def start_unix(self, path):
+        return await asyncio.start_unix_server(self._handle, path)
+
+    """Number of connected sessions, and how many of them are spilled to disk"""
+    def session_counts(self):
+        return self._num_sessions, self._num_spilled
+
+    async def _handle(self, reader, writer):
+        session_id = next(self._session_ids)
+        grid = self._new_grid()
+        spill_path = None
+        self._num_sessions += 1
+
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self._idle_timeout if spill_path is None else None)
+                except asyncio.TimeoutError:
+                    if self._spill_dir is None:
+                        writer.write(b"BYE idle\n")
+                        break
+
+                    spill_path = os.path.join(self._spill_dir, f"session-{os.getpid()}-{session_id}")
+                    await asyncio.get_running_loop().run_in_executor(None, _spill, grid, spill_path)
+                    grid = None
+                    self._num_spilled += 1
+                    continue
+
+                if not line:
+                    break
+
+                if spill_path is not None:
+                    grid = await asyncio.get_running_loop().run_in_executor(None, _unspill, spill_path)
+                    spill_path = None
+                    self._num_spilled -= 1
+
+                command = line.decode().strip()
+                if command in ("quit", "exit"):
+                    writer.write(b"OK bye\n")
+                    break
+
+                writer.write(self._run(grid, command).encode() + b"\n")
+                await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            if spill_path is not None:
+                _remove_spill(spill_path)
+                self._num_spilled -= 1
+            self._num_sessions -= 1
+
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _new_grid(self):
+        grid = Grid(self._num_cols, self._num_rows, self._topology)
+        grid.create_new_puzzle(archive=self._archive)
+        return grid
+
+    """Runs one command on the grid, returns the reply line"""
+    def _run(self, grid, command):
+        match = _coords_pattern.match(command)
+        if match:
+            return self._move(grid, int(match.group(1)), int(match.group(2)))
+
+        handler = self._commands.get(command.lower())
+        if handler is None:
+            return f"ERR unknown command: {command}"
+
+        return handler(grid)
+
+    def _move(self, grid, col, row):
+        try:
+            grid.player_toggle_cell(col, row)
+        except IndexError:
+            return f"ERR invalid col: {col}, row: {row}"
+
+        if grid.is_solved():
+            return "OK solved"
+        return f"OK moves={grid.optimal_hint()[1]}"
+
+    def _undo(self, grid):
+        coords = grid.undo_last_move()
+        return f"OK undo {coords[0]} {coords[1]}" if coords else "OK undo none"
+
+    def _redo(self, grid):
+        coords = grid.redo_move()
+        return f"OK redo {coords[0]} {coords[1]}" if coords else "OK redo none"
+
+    def _reset(self, grid):
+        grid.reset()
+        return f"OK moves={grid.optimal_hint()[1]}"
+
+    def _new(self, grid):
+        grid.create_new_puzzle(archive=self._archive)
+        return f"OK moves={grid.optimal_hint()[1]}"
+
+    def _hint(self, grid):
+        coords, num_moves_left = grid.optimal_hint()
+        if coords is None:
+            return "OK hint none moves=0"
+        return f"OK hint {coords[0]} {coords[1]} moves={num_moves_left}"
+
+    def _history(self, grid):
+        return "OK history" + "".join(f" {col},{row}" for col, row in grid.history())
+
+    def _solve(self, grid):
+        try:
+            moves = grid.find_solution(solver.OPTIMAL)
+            if moves is None:
+                return "ERR grid can't be solved"
+            grid.solve_puzzle(solver.OPTIMAL)
+        except ValueError as e:
+            return f"ERR {e}"
+
+        return "OK solve" + "".join(f" {col},{row}" for col, row in moves)
+
+    def _board(self, grid):
+        view = grid.view()
+        num_cols, num_rows = grid.dimensions()
+        return "OK board " + "/".join("".join(view.cell(c, r) for c in range(num_cols)) for r in range(num_rows))
+
+def _spill(grid, path):
+    gamelog.GameLog(path, grid).close()
+
+def _unspill(path):
+    grid = gamelog.recover(path)
+    _remove_spill(path)
+    return grid
+
+def _remove_spill(path):
+    for suffix in (".snap", ".log"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+async def _serve(server, args):
+    if args.unix:
+        listener = await server.start_unix(args.unix)
+    else:
+        listener = await server.start_tcp(args.host, args.port)
+
+    for sock in listener.sockets:
+        print(f"Serving on {sock.getsockname()}")
+
+    async with listener:
+        await listener.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Light game server, see server.py for the protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", help="Unix socket path, instead of TCP")
+    parser.add_argument("--cols", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--topology", choices=list(TOPOLOGIES), default="plus")
+    parser.add_argument("--idle-timeout", type=float, default=300)
+    parser.add_argument("--spill-dir", help="Directory to spill idle sessions to, instead of closing them")
+    args = parser.parse_args()
+
+    try:
+        game_server = GameServer(args.cols, args.rows, TOPOLOGIES[args.topology], args.idle_timeout, args.spill_dir)
+    except ValueError as error:
+        parser.error(str(error))
+    try:
+        asyncio.run(_serve(game_server, args))
+    except KeyboardInterrupt:
+        pass
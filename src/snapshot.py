@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+import render
+
+"""Copy of a grid's lights and solution. Packed ints are immutable, so taking or restoring a snapshot is O(1)
+and shares the board with the grid instead of copying it"""
+GridSnapshot = namedtuple("GridSnapshot", ["board", "state_hash", "solution", "solution_count"])
+
+"""Read-only view of a packed board, indexed like the list-of-lists grid: view[col][row] -> light symbol.
+Nothing is copied up front - the symbols are built from the board the first time a cell is read"""
+class BoardView:
+    def __init__(self, board, num_cols, num_rows, light_on, light_off):
+        self._board = board
+        self._num_cols = num_cols
+        self._num_rows = num_rows
+        self._light_on = light_on
+        self._light_off = light_off
+        self._columns = None
+
+    def _symbol_columns(self):
+        if self._columns is None:
+            row_mask = (1 << self._num_cols) - 1
+            columns = [[None] * self._num_rows for c in range(self._num_cols)]
+            for r in range(self._num_rows):
+                row_bits = (self._board >> (r * self._num_cols)) & row_mask
+                for c in range(self._num_cols):
+                    columns[c][r] = self._light_on if (row_bits >> c) & 1 else self._light_off
+            self._columns = columns
+        return self._columns
+
+    """The cells of each row as display strings, see render.board_rows"""
+    def display_rows(self):
+        return render.board_rows(self._board, self._num_cols, self._num_rows, self._light_on, self._light_off)
+
+    """Rows of a window of the board, one character per cell, see render.window_rows"""
+    def window_rows(self, col, row, width, height):
+        return render.window_rows(self._board, self._num_cols, col, row, width, height, self._light_on, self._light_off)
+
+    """Rows of a zoomed out window of the board, a character per block of cells, see render.summary_rows"""
+    def summary_rows(self, col, row, width, height, block):
+        return render.summary_rows(self._board, self._num_cols, self._num_rows, col, row, width, height, block, self._light_on, self._light_off)
+
+    def cell(self, col, row):
+        return self._symbol_columns()[col][row]
+
+    """Light symbol of one cell, read straight from the board - for a few cells, without building every column"""
+    def cell_symbol(self, col, row):
+        return self._light_on if self._board >> (row * self._num_cols + col) & 1 else self._light_off
+
+    def __len__(self):
+        return self._num_cols
+
+    """Column of light symbols. Read only - it's shared by every read of the view"""
+    def __getitem__(self, col):
+        if not 0 <= col < self._num_cols:
+            raise IndexError(f"Invalid column: {col}")
+        return self._symbol_columns()[col]
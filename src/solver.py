@@ -0,0 +1,303 @@
+from board import toggle_masks
+from topology import PLUS
+
+# Solve methods
+ELIMINATION = "elimination"
+LIGHT_CHASING = "chase"
+OPTIMAL = "optimal"
+
+# The lights out board is a linear system over GF(2): pressing cell j flips the lights in toggle mask j,
+# so the presses x that fix a board satisfy A·x = b, where row i of A is the toggle mask of cell i
+# (the matrix is symmetric) and b is the set of lights that are off.
+#
+# The elimination of A only depends on the topology and dimensions, so it's done once and cached.
+# Key: (topology name, num_cols, num_rows), value: _reduce() result
+_elimination_cache = {}
+
+"""Gauss-Jordan elimination over GF(2), every row packed into an int (bit j = variable j).
+Tracks the combination of original rows that produced each reduced row, which lets any
+right-hand side b be solved later without redoing the elimination.
+
+Returns:
+pivots - list of (pivot_bit, combo): variable pivot_bit is parity(combo & b)
+zero_combos - combos of the rows reduced to zero. b has a solution only if
+    parity(combo & b) is even for each of them
+reduced_rows - the pivot rows after elimination, in the same order as pivots
+"""
+def _reduce(rows, num_vars):
+    rows = list(rows)
+    num_rows = len(rows)
+    combos = [1 << i for i in range(num_rows)]
+
+    pivot_bits = []
+    rank = 0
+    for bit_index in range(num_vars):
+        bit = 1 << bit_index
+
+        # Find a row with this bit set to use as the pivot
+        pivot_row = None
+        for i in range(rank, num_rows):
+            if rows[i] & bit:
+                pivot_row = i
+                break
+        if pivot_row is None:
+            continue
+
+        rows[rank], rows[pivot_row] = rows[pivot_row], rows[rank]
+        combos[rank], combos[pivot_row] = combos[pivot_row], combos[rank]
+
+        # Clear the bit from every other row
+        pivot_mask = rows[rank]
+        pivot_combo = combos[rank]
+        for i in range(num_rows):
+            if i != rank and rows[i] & bit:
+                rows[i] ^= pivot_mask
+                combos[i] ^= pivot_combo
+
+        pivot_bits.append(bit_index)
+        rank += 1
+
+    pivots = list(zip(pivot_bits, combos[:rank]))
+    return pivots, combos[rank:], rows[:rank]
+
+"""Returns the elimination of the toggle matrix of the dimensions, see _reduce().
+The toggle matrix is symmetric (every topology's neighbors are mutual), so the zero row combos are also
+its null space: press masks that don't change the board"""
+def _eliminate(num_cols, num_rows, topology=PLUS):
+    key = (topology.name, num_cols, num_rows)
+    elimination = _elimination_cache.get(key)
+
+    if elimination is None:
+        elimination = _reduce(toggle_masks(num_cols, num_rows, topology), num_cols * num_rows)
+        _elimination_cache[key] = elimination
+
+    return elimination
+
+"""Finds presses that turn all the lights on for a packed board (see board.cell_bit()).
+Returns the presses as a packed int, or None if the board can't be solved"""
+def solve_board(board, num_cols, num_rows, topology=PLUS):
+    pivots, null_vectors, _ = _eliminate(num_cols, num_rows, topology)
+
+    full_mask = (1 << (num_cols * num_rows)) - 1
+    lights_off = board ^ full_mask
+
+    if not _has_solution(null_vectors, lights_off):
+        return None
+
+    return _combine(pivots, lights_off)
+
+"""Parity of the overlapping bits of each (bit, combo), packed into an int"""
+def _combine(pivots, b):
+    result = 0
+    for pivot_bit, combo in pivots:
+        if (combo & b).bit_count() & 1:
+            result |= 1 << pivot_bit
+    return result
+
+def _has_solution(zero_combos, b):
+    for combo in zero_combos:
+        if (combo & b).bit_count() & 1:
+            return False
+    return True
+
+# Light chasing: press the cell under every light that's off, row by row, until only the last row can have
+# lights off. That residue is linear in the first row presses, so the first row presses that clear it are
+# precomputed once per dimension, then every board is solved with two chases.
+# Only chaseable topologies (see topology.Topology) can be solved this way.
+# Key: (num_cols, num_rows), value: _reduce() result of the residue -> first row presses system
+_first_row_cache = {}
+
+# Key: (topology name, num_cols, num_rows), value: list of packed press masks
+_null_space_cache = {}
+
+# Largest null space minimize_presses() walks all the combinations of: 2^16 steps, tens of milliseconds.
+# It runs on every prompt of the game and every server reply
+max_exhaustive_nullity = 16
+
+# Largest board of a topology that can't be light chased, see check_size(). Its elimination is cubic in the cells:
+# about a second at 2500 cells (50x50), tens of seconds at 100x100
+max_elimination_cells = 2500
+
+"""Lights flipped within a row by pressing the given cells of that row"""
+def _spread(presses, row_mask):
+    return (presses ^ (presses << 1) ^ (presses >> 1)) & row_mask
+
+"""Chases the lights down the board.
+lights_off_rows - list of packed rows, bit set = light off
+first_row_presses - packed presses for row 0
+
+Returns the packed presses for every row, and the lights still off in the last row
+"""
+def _chase(lights_off_rows, first_row_presses, row_mask):
+    row_presses = [first_row_presses]
+    presses_above = 0
+    presses = first_row_presses
+
+    for lights_off in lights_off_rows[:-1]:
+        # Lights left off in this row are fixed by pressing the cells below them
+        presses_below = lights_off ^ presses_above ^ _spread(presses, row_mask)
+        row_presses.append(presses_below)
+        presses_above, presses = presses, presses_below
+
+    residue = lights_off_rows[-1] ^ presses_above ^ _spread(presses, row_mask)
+    return row_presses, residue
+
+def _first_row_table(num_cols, num_rows):
+    key = (num_cols, num_rows)
+    table = _first_row_cache.get(key)
+
+    if table is None:
+        row_mask = (1 << num_cols) - 1
+        all_lights_on = [0] * num_rows
+
+        # Equation per residue bit, variable per first row cell
+        residue_rows = [0] * num_cols
+        for col in range(num_cols):
+            residue = _chase(all_lights_on, 1 << col, row_mask)[1]
+            while residue:
+                lowest = residue & -residue
+                residue_rows[lowest.bit_length() - 1] |= 1 << col
+                residue ^= lowest
+
+        table = _reduce(residue_rows, num_cols)
+        _first_row_cache[key] = table
+
+    return table
+
+"""Same as solve_board(), using light chasing: O(num_cols * num_rows) row operations per board
+after the first row table for the dimensions is cached. Suited to large boards"""
+def chase_solve_board(board, num_cols, num_rows, topology=PLUS):
+    if not topology.chaseable:
+        raise ValueError(f"Light chasing can't solve the {topology} topology")
+
+    pivots, zero_combos, _ = _first_row_table(num_cols, num_rows)
+
+    row_mask = (1 << num_cols) - 1
+    lights_off = board ^ ((1 << (num_cols * num_rows)) - 1)
+    lights_off_rows = [(lights_off >> (r * num_cols)) & row_mask for r in range(num_rows)]
+
+    # Residue with no first row presses, then the first row presses that clear it
+    residue = _chase(lights_off_rows, 0, row_mask)[1]
+    if not _has_solution(zero_combos, residue):
+        return None
+    first_row_presses = _combine(pivots, residue)
+
+    row_presses = _chase(lights_off_rows, first_row_presses, row_mask)[0]
+    return _pack_rows(row_presses, num_cols)
+
+def _pack_rows(row_presses, num_cols):
+    presses = 0
+    for row_press in reversed(row_presses):
+        presses = (presses << num_cols) | row_press
+    return presses
+
+"""Returns the null space basis for the dimensions: press masks that leave any board unchanged.
+On chaseable topologies, every null space vector is a chase of an all lights on board, so only the first row is solved for"""
+def null_space(num_cols, num_rows, topology=PLUS):
+    key = (topology.name, num_cols, num_rows)
+    null_vectors = _null_space_cache.get(key)
+
+    if null_vectors is None and not topology.chaseable:
+        null_vectors = _eliminate(num_cols, num_rows, topology)[1]
+        _null_space_cache[key] = null_vectors
+
+    if null_vectors is None:
+        pivots, _, reduced_rows = _first_row_table(num_cols, num_rows)
+        row_mask = (1 << num_cols) - 1
+        all_lights_on = [0] * num_rows
+
+        # One vector per free first row cell: set it, then the pivot cells that cancel it
+        pivot_bits = set(pivot_bit for pivot_bit, _ in pivots)
+        null_vectors = []
+        for free_bit in range(num_cols):
+            if free_bit in pivot_bits:
+                continue
+
+            first_row_presses = 1 << free_bit
+            for (pivot_bit, _), reduced_row in zip(pivots, reduced_rows):
+                if (reduced_row >> free_bit) & 1:
+                    first_row_presses |= 1 << pivot_bit
+
+            row_presses = _chase(all_lights_on, first_row_presses, row_mask)[0]
+            null_vectors.append(_pack_rows(row_presses, num_cols))
+
+        _null_space_cache[key] = null_vectors
+
+    return null_vectors
+
+"""Same as solve_board(), but returns the solution with the fewest presses"""
+def optimal_solve_board(board, num_cols, num_rows, topology=PLUS):
+    presses = solve(board, num_cols, num_rows, default_method(topology), topology)
+    if presses is None:
+        return None
+
+    return minimize_presses(presses, num_cols, num_rows, topology)
+
+"""True if minimize_presses() finds the fewest moves for the dimensions, False if it only finds a local minimum
+because the null space is too large to search"""
+def minimum_is_exact(num_cols, num_rows, topology=PLUS):
+    return len(null_space(num_cols, num_rows, topology)) <= max_exhaustive_nullity
+
+"""Raises ValueError if boards of the dimensions take too long to solve: more than max_elimination_cells cells on a
+topology that isn't chaseable. Chaseable topologies are light chased, at any size"""
+def check_size(num_cols, num_rows, topology=PLUS):
+    if not topology.chaseable and num_cols * num_rows > max_elimination_cells:
+        raise ValueError(f"{num_cols}x{num_rows} is too large for the {topology.name} topology, "
+                         f"at most {max_elimination_cells} cells can be solved")
+
+"""Returns the presses with the fewest moves that have the same effect as the given presses.
+Every solution is the given presses plus a combination of the null space vectors. The 2^k combinations
+are walked in Gray code order, so each step is one XOR and one popcount.
+Null spaces of more than max_exhaustive_nullity vectors (ex: 39x39 has 32) get a local search instead,
+see _descend_presses() - check minimum_is_exact() before relying on the result being the fewest moves"""
+def minimize_presses(presses, num_cols, num_rows, topology=PLUS):
+    null_vectors = null_space(num_cols, num_rows, topology)
+    if len(null_vectors) > max_exhaustive_nullity:
+        return _descend_presses(presses, null_vectors)
+
+    best_presses = presses
+    best_count = presses.bit_count()
+    for i in range(1, 1 << len(null_vectors)):
+        # Gray code flips the lowest set bit of i
+        presses ^= null_vectors[(i & -i).bit_length() - 1]
+        count = presses.bit_count()
+        if count < best_count:
+            best_presses = presses
+            best_count = count
+
+    return best_presses
+
+"""Bounded search for minimize_presses(): XORs in any null space vector that lowers the move count, until none does.
+Each pass is k XORs and popcounts, and every pass but the last lowers the count, so it ends after at most
+the number of presses passes. Returns a local minimum, never more moves than the given presses"""
+def _descend_presses(presses, null_vectors):
+    count = presses.bit_count()
+
+    improved = True
+    while improved:
+        improved = False
+        for null_vector in null_vectors:
+            candidate = presses ^ null_vector
+            candidate_count = candidate.bit_count()
+            if candidate_count < count:
+                presses, count = candidate, candidate_count
+                improved = True
+
+    return presses
+
+"""The fastest method that can solve any board of the topology"""
+def default_method(topology=PLUS):
+    if topology.chaseable:
+        return LIGHT_CHASING
+    return ELIMINATION
+
+"""Solves the packed board with the given method, see solve_board()"""
+def solve(board, num_cols, num_rows, method=ELIMINATION, topology=PLUS):
+    if method == ELIMINATION:
+        return solve_board(board, num_cols, num_rows, topology)
+    if method == LIGHT_CHASING:
+        return chase_solve_board(board, num_cols, num_rows, topology)
+    if method == OPTIMAL:
+        return optimal_solve_board(board, num_cols, num_rows, topology)
+
+    raise ValueError(f"Unknown solve method: {method}")
@@ -0,0 +1,123 @@
+from array import array
+
+from board import cell_bit, set_bits
+from topology import PLUS
+
+# Board symmetries. Rectangular boards only have the first 4, square boards have all 8
+IDENTITY = "identity"
+FLIP_HORIZONTAL = "flip_horizontal"
+FLIP_VERTICAL = "flip_vertical"
+ROTATE_180 = "rotate_180"
+ROTATE_90 = "rotate_90"
+ROTATE_270 = "rotate_270"
+TRANSPOSE = "transpose"
+ANTI_TRANSPOSE = "anti_transpose"
+
+# Where each transform moves cell (col, row). Format: (col, row, num_cols, num_rows) -> (col, row)
+_transform_coords = {
+    IDENTITY: lambda c, r, cols, rows: (c, r),
+    FLIP_HORIZONTAL: lambda c, r, cols, rows: (cols - 1 - c, r),
+    FLIP_VERTICAL: lambda c, r, cols, rows: (c, rows - 1 - r),
+    ROTATE_180: lambda c, r, cols, rows: (cols - 1 - c, rows - 1 - r),
+    ROTATE_90: lambda c, r, cols, rows: (rows - 1 - r, c),
+    ROTATE_270: lambda c, r, cols, rows: (r, cols - 1 - c),
+    TRANSPOSE: lambda c, r, cols, rows: (r, c),
+    ANTI_TRANSPOSE: lambda c, r, cols, rows: (rows - 1 - r, cols - 1 - c),
+}
+
+_inverses = {
+    ROTATE_90: ROTATE_270,
+    ROTATE_270: ROTATE_90,
+}
+
+# Boards up to this many cells get byte lookup tables, larger boards move one set bit at a time into a digit string
+_max_table_cells = 400
+
+# Key: (transform, num_cols, num_rows), value: (bit permutation, byte tables or None)
+_permutation_cache = {}
+
+"""Transforms that map a board of the dimensions onto itself"""
+def transforms(num_cols, num_rows, topology=PLUS):
+    if not topology.symmetric:
+        return [IDENTITY]
+    if num_cols == num_rows:
+        return [IDENTITY, FLIP_HORIZONTAL, FLIP_VERTICAL, ROTATE_180, ROTATE_90, ROTATE_270, TRANSPOSE, ANTI_TRANSPOSE]
+    return [IDENTITY, FLIP_HORIZONTAL, FLIP_VERTICAL, ROTATE_180]
+
+"""The transform that undoes the given transform"""
+def inverse(transform):
+    return _inverses.get(transform, transform)
+
+"""Returns (permutation, tables) for the transform.
+permutation - array, destination bit of each cell bit
+tables - one 256 entry table per byte of the packed board: the destination bits of every value of that byte
+"""
+def _permutation(transform, num_cols, num_rows):
+    key = (transform, num_cols, num_rows)
+    entry = _permutation_cache.get(key)
+
+    if entry is None:
+        move_coords = _transform_coords[transform]
+        num_cells = num_cols * num_rows
+
+        permutation = array("i", [0] * num_cells)
+        for row in range(num_rows):
+            for col in range(num_cols):
+                permutation[cell_bit(col, row, num_cols)] = cell_bit(*move_coords(col, row, num_cols, num_rows), num_cols)
+
+        tables = None
+        if num_cells <= _max_table_cells:
+            tables = []
+            for byte_start in range(0, num_cells, 8):
+                byte_bits = [1 << permutation[bit] for bit in range(byte_start, min(byte_start + 8, num_cells))]
+                byte_bits += [0] * (8 - len(byte_bits))
+
+                # Each value adds its lowest bit to the value without it
+                table = [0] * 256
+                for value in range(1, 256):
+                    lowest = value & -value
+                    table[value] = table[value ^ lowest] | byte_bits[lowest.bit_length() - 1]
+                tables.append(table)
+
+        entry = (permutation, tables)
+        _permutation_cache[key] = entry
+
+    return entry
+
+"""Applies the transform to a packed board, or packed presses"""
+def transform_board(board, transform, num_cols, num_rows):
+    if transform == IDENTITY:
+        return board
+
+    permutation, tables = _permutation(transform, num_cols, num_rows)
+    num_cells = num_cols * num_rows
+
+    if tables is not None:
+        result = 0
+        for table, byte in zip(tables, board.to_bytes((num_cells + 7) // 8, "little")):
+            result |= table[byte]
+        return result
+
+    # Binary digits, most significant first: linear in the board size, where or-ing bits into an int is quadratic
+    digits = bytearray(b"0" * num_cells)
+    for bit in set_bits(board):
+        digits[num_cells - 1 - permutation[bit]] = ord("1")
+    return int(digits, 2)
+
+"""Returns (canonical_board, transform): the smallest of the board's symmetric boards, and the transform that gives it.
+Boards that are rotations or reflections of each other have the same canonical board"""
+def canonical_form(board, num_cols, num_rows, topology=PLUS):
+    canonical_board = board
+    canonical_transform = IDENTITY
+
+    for transform in transforms(num_cols, num_rows, topology)[1:]:
+        transformed = transform_board(board, transform, num_cols, num_rows)
+        if transformed < canonical_board:
+            canonical_board = transformed
+            canonical_transform = transform
+
+    return canonical_board, canonical_transform
+
+"""Maps presses that solve the canonical board back to presses that solve the original board"""
+def restore_presses(presses, transform, num_cols, num_rows):
+    return transform_board(presses, inverse(transform), num_cols, num_rows)
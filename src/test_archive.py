@@ -0,0 +1,107 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from grid import Grid
+from topology import HEX, PLUS
+import archive
+import generator
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_puzzle_round_trip(self):
+        board, presses = generator.generate_puzzle(7, 3, 4, random.Random(1), HEX)
+        path = os.path.join(self._dir.name, "puzzle.lgp")
+        archive.save_puzzle(path, board, presses, 7, 3, HEX)
+
+        self.assertEqual(archive.load_puzzle(path), (board, presses, 7, 3, HEX))
+
+        # Header, then 3 bytes each for the board and the presses
+        self.assertEqual(len(archive.pack_puzzle(board, presses, 7, 3, HEX)), 9 + len("hex") + 6)
+
+    def test_archive_index(self):
+        path = os.path.join(self._dir.name, "puzzles.lga")
+        archive.build_archive(path, 5, 5, count=30, moves=range(2, 6), rand_seed=2)
+
+        with archive.ArchiveWriter(os.path.join(self._dir.name, "empty.lga")):
+            pass
+
+        with archive.PuzzleArchive(path) as puzzles:
+            self.assertEqual(puzzles.difficulties(5, 5), [2, 3, 4, 5])
+            self.assertEqual(puzzles.count(5, 5), 120)
+            self.assertEqual(puzzles.count(5, 5, (3, 4)), 60)
+            self.assertEqual(puzzles.count(4, 4), 0)
+
+            boards = set()
+            for num_moves in range(2, 6):
+                for i in range(30):
+                    board, presses = puzzles.puzzle(5, 5, num_moves, i)
+                    self.assertEqual(presses.bit_count(), num_moves)
+                    self.assertEqual(generator.board_from_presses(presses, 5, 5), board)
+                    boards.add(board)
+            self.assertEqual(len(boards), 120)
+
+            with self.assertRaises(IndexError):
+                puzzles.puzzle(5, 5, 2, 30)
+            with self.assertRaises(KeyError):
+                puzzles.random_puzzle(5, 5, 9)
+
+    def test_writer_closes_once(self):
+        path = os.path.join(self._dir.name, "puzzles.lga")
+        with archive.ArchiveWriter(path) as writer:
+            board, presses = generator.generate_puzzle(4, 4, 3, random.Random(4))
+            writer.add(board, presses, 4, 4)
+            writer.close()
+
+        # Closing again, on leaving the with block, doesn't write an empty archive over it
+        with archive.PuzzleArchive(path) as puzzles:
+            self.assertEqual(puzzles.puzzle(4, 4, 3, 0), (board, presses))
+
+        with self.assertRaises(ValueError):
+            writer.add(board, presses, 4, 4)
+
+    def test_not_enough_puzzles(self):
+        # 4x4 has 16 one-move puzzles: an error, and no archive
+        path = os.path.join(self._dir.name, "puzzles.lga")
+        with self.assertRaises(ValueError):
+            archive.build_archive(path, 4, 4, count=17, moves=[2, 1], rand_seed=5, max_duplicates=100)
+        self.assertFalse(os.path.exists(path))
+
+        # The command line defaults can be met
+        result = subprocess.run([sys.executable, archive.__file__, path, "--seed", "5"], capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with archive.PuzzleArchive(path) as puzzles:
+            self.assertEqual(puzzles.difficulties(4, 4), list(range(1, 8)))
+
+        result = subprocess.run([sys.executable, archive.__file__, path, "--count", "33", "--min-moves", "7"],
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Found only 32 distinct 4x4 puzzles with 7 moves", result.stderr)
+
+    def test_create_new_puzzle_from_archive(self):
+        path = os.path.join(self._dir.name, "puzzles.lga")
+        archive.build_archive(path, 4, 4, count=10, moves=[3, 6], rand_seed=3, topology=PLUS)
+
+        with archive.PuzzleArchive(path) as puzzles:
+            grid = Grid()
+            grid.create_new_puzzle(rand_seed=1, num_moves=6, archive=puzzles)
+
+            self.assertEqual(grid.hint()[1], 6)
+            self.assertEqual(grid.history(), [])
+
+            grid.solve_puzzle()
+            self.assertTrue(grid.is_solved())
+
+
+if __name__ == '__main__':
+    unittest.main()
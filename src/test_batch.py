@@ -0,0 +1,61 @@
+import random
+import unittest
+
+from grid import Grid
+
+try:
+    import batch
+except ImportError:
+    batch = None
+
+
+@unittest.skipIf(batch is None, "numpy is not installed")
+class TestBatchGrid(unittest.TestCase):
+
+    def test_matches_grid_moves(self):
+        num_cols = 5
+        num_rows = 3
+        grids = []
+        for i in range(20):
+            grid = Grid(num_cols, num_rows)
+            grid.create_new_puzzle(rand_seed=i)
+            grids.append(grid)
+
+        batch_grid = batch.BatchGrid.from_grids(grids)
+
+        random.seed(6)
+        for step in range(10):
+            cols = [random.randrange(num_cols) for grid in grids]
+            rows = [random.randrange(num_rows) for grid in grids]
+
+            batch_grid.step(cols, rows)
+            for grid, col, row in zip(grids, cols, rows):
+                grid.player_toggle_cell(col, row)
+
+        for i, grid in enumerate(grids):
+            self.assertEqual(batch_grid.to_grid(i), grid)
+
+    def test_solved(self):
+        grids = [Grid(3, 3), Grid(3, 3)]
+        grids[1].player_toggle_cell(1, 1)
+
+        batch_grid = batch.BatchGrid.from_grids(grids)
+        self.assertListEqual(list(batch_grid.solved()), [True, False])
+
+        # Same move undoes it; toggles the first board
+        batch_grid.step([0, 1], [0, 1])
+        self.assertListEqual(list(batch_grid.solved()), [False, True])
+
+    def test_step_index_error(self):
+        batch_grid = batch.BatchGrid(2, 3, 3)
+
+        with self.assertRaises(IndexError):
+            batch_grid.step([0, 3], [0, 0])
+
+    def test_mismatched_dimensions(self):
+        with self.assertRaises(ValueError):
+            batch.BatchGrid.from_grids([Grid(3, 3), Grid(4, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
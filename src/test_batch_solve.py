@@ -0,0 +1,65 @@
+import json
+import random
+import unittest
+
+from grid import Grid
+import batch_solve
+import generator
+import solver
+
+
+class TestBatchSolve(unittest.TestCase):
+
+    def board_line(self, request_id, num_cols, num_rows, rand_seed, method=None):
+        board, presses = generator.generate_puzzle(num_cols, num_rows, 4, random.Random(rand_seed))
+
+        grid = Grid(num_cols, num_rows)
+        grid.load_board(board)
+        rows = ["".join(grid.view().cell(c, r) for c in range(num_cols)) for r in range(num_rows)]
+
+        return json.dumps({"id": request_id, "board": rows, "method": method})
+
+    def test_solve_line(self):
+        result = json.loads(batch_solve.solve_line(self.board_line("a", 5, 5, 1, solver.OPTIMAL), 1))
+
+        self.assertEqual(result["id"], "a")
+        self.assertTrue(result["solvable"])
+        self.assertTrue(result["solved"])
+        self.assertEqual(result["num_moves"], 4)
+        self.assertEqual(len(result["moves"]), 4)
+
+    def test_unsolvable_and_invalid_lines(self):
+        # A single light off in the corner of a 4x4 can't be solved
+        unsolvable = json.dumps({"board": ["·OOO", "OOOO", "OOOO", "OOOO"]})
+        self.assertEqual(json.loads(batch_solve.solve_line(unsolvable, 3)), {"id": 3, "solvable": False})
+
+        for line in ["not json", json.dumps({"board": ["OO", "O"]}), json.dumps({"board": ["OX"]}), json.dumps({"board": ["O"], "topology": "cube"})]:
+            self.assertIn("error", json.loads(batch_solve.solve_line(line, 1)))
+
+    def test_step_lines(self):
+        lines = [json.loads(line) for line in batch_solve.step_lines(self.board_line("a", 5, 5, 1, solver.OPTIMAL), 1)]
+
+        self.assertEqual([line["step"] for line in lines[:-1]], [1, 2, 3, 4])
+        self.assertEqual([line["move"] for line in lines[:-1]], lines[-1]["moves"])
+        self.assertIn(f"Step: ({lines[0]['move'][0]}, {lines[0]['move'][1]})", lines[0]["frame"])
+        self.assertTrue(lines[-1]["solved"])
+
+        unsolvable = json.dumps({"board": ["·OOO", "OOOO", "OOOO", "OOOO"]})
+        self.assertEqual([json.loads(line) for line in batch_solve.step_lines(unsolvable, 3)], [{"id": 3, "solvable": False}])
+        self.assertIn("error", json.loads(next(batch_solve.step_lines("not json", 1))))
+
+    def test_solve_stream(self):
+        lines = [self.board_line(i, 4 + i % 3, 5, i) for i in range(40)]
+        lines.insert(10, "")
+
+        # Small chunks and window, so the bounded submit path is used
+        ordered = [json.loads(line) for line in batch_solve.solve_stream(lines, workers=2, chunk_size=3, max_pending=2)]
+        self.assertEqual([result["id"] for result in ordered], list(range(40)))
+        self.assertTrue(all(result["solved"] for result in ordered))
+
+        unordered = [json.loads(line) for line in batch_solve.solve_stream(lines, workers=2, ordered=False, chunk_size=3, max_pending=2)]
+        self.assertEqual(sorted(unordered, key=lambda result: result["id"]), ordered)
+
+
+if __name__ == '__main__':
+    unittest.main()
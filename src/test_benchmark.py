@@ -0,0 +1,37 @@
+import unittest
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        seen = []
+        current = benchmark.run_benchmarks([4, 64], repeat=2, random_seed=7, progress=seen.append)
+
+        results = current["results"]
+        self.assertEqual(results, seen)
+        # Both seed modes of every case, except solution_steps_str which stops at 32
+        self.assertEqual(len(results), 2 * 2 * (len(benchmark.BENCHMARKS) - 1) + 2)
+        self.assertEqual({(result["seed_mode"], result["seed"]) for result in results}, {("fixed", 0), ("random", 7)})
+        for result in results:
+            self.assertEqual(result["runs"], 2)
+            self.assertGreater(result["median_ns"], 0)
+            self.assertLessEqual(result["min_ns"], result["median_ns"])
+
+    def test_compare(self):
+        baseline = {"results": [
+            {"name": "toggle", "size": 4, "seed_mode": "fixed", "median_ns": 100},
+            {"name": "toggle", "size": 4, "seed_mode": "random", "median_ns": 100},
+        ]}
+        current = {"results": [
+            {"name": "toggle", "size": 4, "seed_mode": "fixed", "median_ns": 150},
+            {"name": "toggle", "size": 16, "seed_mode": "fixed", "median_ns": 150},
+        ]}
+
+        comparisons = benchmark.compare(current, baseline)
+        self.assertEqual([(result["size"], ratio) for result, baseline_result, ratio in comparisons], [(4, 1.5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import os
+import re
+import unittest
+
+from grid import Grid
+import display
+
+
+"""Screen lines after writing the output to a terminal. Knows the escape codes display.py uses"""
+def screen_lines(output):
+    lines = [[]]
+    row, col = 0, 0
+
+    for token in re.findall(r"\x1b\[(?:\d+;\d+)?H|\x1b\[2J|\x1b\[J|\n|[^\x1b\n]", output):
+        if token == "\n":
+            row, col = row + 1, 0
+        elif token == "\x1b[2J":
+            lines = [[]]
+        elif token == "\x1b[J":
+            del lines[row + 1:]
+            del lines[row][col:]
+        elif token.startswith("\x1b["):
+            position = token[2:-1]
+            row, col = (int(value) - 1 for value in position.split(";")) if position else (0, 0)
+        else:
+            while len(lines[row]) < col:
+                lines[row].append(" ")
+            lines[row][col:col + 1] = [token]
+            col += 1
+
+        while len(lines) <= row:
+            lines.append([])
+
+    return ["".join(line) for line in lines]
+
+
+class TestDisplay(unittest.TestCase):
+
+    def test_live_redraws_changed_cells(self):
+        output = io.StringIO()
+        screen = display.LiveDisplay(output, lambda: os.terminal_size((120, 40)))
+
+        # Two digit rows have wider labels
+        grid = Grid(12, 12)
+        grid.create_new_puzzle(rand_seed=1)
+        screen.draw(grid)
+
+        for col, row in [(0, 0), (11, 11), (5, 10), (3, 2)]:
+            grid.player_toggle_cell(col, row)
+            start = output.tell()
+            screen.message(f"Entered col: {col}, row: {row}")
+            screen.draw(grid)
+
+            # A cursor move and a symbol for each of the changed cells, then the move below the grid
+            update = output.getvalue()[start:]
+            self.assertLessEqual(update.count("\x1b["), 5 + 2)
+            self.assertLess(len(update), 150)
+
+            lines = screen_lines(output.getvalue())
+            self.assertEqual(lines[:16], repr(grid).split("\n")[:16])
+            self.assertEqual(lines[15:], ["", f"Entered col: {col}, row: {row}", ""])
+
+        # A new puzzle changes most of the board: full redraw
+        grid.create_new_puzzle(rand_seed=2)
+        start = output.tell()
+        screen.draw(grid)
+        self.assertTrue(output.getvalue()[start:].startswith("\x1b[H\x1b[2J"))
+        self.assertEqual(screen_lines(output.getvalue())[:16], repr(grid).split("\n")[:16])
+
+    def test_full_redraw(self):
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=1)
+
+        # Not a terminal
+        output = io.StringIO()
+        screen = display.for_output(output)
+        self.assertIsInstance(screen, display.FullDisplay)
+        self.assertNotIsInstance(screen, display.LiveDisplay)
+        screen.draw(grid)
+        self.assertEqual(output.getvalue(), f"\n\n{grid}\n")
+
+        # The grid doesn't fit on the terminal
+        output = io.StringIO()
+        screen = display.LiveDisplay(output, lambda: os.terminal_size((80, 10)))
+        screen.draw(grid)
+        screen.draw(grid)
+        self.assertEqual(output.getvalue(), f"\n\n{grid}\n" * 2)
+
+    def test_wide_grid(self):
+        # Widest line of the frame, rows or column labels
+        for num_cols, num_rows in [(5, 5), (12, 11), (9, 120), (105, 3)]:
+            lines = repr(Grid(num_cols, num_rows)).split("\n")
+            self.assertEqual(display._grid_width(num_cols, num_rows), max(len(line) for line in lines))
+
+        # Tall enough, but the rows would wrap: drawn in full
+        grid = Grid(30, 5)
+        grid.create_new_puzzle(rand_seed=1)
+        output = io.StringIO()
+        screen = display.LiveDisplay(output, lambda: os.terminal_size((80, 40)))
+        screen.draw(grid)
+        screen.draw(grid)
+        self.assertEqual(output.getvalue(), f"\n\n{grid}\n" * 2)
+
+        # Wide enough: drawn live
+        output = io.StringIO()
+        screen = display.LiveDisplay(output, lambda: os.terminal_size((120, 40)))
+        screen.draw(grid)
+        self.assertTrue(output.getvalue().startswith("\x1b[H\x1b[2J"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import random
+import tempfile
+import unittest
+
+from grid import Grid
+from topology import TORUS
+import gamelog
+
+
+class TestGameLog(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "session")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def play(self, grid, log, num_moves, rand_seed):
+        rng = random.Random(rand_seed)
+        num_cols, num_rows = grid.dimensions()
+        for i in range(num_moves):
+            col, row = rng.randrange(num_cols), rng.randrange(num_rows)
+            grid.player_toggle_cell(col, row)
+            log.record_move(col, row)
+
+    def test_recover_without_session(self):
+        self.assertIsNone(gamelog.recover(self._path))
+
+    def test_recover_events(self):
+        grid = Grid(5, 4, TORUS)
+        grid.create_new_puzzle(rand_seed=1)
+        log = gamelog.GameLog(self._path, grid, sync_every=8)
+
+        self.play(grid, log, 20, rand_seed=1)
+        grid.undo_last_move()
+        log.record_undo()
+        grid.undo_last_move()
+        log.record_undo()
+        grid.redo_move()
+        log.record_redo()
+        grid.jump_to_move(7)
+        log.record_jump(7)
+        log.close()
+
+        recovered = gamelog.recover(self._path)
+        self.assertEqual(recovered, grid)
+        self.assertEqual(recovered.topology(), TORUS)
+        self.assertEqual(recovered.snapshot(), grid.snapshot())
+        self.assertEqual(recovered.history(), grid.history())
+
+        # The undone moves can still be redone
+        self.assertEqual(recovered.redo_move(), grid.redo_move())
+
+    def test_recover_new_puzzle_and_reset(self):
+        grid = Grid(6, 6)
+        grid.create_new_puzzle(rand_seed=2)
+        log = gamelog.GameLog(self._path, grid)
+
+        self.play(grid, log, 5, rand_seed=2)
+        grid.reset()
+        log.record_reset()
+        grid.create_new_puzzle(rand_seed=3)
+        log.record_new_puzzle()
+        self.play(grid, log, 3, rand_seed=3)
+        log.close()
+
+        recovered = gamelog.recover(self._path)
+        self.assertEqual(recovered.snapshot(), grid.snapshot())
+        self.assertEqual(recovered.history(), grid.history())
+
+        recovered.reset()
+        grid.reset()
+        self.assertEqual(recovered.snapshot(), grid.snapshot())
+
+    def test_snapshot_interval(self):
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=4)
+        log = gamelog.GameLog(self._path, grid, snapshot_interval=10)
+
+        self.play(grid, log, 25, rand_seed=4)
+        log.close()
+
+        # Only the records after the last snapshot are in the log: 5 moves of 9 bytes
+        header_size = len(gamelog._FILE_HEADER.pack(b"LGLG", 1, 0))
+        self.assertEqual(os.path.getsize(self._path + ".log"), header_size + 5 * 9)
+
+        recovered = gamelog.recover(self._path)
+        self.assertEqual(recovered.snapshot(), grid.snapshot())
+        self.assertEqual(len(recovered.history()), 25)
+
+    def test_torn_tail(self):
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=5)
+        log = gamelog.GameLog(self._path, grid)
+
+        self.play(grid, log, 4, rand_seed=5)
+        log.sync()
+        after_four_moves = grid.snapshot()
+
+        self.play(grid, log, 1, rand_seed=6)
+        log.close()
+
+        # Crash in the middle of writing the last record
+        with open(self._path + ".log", "r+b") as f:
+            f.truncate(os.path.getsize(self._path + ".log") - 3)
+
+        recovered = gamelog.recover(self._path)
+        self.assertEqual(recovered.snapshot(), after_four_moves)
+
+    def test_stale_log_is_ignored(self):
+        grid = Grid(4, 4)
+        grid.create_new_puzzle(rand_seed=6)
+        log = gamelog.GameLog(self._path, grid)
+
+        self.play(grid, log, 3, rand_seed=6)
+        log.close()
+        with open(self._path + ".log", "rb") as f:
+            stale_log = f.read()
+
+        # Crash after the next snapshot was written, before its log
+        gamelog.GameLog(self._path, grid).close()
+        with open(self._path + ".log", "wb") as f:
+            f.write(stale_log)
+
+        recovered = gamelog.recover(self._path)
+        self.assertEqual(recovered.snapshot(), grid.snapshot())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import random
+import time
+import unittest
+
+from board import toggle_patterns
+from grid import Grid
+from topology import TOPOLOGIES
+import generator
+import solver
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_exact_minimal_moves(self):
+        # 4x4 and 5x5 have null spaces, 3x3 doesn't
+        for num_cols, num_rows in [(3, 3), (4, 4), (5, 5)]:
+            for num_moves in range(0, 8):
+                board, presses = generator.generate_puzzle(num_cols, num_rows, num_moves)
+
+                self.assertEqual(presses.bit_count(), num_moves)
+                optimal_presses = solver.optimal_solve_board(board, num_cols, num_rows)
+                self.assertEqual(optimal_presses.bit_count(), num_moves)
+
+    def test_moves_range(self):
+        for board, presses in generator.generate_puzzles(5, 5, count=20, num_moves=(3, 6), rand_seed=1):
+            self.assertGreaterEqual(presses.bit_count(), 3)
+            self.assertLessEqual(presses.bit_count(), 6)
+
+    def test_board_from_presses(self):
+        rng = random.Random(4)
+        for topology in TOPOLOGIES.values():
+            for num_cols, num_rows in [(1, 1), (1, 5), (5, 1), (4, 4), (7, 5), (9, 12)]:
+                shifts, patterns = toggle_patterns(num_cols, num_rows, topology)
+                presses = rng.getrandbits(num_cols * num_rows)
+
+                # Toggle mask of every press, one at a time
+                expected = (1 << (num_cols * num_rows)) - 1
+                for bit in range(num_cols * num_rows):
+                    if (presses >> bit) & 1:
+                        expected ^= patterns[bit] << shifts[bit]
+                self.assertEqual(generator.board_from_presses(presses, num_cols, num_rows, topology), expected, topology.name)
+
+        # Linear in the board size: half the cells of a 1000x1000 board pressed
+        presses = rng.getrandbits(1000 * 1000)
+        generator.board_from_presses(0, 1000, 1000)
+        start = time.perf_counter()
+        generator.board_from_presses(presses, 1000, 1000)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_distinct_puzzles(self):
+        puzzles = list(generator.generate_puzzles(4, 4, count=200, num_moves=(1, 7), rand_seed=2))
+        boards = set(board for board, presses in puzzles)
+
+        self.assertEqual(len(boards), 200)
+
+    def test_invalid_moves(self):
+        with self.assertRaises(ValueError):
+            generator.generate_puzzle(3, 3, 10)
+
+        # 4x4 puzzles never need more than 7 moves
+        with self.assertRaises(ValueError):
+            generator.generate_puzzle(4, 4, 8)
+
+        # Fewer distinct puzzles than asked for: 3x3 has one with no moves, 4x4 has 16 with one move
+        with self.assertRaises(ValueError):
+            list(generator.generate_puzzles(3, 3, 2, 0))
+        with self.assertRaises(ValueError):
+            list(generator.generate_puzzles(4, 4, 17, 1, rand_seed=1))
+        self.assertEqual(len(list(generator.generate_puzzles(4, 4, 16, 1, rand_seed=1))), 16)
+
+        # 39x39's null space is too large to prove the minimal move count
+        with self.assertRaises(ValueError):
+            generator.generate_puzzle(39, 39, 5)
+
+    def test_create_new_puzzle_with_moves(self):
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=4, num_moves=6)
+
+        self.assertEqual(grid.optimal_hint()[1], 6)
+        self.assertEqual(grid.history(), [])
+
+        grid.player_toggle_cell(0, 0)
+        grid.reset()
+        grid.solve_puzzle()
+        self.assertTrue(grid.is_solved(), f"\nGrid is not solved:\n{grid}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import random
+import time
+import tracemalloc
 import unittest
 
+from board import toggle_masks
 from grid import *
 
 
@@ -204,6 +207,36 @@ class TestGrid(unittest.TestCase):
         # Right
         self.assertEqual(grid._grid[toggled_cell_col + 1][toggled_cell_row], grid._light_off)
 
+    def test_toggle_masks(self):
+        # Shared by grids of the same dimensions
+        self.assertIs(Grid(3, 3)._toggle_patterns, Grid(3, 3)._toggle_patterns)
+
+        # Center cell of a 3x3 grid: the cell and its 4 neighbors
+        masks = toggle_masks(3, 3)
+        expected_mask = 0
+        for col, row in [(1, 1), (1, 0), (0, 1), (1, 2), (2, 1)]:
+            expected_mask |= 1 << cell_bit(col, row, 3)
+        self.assertEqual(masks[cell_bit(1, 1, 3)], expected_mask)
+
+        # Compact form gives the same masks
+        shifts, patterns = toggle_patterns(3, 3)
+        for bit in range(9):
+            self.assertEqual(patterns[bit] << shifts[bit], masks[bit])
+
+        # Interior cells of a large board share one pattern
+        shifts, patterns = toggle_patterns(50, 50)
+        self.assertIs(patterns[cell_bit(10, 10, 50)], patterns[cell_bit(20, 30, 50)])
+
+    def test_packed_board_round_trip(self):
+        grid = Grid(4, 3)
+        grid.create_new_puzzle(rand_seed=5)
+
+        # Writing the list-of-lists view back gives the same board
+        other = Grid(4, 3)
+        other._grid = grid._grid
+        self.assertEqual(other, grid)
+        self.assertEqual(other._board, grid._board)
+
     def test_create_new_puzzle(self):
         col = 3
         row = 5
@@ -250,6 +283,23 @@ class TestGrid(unittest.TestCase):
         # Current solution re-initialized
         self.assertEqual(grid._curr_solution, grid._original_solution)
 
+    def test_reset_keeps_original_hash(self):
+        grid = Grid(400, 400)
+        grid.create_new_puzzle(rand_seed=2)
+        original_hash = grid.state_hash()
+
+        # The original puzzle's hash is kept: reset, the first move and saving the session don't hash the board again
+        start = time.perf_counter()
+        grid.player_toggle_cell(5, 7)
+        self.assertEqual(grid.session()[0].state_hash, original_hash)
+        grid.reset()
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.assertEqual(zobrist_hash(grid._board, 400 * 400), original_hash)
+        self.assertLess(elapsed, time.perf_counter() - start)
+        self.assertEqual(grid.state_hash(), original_hash)
+
     def test_solve_with_no_player_input(self):
         grid = Grid(3, 5)
         grid.create_new_puzzle()
@@ -312,6 +362,168 @@ class TestGrid(unittest.TestCase):
         grid.undo_last_move()
         self.assertEqual(grid, original_grid)
 
+    def test_hint_follows_live_solution(self):
+        grid = Grid(3, 3)
+        self.assertEqual(grid.hint(), (None, 0))
+
+        grid.player_toggle_cell(2, 1)
+        self.assertEqual(grid.hint(), ((2, 1), 1))
+
+        grid.player_toggle_cell(0, 0)
+        self.assertEqual(grid.hint(), ((0, 0), 2))
+
+        grid.undo_last_move()
+        self.assertEqual(grid.hint(), ((2, 1), 1))
+
+    def test_hint_after_board_edited_by_hand(self):
+        # 3x3 is invertible: the solution is found again for the edited board
+        grid = Grid(3, 3)
+        grid._toggle_single_cell(1, 1)
+
+        coord, num_moves_left = grid.hint()
+        self.assertGreater(num_moves_left, 0)
+
+        grid.solve_puzzle()
+        self.assertTrue(grid.is_solved(), f"\nGrid is not solved:\n{grid}")
+
+    def test_state_hash(self):
+        grid = Grid(5, 4)
+        grid.create_new_puzzle(rand_seed=3)
+        original_hash = grid.state_hash()
+
+        # Incremental hash matches hashing from scratch
+        self.perform_player_moves(grid, 6, rand_seed=4)
+        self.assertEqual(grid.state_hash(), zobrist_hash(grid._board, 20))
+
+        # Undo and reset restore it
+        grid.undo_last_move()
+        self.assertEqual(grid.state_hash(), zobrist_hash(grid._board, 20))
+        grid.reset()
+        self.assertEqual(grid.state_hash(), original_hash)
+
+        # Equal grids dedupe in a set
+        other = Grid(5, 4)
+        other.create_new_puzzle(rand_seed=3)
+        self.assertEqual(len(set([grid, other])), 1)
+
+        # All lights on hashes to 0
+        grid.solve_puzzle()
+        self.assertEqual(grid.state_hash(), 0)
+
+    def test_zobrist_hash(self):
+        rng = random.Random(6)
+        for num_cells in [1, 7, 8, 9, 20, 63, 64, 65, 300]:
+            keys = zobrist_keys(num_cells)
+            board = rng.getrandbits(num_cells)
+
+            # XOR of the keys of the lights that are off, a cell at a time
+            expected = 0
+            for bit in range(num_cells):
+                if not (board >> bit) & 1:
+                    expected ^= keys[bit]
+            self.assertEqual(zobrist_hash(board, num_cells), expected)
+
+        # Linear in the board size: a 1000x1000 board with half its lights off hashes in well under a second
+        num_cells = 1000 * 1000
+        board = rng.getrandbits(num_cells)
+        start = time.perf_counter()
+        zobrist_hash(board, num_cells)
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_snapshot_restore(self):
+        grid = Grid(4, 4)
+        grid.create_new_puzzle(rand_seed=2)
+        snapshot = grid.snapshot()
+        before = repr(grid)
+
+        self.perform_player_moves(grid, 4, rand_seed=5)
+        grid.restore(snapshot)
+
+        self.assertEqual(repr(grid), before)
+        self.assertEqual(grid.snapshot(), snapshot)
+        # Shares the board int instead of copying it
+        self.assertIs(grid._board, snapshot.board)
+
+    def test_view_matches_grid(self):
+        grid = Grid(5, 3)
+        grid.create_new_puzzle(rand_seed=4)
+        view = grid.view()
+
+        self.assertEqual(len(view), 5)
+        self.assertEqual([list(column) for column in view], grid._grid)
+
+        # The view keeps the board it was taken from
+        grid.player_toggle_cell(0, 0)
+        self.assertNotEqual([list(column) for column in view], grid._grid)
+
+    def test_solution_steps(self):
+        grid = Grid(6, 5)
+        grid.create_new_puzzle(rand_seed=2)
+        grid.player_toggle_cell(1, 1)
+        before = grid.snapshot()
+
+        steps = grid.solution_steps()
+        # The snapshot is taken when the steps are asked for
+        grid.player_toggle_cell(2, 2)
+        grid.undo_last_move()
+
+        frames = []
+        for coords, frame in steps:
+            self.assertIn(f"Step: {coords}", frame)
+            frames.append(frame + "\n")
+
+        # The grid isn't played
+        self.assertEqual(grid.snapshot(), before)
+        self.assertEqual(len(frames), len(grid.get_curr_solution()))
+        self.assertEqual("".join(frames), grid.solution_steps_str())
+        self.assertTrue(grid.is_solved())
+
+    def test_solution_steps_memory(self):
+        grid = Grid(30, 30)
+        grid.create_new_puzzle(rand_seed=1)
+        steps = grid.solution_steps()
+        frame_size = len(next(steps)[1])
+
+        # Streaming a few hundred steps holds about one frame at a time
+        tracemalloc.start()
+        num_steps = sum(1 for step in steps)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertGreater(num_steps, 100)
+        self.assertLess(peak, 10 * frame_size)
+
+    def test_session_memory_budget(self):
+        # Bytes per session, measured with tracemalloc - a new puzzle, then after 10 moves
+        budgets = {(5, 5): (300, 800), (50, 50): (1200, 2400)}
+
+        for (num_cols, num_rows), (new_budget, played_budget) in budgets.items():
+            # Shared tables are built once, outside the measurement - every cell's toggle pattern included,
+            # or other tests' patterns can make the shared caches grow inside it
+            warm_up = Grid(num_cols, num_rows)
+            for bit in range(num_cols * num_rows):
+                warm_up.player_toggle_cell(bit % num_cols, bit // num_cols)
+
+            num_grids = 20
+            tracemalloc.start()
+            grids = []
+            for i in range(num_grids):
+                grid = Grid(num_cols, num_rows)
+                grid.create_new_puzzle(rand_seed=i)
+                grids.append(grid)
+            new_size = tracemalloc.get_traced_memory()[0] / num_grids
+
+            for grid in grids:
+                for i in range(10):
+                    grid.player_toggle_cell(i % num_cols, (3 * i) % num_rows)
+            played_size = tracemalloc.get_traced_memory()[0] / num_grids
+            tracemalloc.stop()
+
+            self.assertLessEqual(new_size, new_budget, f"{num_cols}x{num_rows}")
+            self.assertLessEqual(played_size, played_budget, f"{num_cols}x{num_rows}")
+
+        self.assertFalse(hasattr(Grid(), "__dict__"))
+
 # Run single test:
 # python3 src/test_grid.py TestGrid.test_undo_last_move
 if __name__ == "__main__":
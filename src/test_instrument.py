@@ -0,0 +1,84 @@
+import io
+import random
+import unittest
+
+from grid import Grid
+import instrument
+
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_histogram_percentiles(self):
+        histogram = instrument.Histogram()
+        values = list(range(1, 100001))
+        random.Random(1).shuffle(values)
+        for value in values:
+            histogram.record(value)
+
+        self.assertEqual(histogram.count, 100000)
+        self.assertEqual(histogram.max, 100000)
+        self.assertEqual(histogram.percentile(100), 100000)
+        self.assertEqual(instrument.Histogram().percentile(50), 0)
+
+        # Within a bucket: 12.5%
+        for percent in [1, 50, 95, 99]:
+            exact = percent * 1000
+            self.assertGreaterEqual(histogram.percentile(percent), exact)
+            self.assertLessEqual(histogram.percentile(percent), exact * 1.125)
+
+        # Small values are exact
+        small = instrument.Histogram()
+        for value in [3, 3, 7, 12]:
+            small.record(value)
+        self.assertEqual(small.percentile(50), 3)
+        self.assertEqual(small.percentile(75), 7)
+
+    def test_disabled_records_nothing(self):
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=1)
+        grid.player_toggle_cell(1, 1)
+        grid.undo_last_move()
+        repr(grid)
+
+        self.assertEqual(instrument.stats(), {"counters": {}, "latency_ns": {}, "events": []})
+
+    def test_events(self):
+        instrument.enable(sample_every=2, max_events=3)
+
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=1)
+        for i in range(5):
+            grid.player_toggle_cell(i, i)
+        grid.undo_last_move()
+        grid.redo_move()
+        grid.find_solution()
+        grid.find_solution()
+        repr(grid)
+
+        stats = instrument.stats()
+        self.assertEqual(stats["counters"]["toggle"], 5)
+        self.assertEqual(stats["counters"]["undo"], 1)
+        self.assertEqual(stats["counters"]["redo"], 1)
+        self.assertEqual(stats["counters"]["generate"], 1)
+        self.assertEqual(stats["counters"]["render"], 1)
+        self.assertEqual(stats["counters"]["solve.cache_hit"], 1)
+        self.assertEqual(stats["latency_ns"]["toggle"]["count"], 5)
+
+        # 11 events, every 2nd sampled, the latest 3 kept
+        self.assertEqual(len(stats["events"]), 3)
+        self.assertEqual(stats["events"][-1][1], "solve")
+
+        output = io.StringIO()
+        instrument.dump(output)
+        self.assertIn("toggle: 5,", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
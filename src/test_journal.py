@@ -0,0 +1,116 @@
+import random
+import unittest
+
+from grid import Grid
+from journal import MoveJournal
+
+
+class TestMoveJournal(unittest.TestCase):
+
+    def test_undo_redo(self):
+        journal = MoveJournal(start=None)
+        journal.record(3, lambda: None)
+        journal.record(7, lambda: None)
+
+        self.assertEqual(journal.undo(), 7)
+        self.assertEqual(journal.undo(), 3)
+        self.assertIsNone(journal.undo())
+
+        self.assertEqual(journal.redo(), 3)
+        self.assertEqual(list(journal.played()), [3])
+
+        # A new move drops the redo
+        journal.record(5, lambda: None)
+        self.assertIsNone(journal.redo())
+        self.assertEqual(list(journal.played()), [3, 5])
+        self.assertEqual(len(journal), 2)
+
+    def test_checkpoints(self):
+        snapshots = []
+        journal = MoveJournal(start="start", checkpoint_interval=2)
+
+        for bit in range(5):
+            journal.record(bit, lambda: snapshots.append(bit) or bit)
+
+        # Snapshot taken after moves 2 and 4
+        self.assertEqual(snapshots, [1, 3])
+
+        # Closer to checkpoint 2 than to the current position 5
+        snapshot, bits = journal.plan_jump(3)
+        self.assertEqual(snapshot, 1)
+        self.assertEqual(bits, {2})
+
+        with self.assertRaises(IndexError):
+            journal.plan_jump(6)
+
+    def test_jump_presses_odd_parity_cells(self):
+        journal = MoveJournal(start="start")
+        for bit in [1, 2, 1, 3]:
+            journal.record(bit, lambda: None)
+
+        # Cell 1 was pressed twice, so it cancels out
+        self.assertEqual(journal.plan_jump(0), ("start", set()))
+        journal.seek(0)
+        self.assertEqual(journal.plan_jump(4), (None, {2, 3}))
+
+    def test_grid_redo(self):
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=2)
+
+        grid.player_toggle_cell(1, 2)
+        after_move = grid.snapshot()
+
+        self.assertEqual(grid.undo_last_move(), (1, 2))
+        self.assertEqual(grid.redo_move(), (1, 2))
+        self.assertEqual(grid.snapshot(), after_move)
+        self.assertEqual(grid.history(), [(1, 2)])
+
+        self.assertIsNone(grid.redo_move())
+
+    def test_grid_jump_to_move(self):
+        grid = Grid(6, 6)
+        grid.create_new_puzzle(rand_seed=4)
+        grid._journal = MoveJournal(grid.snapshot(), checkpoint_interval=8)
+
+        # Record the state after every move
+        rng = random.Random(4)
+        states = [grid.snapshot()]
+        for i in range(50):
+            grid.player_toggle_cell(rng.randrange(6), rng.randrange(6))
+            states.append(grid.snapshot())
+
+        for move_number in [0, 49, 17, 24, 23, 50, 1, 33]:
+            grid.jump_to_move(move_number)
+            self.assertEqual(grid.snapshot(), states[move_number])
+            self.assertEqual(len(grid.history()), move_number)
+
+        # Playing a move after a jump drops the later moves
+        grid.jump_to_move(10)
+        grid.player_toggle_cell(0, 0)
+        self.assertEqual(len(grid.history()), 11)
+        self.assertIsNone(grid.redo_move())
+
+        with self.assertRaises(IndexError):
+            grid.jump_to_move(12)
+
+    def test_grid_jump_to_start(self):
+        # Move 0 is the board before the first move, not the original puzzle
+        grid = Grid(4, 4)
+        grid.create_new_puzzle(rand_seed=2)
+        grid.solve_puzzle()
+        grid.player_toggle_cell(0, 0)
+        grid.jump_to_move(0)
+        self.assertTrue(grid.is_solved(), f"\nGrid is not solved:\n{grid}")
+
+        grid = Grid(4, 4)
+        grid.create_new_puzzle(rand_seed=2)
+        grid._toggle_single_cell(1, 1)
+        edited = grid.snapshot()
+        grid.player_toggle_cell(2, 3)
+        grid.undo_last_move()
+        grid.jump_to_move(0)
+        self.assertEqual(grid.snapshot(), edited)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from grid import Grid
+import archive
+import gamelog
+
+_main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+"""Runs the game with the commands as its input lines. Returns what it printed"""
+def play(commands, *args):
+    result = subprocess.run([sys.executable, _main_path, "--display", "full", "--prefetch", "0", *args],
+                            input="".join(command + "\n" for command in commands), capture_output=True, text=True, timeout=60)
+    return result.stdout
+
+
+class TestMain(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    """Saves a known 4x4 puzzle as a session for the game to continue. Returns its path and a wrong move"""
+    def saved_puzzle(self):
+        grid = Grid(4, 4)
+        grid.create_new_puzzle(rand_seed=1)
+        num_moves = grid.optimal_hint()[1]
+
+        path = os.path.join(self._dir.name, "session")
+        gamelog.GameLog(path, grid).close()
+
+        # A move that leaves more moves to play
+        for bit in range(16):
+            grid.player_toggle_cell(bit % 4, bit // 4)
+            if grid.optimal_hint()[1] > num_moves:
+                return path, f"{bit % 4}, {bit // 4}"
+            grid.undo_last_move()
+
+    def test_wrong_moves_end_the_game(self):
+        # With and without a viewport
+        for viewport in ["40x20", "2x2"]:
+            path, wrong_move = self.saved_puzzle()
+            output = play([wrong_move, "undo"] * 40, "--session", path, "--viewport", viewport)
+
+            # One less after every wrong move, and the game ends after the last one - before the commands run out
+            wrong_moves_left = [int(value) for value in re.findall(r"Wrong moves left: (\d+)", output)]
+            self.assertEqual(wrong_moves_left[-1], 0, viewport)
+            self.assertEqual(wrong_moves_left, sorted(wrong_moves_left, reverse=True), viewport)
+            self.assertLess(output.count("Enter coordinates or command"), 80, viewport)
+
+    def test_archive_without_the_size(self):
+        path = os.path.join(self._dir.name, "puzzles.lga")
+        archive.build_archive(path, 5, 5, count=5, moves=[3], rand_seed=1)
+
+        # Puzzles are created instead, at startup and on new
+        output = play(["new", "quit"], "--archive", path, "--size", "4x4")
+        self.assertIn(f"==> No plus 4x4 puzzles in {path}, creating them instead", output)
+        self.assertEqual(output.count("Enter coordinates or command"), 2)
+
+        # Drawn from the archive when it has them
+        output = play(["new", "quit"], "--archive", path, "--size", "5x5")
+        self.assertNotIn("creating them instead", output)
+        self.assertEqual(output.count("Moves required: 3"), 2)
+
+    def test_board_too_large_to_solve(self):
+        result = subprocess.run([sys.executable, _main_path, "--prefetch", "0", "--topology", "torus", "--size", "100x100"],
+                                input="quit\n", capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("100x100 is too large for the torus topology", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
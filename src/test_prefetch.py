@@ -0,0 +1,103 @@
+import random
+import time
+import unittest
+
+from board import zobrist_hash
+from grid import Grid
+from topology import HEX, PLUS
+import generator
+import instrument
+import prefetch
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self._prefetcher = prefetch.PuzzlePrefetcher(depth=3, rand_seed=1)
+
+    def tearDown(self):
+        self._prefetcher.close()
+        instrument.disable()
+        instrument.reset()
+
+    def test_queues_fill_to_depth(self):
+        self._prefetcher.prefetch(5, 4)
+        self._prefetcher.prefetch(6, 6, 4, HEX)
+        self.assertTrue(self._prefetcher.wait_ready(timeout=10))
+
+        self.assertEqual(sorted(len(queue) for queue in self._prefetcher._queues.values()), [3, 3])
+
+        # Puzzles of the dimensions and difficulty, with their presses
+        for i in range(3):
+            board, presses, state_hash = self._prefetcher.random_puzzle(6, 6, 4, topology=HEX)
+            self.assertEqual(presses.bit_count(), 4)
+            self.assertEqual(state_hash, zobrist_hash(board, 36))
+            self.assertEqual(generator.board_from_presses(presses, 6, 6, HEX), board)
+
+        # Drawn puzzles are made again in the background
+        self.assertTrue(self._prefetcher.wait_ready(timeout=10))
+        self.assertEqual(len(self._prefetcher._queues[(HEX.name, 6, 6, 4)]), 3)
+
+    def test_miss(self):
+        instrument.enable()
+
+        # Nothing ready: made on the spot from the rng, then kept ready
+        board, presses, state_hash = self._prefetcher.random_puzzle(4, 4, rng=random.Random(2))
+        self.assertEqual(generator.board_from_presses(presses, 4, 4, PLUS), board)
+        self.assertTrue(self._prefetcher.wait_ready(timeout=10))
+        self._prefetcher.random_puzzle(4, 4)
+
+        self.assertEqual(instrument.stats()["counters"]["prefetch.miss"], 1)
+        self.assertEqual(instrument.stats()["counters"]["prefetch.hit"], 1)
+
+    def test_create_new_puzzle(self):
+        self._prefetcher.prefetch(50, 50)
+        self.assertTrue(self._prefetcher.wait_ready(timeout=10))
+
+        # A ready puzzle is a queue pop, much quicker than making one
+        grid = Grid(50, 50)
+        start = time.perf_counter()
+        grid.create_new_puzzle(archive=self._prefetcher)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Grid(50, 50).create_new_puzzle(rand_seed=1)
+        self.assertLess(elapsed, time.perf_counter() - start)
+
+        self.assertFalse(grid.is_solved())
+        self.assertEqual(grid.history(), [])
+        self.assertEqual(grid.state_hash(), zobrist_hash(grid.packed_board(), 50 * 50))
+        grid.solve_puzzle()
+        self.assertTrue(grid.is_solved())
+
+    def test_error(self):
+        # 4x4 puzzles can't need 9 moves: the worker keeps filling the other queues
+        self._prefetcher.prefetch(4, 4, 9)
+        self._prefetcher.prefetch(5, 5)
+        self.assertTrue(self._prefetcher.wait_ready(timeout=10))
+        self.assertTrue(self._prefetcher._thread.is_alive())
+        self.assertEqual(len(self._prefetcher._queues[(PLUS.name, 5, 5, None)]), 3)
+
+        # Drawing one raises the error
+        with self.assertRaises(ValueError):
+            self._prefetcher.random_puzzle(4, 4, 9)
+
+        self._prefetcher.prefetch(3, 3)
+        self.assertTrue(self._prefetcher.wait_ready(timeout=10))
+        self.assertEqual(len(self._prefetcher._queues[(PLUS.name, 3, 3, None)]), 3)
+
+    def test_close(self):
+        self._prefetcher.prefetch(8, 8)
+        self._prefetcher.close()
+        self.assertFalse(self._prefetcher._thread.is_alive())
+
+        # Still hands out puzzles, made on the spot
+        with prefetch.PuzzlePrefetcher() as prefetcher:
+            pass
+        self.assertFalse(prefetcher._thread.is_alive())
+        board, presses, state_hash = prefetcher.random_puzzle(3, 3)
+        self.assertEqual(generator.board_from_presses(presses, 3, 3, PLUS), board)
+
+
+if __name__ == '__main__':
+    unittest.main()
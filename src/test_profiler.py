@@ -0,0 +1,40 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from grid import Grid
+from profiler import CommandProfiler
+import solver
+
+
+class TestCommandProfiler(unittest.TestCase):
+
+    def test_measure_and_summary(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            profiler = CommandProfiler(["solve"], profile_dir)
+            grid = Grid(5, 5)
+            grid.create_new_puzzle(rand_seed=1)
+
+            for i in range(3):
+                with profiler.measure("render"):
+                    repr(grid)
+            with profiler.measure("solve"):
+                grid.solution_steps_str(method=solver.OPTIMAL)
+
+            # A failed command is still timed
+            with self.assertRaises(IndexError):
+                with profiler.measure("move"):
+                    grid.player_toggle_cell(9, 9)
+
+            lines = profiler.summary().splitlines()
+            self.assertEqual([line.split()[:2] for line in lines[1:]], [["move", "1"], ["render", "3"], ["solve", "1"]])
+
+            paths = profiler.write_profiles()
+            self.assertEqual(paths, [os.path.join(profile_dir, "solve.prof")])
+            functions = [function for file_name, line, function in pstats.Stats(paths[0]).stats]
+            self.assertIn("solution_steps_str", functions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import random
+import unittest
+
+from grid import Grid
+import render
+
+
+class TestRender(unittest.TestCase):
+
+    def test_board_rows_match_cells(self):
+        rng = random.Random(1)
+        # Rows that start and end anywhere in a byte
+        for num_cols, num_rows in [(1, 1), (3, 2), (8, 8), (9, 7), (13, 5), (40, 3)]:
+            grid = Grid(num_cols, num_rows)
+            grid.load_board(rng.getrandbits(num_cols * num_rows))
+            view = grid.view()
+
+            self.assertEqual(view.display_rows(), render.symbol_rows(view, num_cols, num_rows))
+
+    def test_grid_repr(self):
+        grid = Grid(3, 2)
+        grid.load_board(0b100101)
+
+        self.assertEqual(repr(grid), "\n     0  1  2\n     -------\n0 |  O  ·  O\n1 |  ·  ·  O\n")
+
+    def test_transition_repr(self):
+        grid = Grid(3, 3)
+        grid.load_board(0)
+        before = grid.view()
+        grid.player_toggle_cell(1, 1)
+
+        expected = (
+            "- Step: (1, 1)\n"
+            "\n     0 ›1  2            0  1  2\n"
+            "     -------            -------\n"
+            "0 |  ·  ·  ·  -->  0 |  ·  O  ·\n"
+            "1›|  · >·  ·       1 |  O  O  O\n"
+            "2 |  ·  ·  ·       2 |  ·  O  ·\n"
+        )
+        self.assertEqual(grid._grid_transtion_repr(before, grid.view(), "Step: (1, 1)", (1, 1)), expected)
+
+        # Grids with no more rows than their last column index don't get their second grid drawn
+        wide = Grid(4, 2)
+        self.assertEqual(wide._grid_transtion_repr(wide.view(), wide.view()).splitlines()[3], "0 |  O  O  O  O  -->  ")
+
+    def test_list_grids(self):
+        grid1 = [["O", "·"], ["·", "O"]]
+        grid2 = [["·", "·", "O"], ["O", "·", "·"]]
+
+        # The first grid is padded to the second grid's rows
+        self.assertEqual(Grid(2, 2)._grid_transtion_repr(grid1, grid2).splitlines()[3:], [
+            "0 |  O  ·  -->  0 |  ·  O",
+            "1 |  ·  O       1 |  ·  ·",
+            "                2 |  O  ·",
+        ])
+
+    def test_window_rows(self):
+        grid = Grid(13, 11)
+        grid.create_new_puzzle(rand_seed=3)
+        view = grid.view()
+
+        # The full frame's cells, without their separators
+        expected = [row[2::3][2:9] for row in view.display_rows()[3:7]]
+        self.assertEqual(view.window_rows(2, 3, 7, 4), expected)
+
+    def test_summary_rows(self):
+        rng = random.Random(5)
+        for i in range(100):
+            num_cols, num_rows = rng.randint(1, 40), rng.randint(1, 40)
+            board = rng.getrandbits(num_cols * num_rows)
+            col, row = rng.randrange(num_cols), rng.randrange(num_rows)
+            width, height, block = rng.randint(1, 12), rng.randint(1, 12), rng.choice([1, 2, 3, 8])
+
+            # Each block's lights counted one at a time
+            expected = []
+            for first_row in range(row, min(num_rows, row + height * block), block):
+                chars = ""
+                for first_col in range(col, min(num_cols, col + width * block), block):
+                    lights = [board >> (r * num_cols + c) & 1
+                              for r in range(first_row, min(first_row + block, num_rows))
+                              for c in range(first_col, min(first_col + block, num_cols))]
+                    num_off = lights.count(0)
+                    chars += "O" if num_off == 0 else "." if num_off == len(lights) else str(min(9, max(1, num_off * 10 // len(lights))))
+                expected.append(chars)
+
+            self.assertEqual(render.summary_rows(board, num_cols, num_rows, col, row, width, height, block, "O", "."), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from server import GameServer
+from topology import PLUS, TORUS
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+
+    async def command(self, reader, writer, line):
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        return (await reader.readline()).decode().rstrip("\n")
+
+    async def test_commands(self):
+        listener = await GameServer(5, 5).start_tcp()
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        board = await self.command(reader, writer, "board")
+        self.assertRegex(board, r"^OK board [O·]{5}(/[O·]{5}){4}$")
+
+        self.assertEqual(await self.command(reader, writer, "history"), "OK history")
+        self.assertRegex(await self.command(reader, writer, "2, 3"), r"^OK (moves=\d+|solved)$")
+        self.assertEqual(await self.command(reader, writer, "h"), "OK history 2,3")
+        self.assertEqual(await self.command(reader, writer, "undo"), "OK undo 2 3")
+        self.assertEqual(await self.command(reader, writer, "redo"), "OK redo 2 3")
+        self.assertEqual(await self.command(reader, writer, "undo"), "OK undo 2 3")
+        self.assertEqual(await self.command(reader, writer, "board"), board)
+
+        self.assertRegex(await self.command(reader, writer, "hint"), r"^OK hint \d \d moves=\d+$")
+        self.assertEqual(await self.command(reader, writer, "9, 9"), "ERR invalid col: 9, row: 9")
+        self.assertTrue((await self.command(reader, writer, "jump")).startswith("ERR unknown command"))
+
+        self.assertRegex(await self.command(reader, writer, "solve"), r"^OK solve( \d,\d)+$")
+        self.assertEqual(await self.command(reader, writer, "hint"), "OK hint none moves=0")
+        self.assertEqual(await self.command(reader, writer, "board"), "OK board " + "/".join(["OOOOO"] * 5))
+
+        self.assertRegex(await self.command(reader, writer, "reset"), r"^OK moves=\d+$")
+        self.assertEqual(await self.command(reader, writer, "board"), board)
+        self.assertRegex(await self.command(reader, writer, "new"), r"^OK moves=\d+$")
+
+        self.assertEqual(await self.command(reader, writer, "quit"), "OK bye")
+        self.assertEqual(await reader.readline(), b"")
+
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+
+    async def test_many_sessions_over_unix_socket(self):
+        with tempfile.TemporaryDirectory() as dir_name:
+            server = GameServer()
+            path = os.path.join(dir_name, "game.sock")
+            listener = await server.start_unix(path)
+
+            connections = [await asyncio.open_unix_connection(path) for i in range(100)]
+            replies = await asyncio.gather(*[self.command(reader, writer, "1, 1") for reader, writer in connections])
+            self.assertTrue(all(reply.startswith("OK") for reply in replies))
+            self.assertEqual(server.session_counts(), (100, 0))
+
+            # Each connection has its own grid
+            histories = await asyncio.gather(*[self.command(reader, writer, "history") for reader, writer in connections])
+            self.assertEqual(set(histories), {"OK history 1,1"})
+
+            for reader, writer in connections:
+                writer.close()
+            listener.close()
+            await listener.wait_closed()
+
+    async def test_idle_session_spilled_and_reloaded(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            server = GameServer(idle_timeout=0.05, spill_dir=spill_dir)
+            listener = await server.start_tcp()
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            await self.command(reader, writer, "0, 0")
+            board = await self.command(reader, writer, "board")
+
+            await asyncio.sleep(0.3)
+            self.assertEqual(server.session_counts(), (1, 1))
+            self.assertEqual(len(os.listdir(spill_dir)), 2)
+
+            # Reloaded with its history
+            self.assertEqual(await self.command(reader, writer, "board"), board)
+            self.assertEqual(server.session_counts(), (1, 0))
+            self.assertEqual(await self.command(reader, writer, "history"), "OK history 0,0")
+            self.assertEqual(os.listdir(spill_dir), [])
+
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+
+    async def test_idle_session_evicted(self):
+        listener = await GameServer(idle_timeout=0.05).start_tcp()
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        self.assertEqual(await reader.readline(), b"BYE idle\n")
+        self.assertEqual(await reader.readline(), b"")
+
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+
+    def test_board_too_large_to_solve(self):
+        # Torus boards are solved by elimination, cubic in the cells
+        with self.assertRaises(ValueError):
+            GameServer(100, 100, TORUS)
+        GameServer(100, 100, PLUS)
+
+
+if __name__ == '__main__':
+    unittest.main()
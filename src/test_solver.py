@@ -0,0 +1,217 @@
+import random
+import time
+import unittest
+
+from board import apply_presses, cell_bit, full_mask, presses_to_coords, zobrist_hash
+from grid import Grid
+import solver
+
+
+class TestSolver(unittest.TestCase):
+
+    """Applies the coordinates to the grid without tracking them as player moves"""
+    def apply_solution(self, grid, solution):
+        for col, row in solution:
+            grid._toggle_cell_group(col, row)
+
+    def test_solves_generated_puzzles(self):
+        for num_cols, num_rows in [(1, 1), (3, 5), (4, 4), (5, 5), (7, 3)]:
+            grid = Grid(num_cols, num_rows)
+            grid.create_new_puzzle(rand_seed=3)
+
+            self.apply_solution(grid, grid.find_solution())
+
+            self.assertEqual(grid._board, grid._full_mask, f"\nGrid is not solved:\n{grid}")
+
+    def test_solves_board_edited_by_hand(self):
+        # 3x3 is invertible - every board can be solved
+        grid = Grid(3, 3)
+        random.seed(4)
+        grid._board = random.getrandbits(9)
+
+        self.apply_solution(grid, grid.find_solution())
+
+        self.assertEqual(grid._board, grid._full_mask)
+
+    def test_unsolvable_board(self):
+        # 4x4 is singular. Turning off one light covered by a null space vector can't be solved
+        null_vector = solver.null_space(4, 4)[0]
+        self.assertNotEqual(null_vector, 0)
+
+        grid = Grid(4, 4)
+        lowest_bit = null_vector & -null_vector
+        grid._board ^= lowest_bit
+
+        self.assertIsNone(grid.find_solution())
+
+    def test_null_space_leaves_board_unchanged(self):
+        # 5x5 has a 2-dimensional null space
+        null_vectors = solver.null_space(5, 5)
+        self.assertEqual(len(null_vectors), 2)
+
+        grid = Grid(5, 5)
+        for bit in range(25):
+            if (null_vectors[0] >> bit) & 1:
+                grid._toggle_cell_group(bit % 5, bit // 5)
+
+        self.assertTrue(grid.is_solved())
+
+    def test_solved_board_needs_no_presses(self):
+        self.assertEqual(solver.solve_board((1 << 12) - 1, 4, 3), 0)
+        self.assertEqual(Grid(4, 3).find_solution(), [])
+
+        # Single press recovered exactly on an invertible board
+        grid = Grid(3, 3)
+        grid._toggle_cell_group(2, 1)
+        self.assertEqual(solver.solve_board(grid._board, 3, 3), 1 << cell_bit(2, 1, 3))
+
+    def test_light_chasing_matches_elimination(self):
+        for num_cols, num_rows in [(1, 1), (4, 4), (5, 5), (6, 1), (1, 6), (7, 3)]:
+            random.seed(num_cols * num_rows)
+            for i in range(10):
+                board = random.getrandbits(num_cols * num_rows)
+
+                elimination_presses = solver.solve_board(board, num_cols, num_rows)
+                chase_presses = solver.chase_solve_board(board, num_cols, num_rows)
+
+                # Both methods agree on whether the board can be solved
+                self.assertEqual(elimination_presses is None, chase_presses is None)
+
+                if chase_presses is not None:
+                    self.assertEqual(apply_presses(board, chase_presses, num_cols, num_rows), full_mask(num_cols * num_rows))
+
+                    grid = Grid(num_cols, num_rows)
+                    grid._board = board
+                    grid.solve_puzzle(method=solver.LIGHT_CHASING)
+                    self.assertTrue(grid.is_solved(), f"\nGrid is not solved:\n{grid}")
+
+    def test_light_chasing_large_board(self):
+        # Table for the dimensions built, the board solved and the grid set to solved in about a second
+        num_cols, num_rows = 1000, 1000
+        grid = Grid(num_cols, num_rows)
+        grid._set_board(random.Random(2).getrandbits(num_cols * num_rows))
+        board = grid.packed_board()
+
+        start = time.perf_counter()
+        grid.solve_puzzle(method=solver.LIGHT_CHASING)
+        self.assertLess(time.perf_counter() - start, 3)
+
+        self.assertTrue(grid.is_solved())
+        self.assertEqual(grid.state_hash(), 0)
+        presses = solver.chase_solve_board(board, num_cols, num_rows)
+        self.assertEqual(apply_presses(board, presses, num_cols, num_rows), full_mask(num_cols * num_rows))
+
+    def test_solve_puzzle_with_method(self):
+        grid = Grid(5, 3)
+        grid.create_new_puzzle(rand_seed=2)
+        grid.player_toggle_cell(1, 1)
+
+        steps = grid.solution_steps_str(method=solver.LIGHT_CHASING)
+
+        self.assertIn("Step:", steps)
+        self.assertTrue(grid.is_solved(), f"\nGrid is not solved:\n{grid}")
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            Grid(3, 3).find_solution(method="guess")
+
+    def test_optimal_solution_is_minimal(self):
+        # 4x4 and 5x5 are singular: check against every solution
+        for num_cols, num_rows in [(4, 4), (5, 5), (3, 3)]:
+            null_vectors = solver.null_space(num_cols, num_rows)
+
+            grid = Grid(num_cols, num_rows)
+            grid.create_new_puzzle(rand_seed=9)
+            board = grid._board
+
+            presses = solver.solve_board(board, num_cols, num_rows)
+            min_count = presses.bit_count()
+            for i in range(1 << len(null_vectors)):
+                other = presses
+                for j, null_vector in enumerate(null_vectors):
+                    if (i >> j) & 1:
+                        other ^= null_vector
+                min_count = min(min_count, other.bit_count())
+
+            optimal_presses = solver.optimal_solve_board(board, num_cols, num_rows)
+            self.assertEqual(optimal_presses.bit_count(), min_count)
+
+            grid.solve_puzzle(method=solver.OPTIMAL)
+            self.assertTrue(grid.is_solved(), f"\nGrid is not solved:\n{grid}")
+
+    def test_large_null_space(self):
+        # 39x39 has 32 null space vectors, 123x123 has 80: too many combinations to walk, a local search instead
+        for num_cols in [39, 123]:
+            self.assertGreater(len(solver.null_space(num_cols, num_cols)), solver.max_exhaustive_nullity)
+            self.assertFalse(solver.minimum_is_exact(num_cols, num_cols))
+
+            presses = random.Random(num_cols).getrandbits(num_cols * num_cols)
+            start = time.perf_counter()
+            optimal_presses = solver.minimize_presses(presses, num_cols, num_cols)
+            self.assertLess(time.perf_counter() - start, 1)
+
+            # Same effect, no more moves
+            self.assertLessEqual(optimal_presses.bit_count(), presses.bit_count())
+            self.assertEqual(apply_presses(0, optimal_presses, num_cols, num_cols), apply_presses(0, presses, num_cols, num_cols))
+
+        self.assertTrue(solver.minimum_is_exact(4, 4))
+
+        # Grids of those dimensions get hints and solve
+        grid = Grid(39, 39)
+        grid.create_new_puzzle(rand_seed=1)
+        self.assertGreater(grid.optimal_hint()[1], 0)
+        grid.solve_puzzle(method=solver.OPTIMAL)
+        self.assertTrue(grid.is_solved())
+
+    def test_presses_to_coords(self):
+        rng = random.Random(3)
+        for num_cols, num_rows in [(1, 1), (3, 3), (7, 5), (8, 8), (13, 11)]:
+            presses = rng.getrandbits(num_cols * num_rows)
+            expected = [(bit % num_cols, bit // num_cols) for bit in range(num_cols * num_rows) if (presses >> bit) & 1]
+            self.assertEqual(presses_to_coords(presses, num_cols), expected)
+
+        # Linear in the board size: half the cells of a 1000x1000 board
+        presses = rng.getrandbits(1000 * 1000)
+        start = time.perf_counter()
+        self.assertEqual(len(presses_to_coords(presses, 1000)), presses.bit_count())
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_optimal_hint(self):
+        # Pressing a null space pattern on 4x4 changes nothing: 0 moves required
+        grid = Grid(4, 4)
+        for col, row in presses_to_coords(solver.null_space(4, 4)[0], 4):
+            grid.player_toggle_cell(col, row)
+        self.assertGreater(len(grid.get_curr_solution()), 0)
+        self.assertEqual(grid.optimal_hint(), (None, 0))
+
+        grid.player_toggle_cell(1, 2)
+        self.assertEqual(grid.optimal_hint(), ((1, 2), 1))
+
+    def test_solve_puzzle_plays_the_presses(self):
+        # A tracked solution that doesn't solve the board leaves it unsolved
+        grid = Grid(4, 4)
+        grid.create_new_puzzle(rand_seed=3)
+        board = grid.packed_board()
+        presses = grid._solution ^ 1
+        grid._set_solution(presses)
+
+        grid.solve_puzzle()
+        self.assertFalse(grid.is_solved())
+        self.assertEqual(grid.packed_board(), apply_presses(board, presses, 4, 4))
+        self.assertEqual(grid.state_hash(), zobrist_hash(grid.packed_board(), 16))
+
+    def test_solved_with_other_moves(self):
+        # The tracked solution plus a null space pattern: every light on, but not with the tracked moves
+        grid = Grid(4, 4)
+        grid.create_new_puzzle(rand_seed=3)
+        presses = grid._solution ^ solver.null_space(4, 4)[0]
+        for col, row in presses_to_coords(presses, 4):
+            grid.player_toggle_cell(col, row)
+
+        self.assertGreater(grid.hint()[1], 0)
+        self.assertEqual(grid.optimal_hint(), (None, 0))
+        self.assertTrue(grid.is_solved())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import random
+import time
+import unittest
+
+from board import cell_bit, presses_to_coords
+from grid import Grid
+from topology import HEX, TORUS
+import solver
+import symmetry
+
+
+class TestSymmetry(unittest.TestCase):
+
+    def test_transform_moves_cells(self):
+        # Top-left corner of a 4x3 board
+        board = 1 << cell_bit(0, 0, 4)
+
+        self.assertEqual(symmetry.transform_board(board, symmetry.FLIP_HORIZONTAL, 4, 3), 1 << cell_bit(3, 0, 4))
+        self.assertEqual(symmetry.transform_board(board, symmetry.FLIP_VERTICAL, 4, 3), 1 << cell_bit(0, 2, 4))
+        self.assertEqual(symmetry.transform_board(board, symmetry.ROTATE_180, 4, 3), 1 << cell_bit(3, 2, 4))
+
+        # Clockwise: top-left goes to top-right
+        self.assertEqual(symmetry.transform_board(1 << cell_bit(0, 0, 3), symmetry.ROTATE_90, 3, 3), 1 << cell_bit(2, 0, 3))
+
+    def test_inverse(self):
+        random.seed(1)
+        for num_cols, num_rows in [(5, 5), (4, 3), (30, 30)]:
+            board = random.getrandbits(num_cols * num_rows)
+            for transform in symmetry.transforms(num_cols, num_rows):
+                transformed = symmetry.transform_board(board, transform, num_cols, num_rows)
+                self.assertEqual(symmetry.transform_board(transformed, symmetry.inverse(transform), num_cols, num_rows), board)
+
+    def test_symmetric_boards_share_canonical_form(self):
+        random.seed(2)
+        for num_cols, num_rows in [(5, 5), (4, 3), (25, 25)]:
+            board = random.getrandbits(num_cols * num_rows)
+            canonical_board = symmetry.canonical_form(board, num_cols, num_rows)[0]
+
+            for transform in symmetry.transforms(num_cols, num_rows):
+                transformed = symmetry.transform_board(board, transform, num_cols, num_rows)
+                self.assertEqual(symmetry.canonical_form(transformed, num_cols, num_rows)[0], canonical_board)
+
+    def test_restore_solution(self):
+        for grid in [Grid(5, 5), Grid(5, 3), Grid(4, 4, topology=TORUS)]:
+            grid.create_new_puzzle(rand_seed=8)
+            num_cols, num_rows = grid.dimensions()
+
+            # Solve the canonical board, map the solution back to this board
+            (name, cols, rows, canonical_board), transform = grid.canonical_form()
+            presses = solver.solve_board(canonical_board, num_cols, num_rows, grid.topology())
+            restored = symmetry.restore_presses(presses, transform, num_cols, num_rows)
+
+            for col, row in presses_to_coords(restored, num_cols):
+                grid._toggle_cell_group(col, row)
+            self.assertEqual(grid.packed_board(), grid._full_mask, f"\n{grid.topology()} grid is not solved:\n{grid}")
+
+    def test_large_boards(self):
+        # Past the byte tables: the corners still move, and every light is kept
+        for num_cols in [21, 300]:
+            corner = 1 << cell_bit(0, 0, num_cols)
+            self.assertEqual(symmetry.transform_board(corner, symmetry.ROTATE_90, num_cols, num_cols), 1 << cell_bit(num_cols - 1, 0, num_cols))
+            self.assertEqual(symmetry.transform_board(corner, symmetry.ANTI_TRANSPOSE, num_cols, num_cols),
+                             1 << cell_bit(num_cols - 1, num_cols - 1, num_cols))
+
+        random.seed(3)
+        board = random.getrandbits(300 * 300)
+        transformed = symmetry.transform_board(board, symmetry.TRANSPOSE, 300, 300)
+        self.assertEqual(transformed.bit_count(), board.bit_count())
+        self.assertEqual(symmetry.transform_board(transformed, symmetry.TRANSPOSE, 300, 300), board)
+
+        # Linear in the board size: all 8 transforms of a 300x300 board, once their permutations are built, in well under a second
+        symmetry.canonical_form(transformed, 300, 300)
+        start = time.perf_counter()
+        symmetry.canonical_form(board, 300, 300)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_hex_has_no_symmetries(self):
+        self.assertEqual(symmetry.transforms(4, 4, HEX), [symmetry.IDENTITY])
+
+
+if __name__ == "__main__":
+    unittest.main()
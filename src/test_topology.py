@@ -0,0 +1,71 @@
+import unittest
+
+from board import cell_bit, toggle_masks
+from grid import Grid
+from topology import PLUS, TORUS, EIGHT, HEX, TOPOLOGIES
+import solver
+
+
+class TestTopology(unittest.TestCase):
+
+    def test_torus_wraps(self):
+        actual_adj_coords = set(TORUS.neighbors(0, 0, 4, 3))
+        expected_coords = set([
+                            (3, 0),
+                            (1, 0),
+                            (0, 2),
+                            (0, 1)
+                        ])
+        self.assertSetEqual(actual_adj_coords, expected_coords)
+
+        # 2 columns: left and right are the same cell, toggled once
+        self.assertSetEqual(set(TORUS.neighbors(0, 1, 2, 3)), set([(1, 1), (0, 0), (0, 2)]))
+
+    def test_eight_neighbors(self):
+        self.assertEqual(len(EIGHT.neighbors(1, 1, 3, 3)), 8)
+        self.assertSetEqual(set(EIGHT.neighbors(0, 0, 3, 3)), set([(1, 0), (0, 1), (1, 1)]))
+
+    def test_hex_neighbors(self):
+        # Even row: upper and lower neighbors lean left
+        self.assertSetEqual(set(HEX.neighbors(1, 2, 4, 4)), set([(0, 2), (2, 2), (0, 1), (1, 1), (0, 3), (1, 3)]))
+        # Odd row: upper and lower neighbors lean right
+        self.assertSetEqual(set(HEX.neighbors(1, 1, 4, 4)), set([(0, 1), (2, 1), (1, 0), (2, 0), (1, 2), (2, 2)]))
+
+    def test_neighbors_are_mutual(self):
+        # The toggle matrix is symmetric, see solver._eliminate()
+        for topology in TOPOLOGIES.values():
+            masks = toggle_masks(5, 4, topology)
+            for bit in range(20):
+                for neighbor_bit in range(20):
+                    self.assertEqual((masks[bit] >> neighbor_bit) & 1, (masks[neighbor_bit] >> bit) & 1, f"{topology}: {bit} -> {neighbor_bit}")
+
+    def test_masks_cached_per_topology(self):
+        self.assertIs(toggle_masks(4, 4, TORUS), toggle_masks(4, 4, TORUS))
+        self.assertNotEqual(toggle_masks(4, 4, TORUS), toggle_masks(4, 4, PLUS))
+
+    def test_grid_move(self):
+        grid = Grid(4, 4, topology=EIGHT)
+        grid.player_toggle_cell(0, 0)
+
+        lights_off = grid._full_mask ^ grid.packed_board()
+        expected = 0
+        for col, row in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            expected |= 1 << cell_bit(col, row, 4)
+        self.assertEqual(lights_off, expected)
+
+    def test_solve_every_topology(self):
+        for topology in TOPOLOGIES.values():
+            grid = Grid(5, 4, topology=topology)
+            grid.create_new_puzzle(rand_seed=5)
+            grid.player_toggle_cell(2, 2)
+
+            grid.solve_puzzle(method=solver.OPTIMAL)
+            self.assertTrue(grid.is_solved(), f"\n{topology} grid is not solved:\n{grid}")
+
+    def test_light_chasing_needs_plus(self):
+        with self.assertRaises(ValueError):
+            Grid(4, 4, topology=TORUS).find_solution(method=solver.LIGHT_CHASING)
+
+
+if __name__ == "__main__":
+    unittest.main()
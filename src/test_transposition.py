@@ -0,0 +1,55 @@
+import unittest
+
+from grid import Grid
+from transposition import TranspositionCache
+import solver
+import transposition
+
+
+class TestTranspositionCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = TranspositionCache(max_size=2)
+        cache.put("a", 1, 10)
+        cache.put("b", 2, 20)
+
+        # "a" is now the most recently used, so "b" is evicted
+        self.assertEqual(cache.get("a", 1), (True, 10))
+        cache.put("c", 3, 30)
+
+        self.assertEqual(cache.get("b", 2), (False, None))
+        self.assertEqual(cache.get("c", 3), (True, 30))
+        self.assertEqual(len(cache), 2)
+
+    def test_hash_collision_is_a_miss(self):
+        cache = TranspositionCache()
+        cache.put("key", 0b1010, 5)
+
+        self.assertEqual(cache.get("key", 0b0101), (False, None))
+        self.assertEqual(cache.misses, 1)
+
+    def test_unsolvable_result_is_cached(self):
+        cache = TranspositionCache()
+        cache.put("key", 7, None)
+
+        self.assertEqual(cache.get("key", 7), (True, None))
+
+    def test_repeated_position_hits(self):
+        transposition.shared_cache.clear()
+
+        grid = Grid(5, 5)
+        grid.create_new_puzzle(rand_seed=6)
+        grid.optimal_hint()
+
+        # Leave and come back to the same position
+        grid.player_toggle_cell(2, 2)
+        grid.undo_last_move()
+        hits = transposition.shared_cache.hits
+        grid.optimal_hint()
+        grid.find_solution(method=solver.OPTIMAL)
+
+        self.assertEqual(transposition.shared_cache.hits, hits + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
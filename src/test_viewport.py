@@ -0,0 +1,66 @@
+import unittest
+
+from grid import Grid
+from viewport import Viewport
+
+
+class TestViewport(unittest.TestCase):
+
+    def test_fits(self):
+        self.assertTrue(Viewport(40, 20).fits())
+        self.assertFalse(Viewport(41, 20).fits())
+        self.assertFalse(Viewport(10, 21).fits())
+
+    def test_render(self):
+        grid = Grid(100, 60)
+        grid.load_board(0)
+        grid.player_toggle_cell(51, 31)
+
+        viewport = Viewport(100, 60, 20, 5)
+        viewport.follow(51, 31)
+        self.assertEqual(viewport.render(grid).splitlines(), [
+            "Cols 41-60, rows 29-33 of 100x60",
+            "     41        51",
+            "     --------------------",
+            "29 | ····················",
+            "30 | ··········O·········",
+            "31 | ·········OOO········",
+            "32 | ··········O·········",
+            "33 | ····················",
+        ])
+
+        # Already in the window
+        viewport.follow(45, 30)
+        self.assertTrue(viewport.render(grid).startswith("Cols 41-60, rows 29-33"))
+
+        # Kept on the board
+        viewport.pan(100, -100)
+        self.assertTrue(viewport.render(grid).startswith("Cols 80-99, rows 0-4"))
+        viewport.jump(0, 59)
+        self.assertTrue(viewport.render(grid).startswith("Cols 0-19, rows 55-59"))
+
+    def test_zoom(self):
+        grid = Grid(100, 60)
+        grid.load_board(0)
+        grid.player_toggle_cell(50, 30)
+
+        viewport = Viewport(100, 60, 20, 5)
+        self.assertFalse(viewport.zoom_in())
+        while viewport.zoom_out():
+            pass
+
+        # 16x16 blocks fit the board in 7 x 4 characters
+        lines = viewport.render(grid).splitlines()
+        self.assertEqual(lines[0], "Cols 0-99, rows 0-59 of 100x60, 16x16 cells per character - 1-9: tenths of the lights off")
+        self.assertEqual(lines[1:], [
+            "     0",
+            "     -------",
+            " 0 | ·······",
+            "16 | ···9···",
+            "32 | ·······",
+            "48 | ·······",
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Board topologies: which cells a move toggles along with the cell itself"""
+
+"""Neighbors are cell offsets, format: [(col, row), ...]
+description - the adjacent lights, for the game instructions
+Hex boards use different offsets on odd rows ("odd-r" layout: odd rows are shifted half a cell right)
+wrap - offsets past an edge wrap around to the other side, like a torus
+chaseable - a move only reaches one row up or down, and doesn't wrap, so boards can be solved by light chasing
+symmetric - rotating or mirroring a board doesn't change which cells are adjacent
+"""
+class Topology:
+    def __init__(self, name, description, offsets, odd_row_offsets=None, wrap=False, chaseable=False, symmetric=True):
+        self.name = name
+        self.description = description
+        self._offsets = offsets
+        self._odd_row_offsets = odd_row_offsets or offsets
+        self._wrap = wrap
+        self.chaseable = chaseable
+        self.symmetric = symmetric
+
+    """Return a list of tuples containing the adjacent cells col, row coordinates.
+        Format: [(col, row), (col, row), etc.]
+    """
+    def neighbors(self, col, row, num_cols, num_rows):
+        offsets = self._odd_row_offsets if row % 2 else self._offsets
+
+        cells = []
+        for col_offset, row_offset in offsets:
+            adj_col = col + col_offset
+            adj_row = row + row_offset
+
+            if self._wrap:
+                adj_col %= num_cols
+                adj_row %= num_rows
+            elif not (0 <= adj_col < num_cols and 0 <= adj_row < num_rows):
+                continue
+
+            # Small wrapped boards can reach the same cell twice, or the cell itself
+            if (adj_col, adj_row) != (col, row) and (adj_col, adj_row) not in cells:
+                cells.append((adj_col, adj_row))
+
+        return cells
+
+    def __repr__(self):
+        return self.name
+
+# left, right, top, bottom
+_plus_offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+PLUS = Topology("plus", "up, down, left, right", _plus_offsets, chaseable=True)
+TORUS = Topology("torus", "up, down, left, right, wrapping around the edges", _plus_offsets, wrap=True)
+EIGHT = Topology("eight", "all 8 surrounding lights", _plus_offsets + [(-1, -1), (1, -1), (-1, 1), (1, 1)])
+HEX = Topology("hex", "the 6 surrounding hex cells, odd rows shifted right",
+               [(-1, 0), (1, 0), (-1, -1), (0, -1), (-1, 1), (0, 1)],
+               odd_row_offsets=[(-1, 0), (1, 0), (0, -1), (1, -1), (0, 1), (1, 1)],
+               symmetric=False)
+
+# Lookup by name
+TOPOLOGIES = {topology.name: topology for topology in [PLUS, TORUS, EIGHT, HEX]}
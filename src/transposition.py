@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+"""Bounded LRU cache of solver results for board states.
+Key: (topology name, num_cols, num_rows, state hash, solve method)
+The board is stored with the result, so a hash collision is a miss instead of a wrong solution
+"""
+class TranspositionCache:
+    def __init__(self, max_size=4096):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    """Returns (found, presses). presses is None for a board that can't be solved"""
+    def get(self, key, board):
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] != board:
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def put(self, key, board, presses):
+        self._entries[key] = (board, presses)
+        self._entries.move_to_end(key)
+
+        # Evict the least recently used
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+# Shared by every grid
+shared_cache = TranspositionCache()
@@ -0,0 +1,99 @@
+"""A window on boards too large to print whole, see main.py --viewport.
+
+Shows width x height characters of the board, from a top left cell that follows the last move or the hint, and can be
+panned or jumped. Zoomed out, each character sums up a square block of cells (see render.summary_rows), doubling
+the block size at each zoom level until the whole board fits.
+Frames are rendered from the window's rows only: their cost grows with the viewport, not the board
+"""
+class Viewport:
+    """num_cols, num_rows - board dimensions
+    width, height (optional) - window size, in characters
+    """
+    def __init__(self, num_cols, num_rows, width=40, height=20):
+        self._num_cols = num_cols
+        self._num_rows = num_rows
+        self._width = width
+        self._height = height
+
+        # Top left cell, and cells per character side
+        self._col = 0
+        self._row = 0
+        self._block = 1
+
+        # Smallest block with the whole board in the window
+        self._max_block = 1
+        while -(-num_cols // self._max_block) > width or -(-num_rows // self._max_block) > height:
+            self._max_block *= 2
+
+    """True if the whole board fits in the window without zooming out - there's no need for a viewport"""
+    def fits(self):
+        return self._max_block == 1
+
+    """Moves the window by cols, rows characters"""
+    def pan(self, cols, rows):
+        self._move_to(self._col + cols * self._block, self._row + rows * self._block)
+
+    """Centers the window on the cell"""
+    def jump(self, col, row):
+        self._move_to(col - self._width * self._block // 2, row - self._height * self._block // 2)
+
+    """Centers the window on the cell, if it's outside the window"""
+    def follow(self, col, row):
+        if not (self._col <= col < self._col + self._width * self._block and self._row <= row < self._row + self._height * self._block):
+            self.jump(col, row)
+
+    """Doubles the cells per character, keeping the center. Returns False if the whole board is already in the window"""
+    def zoom_out(self):
+        if self._block == self._max_block:
+            return False
+        self._zoom(self._block * 2)
+        return True
+
+    """Halves the cells per character, keeping the center. Returns False if it's one cell per character already"""
+    def zoom_in(self):
+        if self._block == 1:
+            return False
+        self._zoom(self._block // 2)
+        return True
+
+    def _zoom(self, block):
+        center_col = self._col + self._width * self._block // 2
+        center_row = self._row + self._height * self._block // 2
+        self._block = block
+        self.jump(center_col, center_row)
+
+    def _move_to(self, col, row):
+        # Keep the window on the board
+        self._col = max(0, min(col, self._num_cols - self._width * self._block))
+        self._row = max(0, min(row, self._num_rows - self._height * self._block))
+
+    """Frame of the grid in the window: the window's position, a column ruler, then the rows with their row labels"""
+    def render(self, grid):
+        view = grid.view()
+        num_window_cols = min(self._width * self._block, self._num_cols - self._col)
+        num_window_rows = min(self._height * self._block, self._num_rows - self._row)
+
+        header = f"Cols {self._col}-{self._col + num_window_cols - 1}, rows {self._row}-{self._row + num_window_rows - 1} of {self._num_cols}x{self._num_rows}"
+        if self._block == 1:
+            rows = view.window_rows(self._col, self._row, num_window_cols, num_window_rows)
+        else:
+            rows = view.summary_rows(self._col, self._row, self._width, self._height, self._block)
+            header += f", {self._block}x{self._block} cells per character - 1-9: tenths of the lights off"
+
+        # Column numbers every 10 characters, the ones that fit
+        num_chars = len(rows[0])
+        labels = []
+        for c in range(0, num_chars, 10):
+            label = str(self._col + c * self._block)
+            if c + len(label) > num_chars:
+                break
+            labels.append(f"{label:<10}")
+        ruler = "".join(labels).rstrip()
+
+        label_width = len(str(self._num_rows - 1))
+        indent = " " * (label_width + 3)
+        parts = [header, "\n", indent, ruler, "\n", indent, "-" * num_chars, "\n"]
+        for r, cells in enumerate(rows):
+            parts += (f"{self._row + r * self._block:>{label_width}} | ", cells, "\n")
+
+        return "".join(parts)